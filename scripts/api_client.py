@@ -0,0 +1,401 @@
+"""
+Shared HTTP client for the admin scripts.
+
+Every call to the Cloudflare API, the Supabase Management API and the
+Supabase REST/Auth endpoints goes through one asyncio event loop running
+on a background thread, with:
+  - a pooled httpx.AsyncClient per API (keep-alive connections are reused
+    across calls and across script threads),
+  - a token bucket per API, so concurrent fan-out stays under its rate limit,
+  - retries with full-jitter exponential backoff on 429 / 5xx / connection
+    errors, honouring Retry-After,
+  - latency and retry counts recorded per endpoint (print_stats()),
+  - response bytes counted towards the caller's profiling phases, and
+    each call traced as a span with --trace (see profiling.py).
+
+Scripts stay synchronous: Api.call() submits a request to the loop and
+waits for it, so they can keep using ThreadPoolExecutor for fan-out.
+Async code can await Api.request() directly. supabase-py is routed through
+the same loop with supabase_options(), which gives it an httpx.Client whose
+transport forwards to the shared Api; supabase_client() is the one
+service-role client built that way.
+"""
+
+import re
+import sys
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import profiling
+from report_utils import percentile
+
+try:
+    import httpx
+except ImportError:
+    print("Error: httpx library not installed")
+    print("Run: pip install -r scripts/requirements.txt")
+    sys.exit(1)
+
+HTTPError = httpx.HTTPError
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+BACKOFF_BASE = 0.5     # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0
+MAX_RETRY_AFTER = 120  # never sleep longer than this on a Retry-After header
+LATENCY_WINDOW = 1000  # latencies kept per endpoint (watch mode runs for days)
+
+# Path segments that identify a resource rather than an endpoint
+_ID_SEGMENT = re.compile(r'^([0-9a-f]{12,}|[0-9a-f-]{36}|\d+)$', re.IGNORECASE)
+
+
+# ── Event Loop ─────────────────────────────────────────────────────
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """The shared event loop, started on a daemon thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='api-client', daemon=True).start()
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared loop and wait for its result (from sync code)."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+# ── Rate Limiting ──────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens/second, holding up to `burst`.
+
+    Only used from the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def block(self, seconds):
+        """Hold back every caller for `seconds` (e.g. after a 429 with Retry-After)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ── Stats ──────────────────────────────────────────────────────────
+
+def endpoint_key(method, url):
+    """'GET /accounts/{id}/pages/projects' style key for an httpx URL."""
+    segments = ['{id}' if _ID_SEGMENT.match(s) else s for s in url.path.split('/')]
+    return f"{method} {'/'.join(segments)}"
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'p50_ms': percentile(self.latencies, 50) * 1000,
+            'p95_ms': percentile(self.latencies, 95) * 1000,
+            'max_ms': max(self.latencies, default=0) * 1000,
+        }
+
+
+# ── Client ─────────────────────────────────────────────────────────
+
+class Api:
+    """A rate-limited, retrying, pooled client for one upstream API."""
+
+    def __init__(self, name, base_url='', headers=None, rate=5.0, burst=10,
+                 max_retries=4, timeout=30.0, max_connections=10):
+        self.name = name
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.bucket = TokenBucket(rate, burst)
+        self.stats = {}
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def request(self, method, url, *, params=None, json=None, content=None,
+                      headers=None, timeout=None, retries=None, idempotent=None, trace_parent=None):
+        """
+        Send a request, retrying 429/5xx and connection errors with backoff.
+
+        Non-idempotent methods (POST, PATCH) are only retried when the server
+        certainly didn't act on them: 429 responses and failed connects. Pass
+        idempotent=True for read-only POSTs such as GraphQL queries. Returns
+        the final httpx.Response; raises httpx.HTTPError if every attempt
+        failed to get a response. With --trace, the call is recorded as a
+        client span under the span id `trace_parent`.
+        """
+        method = method.upper()
+        client = self._get_client()
+        retries = self.max_retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        request = client.build_request(
+            method, url, params=params, json=json, content=content, headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+        )
+        key = endpoint_key(method, request.url)
+        stats = self.stats.setdefault(key, EndpointStats())
+        span = profiling.start_span(key, profiling.SPAN_KIND_CLIENT, trace_parent)
+        if span is not None:
+            profiling.set_http_attributes(span, method, request.url, key.split(' ', 1)[1])
+            span.set('feedown.api', self.name)
+        waited = 0.0
+
+        attempt = 0
+        while True:
+            queued = time.perf_counter()
+            await self.bucket.acquire()
+            start = time.perf_counter()
+            waited += start - queued
+            try:
+                response = await client.send(request)
+                await response.aread()
+                error = None
+            except httpx.HTTPError as e:
+                response, error = None, e
+            elapsed = time.perf_counter() - start
+            stats.latencies.append(elapsed)
+            stats.calls += 1
+            if span is not None:
+                span.add_event('attempt', **{
+                    'http.response.status_code': response.status_code if response is not None else None,
+                    'error.type': type(error).__name__ if error is not None else None,
+                    'duration_ms': round(elapsed * 1000, 1),
+                })
+
+            if error is not None:
+                retryable = idempotent or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+            else:
+                status = response.status_code
+                retryable = status == 429 or (status in RETRY_STATUSES and idempotent)
+
+            if not retryable or attempt >= retries:
+                if span is not None:
+                    finish_span(span, response, error, attempt, waited)
+                if error is not None:
+                    stats.failures += 1
+                    raise error
+                if response.status_code >= 400:
+                    stats.failures += 1
+                return response
+
+            delay = retry_after(response) if response is not None else None
+            if delay is not None:
+                self.bucket.block(delay)
+            else:
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            stats.retries += 1
+            await asyncio.sleep(delay)
+
+    def call(self, method, url, **kwargs):
+        """Synchronous request() for the (non-async) scripts."""
+        response = run(self.request(method, url, trace_parent=profiling.current_span_id(), **kwargs))
+        profiling.add_bytes(len(response.content))
+        return response
+
+    def summary(self):
+        return {endpoint: s.summary() for endpoint, s in sorted(self.stats.items())}
+
+
+def finish_span(span, response, error, retries, waited):
+    span.set('http.request.resend_count', retries)
+    span.set('feedown.rate_limit_wait_ms', round(waited * 1000, 1))
+    if response is not None:
+        span.set('http.response.status_code', response.status_code)
+        span.set('http.response.body.size', len(response.content))
+        if response.status_code >= 400:
+            span.status = profiling.STATUS_ERROR
+    span.end(error=error)
+
+
+def retry_after(response):
+    """Seconds to wait from a Retry-After header (delta or HTTP date), if any."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+# ── Registry ───────────────────────────────────────────────────────
+
+_apis = {}
+_apis_lock = threading.Lock()
+
+
+def get_api(name, **kwargs):
+    """The process-wide Api for `name`, created with kwargs on first use."""
+    with _apis_lock:
+        if name not in _apis:
+            _apis[name] = Api(name, **kwargs)
+        return _apis[name]
+
+
+def cloudflare(token):
+    """Cloudflare REST + GraphQL (1,200 requests per 5 minutes per user)."""
+    return get_api('cloudflare', headers={
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json',
+    }, rate=4.0, burst=20)
+
+
+def supabase_management():
+    """Supabase Management API (120 requests per minute)."""
+    return get_api('supabase_management', rate=2.0, burst=10, timeout=10.0)
+
+
+def supabase_rest():
+    """Supabase REST / Auth / RPC endpoints used through supabase-py."""
+    return get_api('supabase', rate=20.0, burst=40, timeout=120.0)
+
+
+# ── supabase-py Bridge ─────────────────────────────────────────────
+
+class BridgeTransport(httpx.BaseTransport):
+    """Sync httpx transport that sends every request through an Api."""
+
+    # The Api already decoded the body, so these would be wrong on the copy
+    _DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+    def __init__(self, api):
+        self.api = api
+
+    def handle_request(self, request):
+        timeout = request.extensions.get('timeout', {}).get('read')
+        response = self.api.call(
+            request.method, str(request.url),
+            content=request.read(),
+            headers={k: v for k, v in request.headers.items() if k.lower() != 'host'},
+            timeout=timeout,
+        )
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in self._DROP_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+
+def supabase_options():
+    """ClientOptions for create_client() that route supabase-py through the shared Api."""
+    from supabase import ClientOptions
+
+    return ClientOptions(httpx_client=httpx.Client(transport=BridgeTransport(supabase_rest())))
+
+
+def rpc_rows(client, name, params=None, page_size=1000):
+    """
+    Every row of a set-returning RPC, fetched page by page with Range.
+
+    PostgREST caps each response at db-max-rows (1000 on Supabase), so a
+    single .rpc() call silently drops the rest. page_size must not exceed
+    that cap, and the function needs a deterministic ORDER BY.
+    """
+    rows = []
+    while True:
+        page = client.rpc(name, params or {}).range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+_supabase = None
+_supabase_lock = threading.Lock()
+
+
+def supabase_client(url, key):
+    """
+    The process-wide service-role supabase-py client, created on first use.
+
+    Exits with a message when url or key is missing. Safe to call from the
+    scripts' pool threads.
+    """
+    global _supabase
+    with _supabase_lock:
+        if _supabase is None:
+            if not url or not key:
+                print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
+                print("Set them in .env.shared or as environment variables")
+                sys.exit(1)
+
+            from supabase import create_client
+
+            _supabase = create_client(url, key, options=supabase_options())
+    return _supabase
+
+
+# ── Reporting ──────────────────────────────────────────────────────
+
+def all_stats():
+    """{api name: {endpoint: summary}} for every Api used so far."""
+    with _apis_lock:
+        apis = sorted(_apis.items())
+    return {name: api.summary() for name, api in apis}
+
+
+def print_stats():
+    """Print per-endpoint call counts, retries and latency for every Api used."""
+    print(f"  {'API / Endpoint':<52} {'Calls':>6} {'Retry':>6} {'Fail':>5} {'p50':>7} {'p95':>7}")
+    print(f"  {'─'*52} {'─'*6} {'─'*6} {'─'*5} {'─'*7} {'─'*7}")
+    for name, endpoints in all_stats().items():
+        for endpoint, s in endpoints.items():
+            label = f"{name} {endpoint}"
+            if len(label) > 52:
+                label = label[:49] + '...'
+            print(f"  {label:<52} {s['calls']:>6} {s['retries']:>6} {s['failures']:>5} "
+                  f"{s['p50_ms']:>5.0f}ms {s['p95_ms']:>5.0f}ms")
@@ -6,6 +6,14 @@ Checks current usage against Cloudflare free tier limits.
 
 Usage:
   python scripts/check_cloudflare.py
+  python scripts/check_cloudflare.py --no-record   # Don't append to usage history
+  python scripts/check_cloudflare.py --days 30     # 30-day analytics lookback
+  python scripts/check_cloudflare.py --no-cache    # Ignore local caches and re-fetch everything
+  python scripts/check_cloudflare.py --hourly      # Add hourly Workers load profile
+  python scripts/check_cloudflare.py --http-stats  # Per-endpoint API latency / retries
+  python scripts/check_cloudflare.py --timings     # Time, calls and bytes per phase
+  python scripts/check_cloudflare.py --profile     # Same, plus cProfile (check_cloudflare.prof)
+  python scripts/feedown_admin.py cloudflare       # Same, via the admin CLI
 
 Required environment variable:
   CLOUDFLARE_API_TOKEN - API token with read access
@@ -20,15 +28,15 @@ Required environment variable:
 import os
 import sys
 import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 
-try:
-    import requests
-except ImportError:
-    print("Error: requests library not installed")
-    print("Run: pip install requests")
-    sys.exit(1)
+import local_cache
+import usage_history
+import profiling
+from report_utils import format_bytes, percentile
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -46,24 +54,22 @@ if not os.getenv('CLOUDFLARE_API_TOKEN'):
 CLOUDFLARE_API_TOKEN = os.getenv('CLOUDFLARE_API_TOKEN')
 ACCOUNT_ID = os.getenv('CLOUDFLARE_ACCOUNT_ID', 'ee20aa897421e01cb195b1e36acebf02')
 
-CF_API = 'https://api.cloudflare.com/client/v4'
+# RSS proxy Worker and its CACHE KV namespace (workers/wrangler.toml)
+PROXY_WORKER = 'feedown-worker'
+PROXY_KV_NAMESPACE_ID = os.getenv('CLOUDFLARE_KV_CACHE_ID', '76c3c4142838463b8a3b1656e750aa1c')
 
-if not CLOUDFLARE_API_TOKEN:
-    print("Error: CLOUDFLARE_API_TOKEN is required")
-    print()
-    print("Create an API token at: https://dash.cloudflare.com/profile/api-tokens")
-    print("Recommended: Use the 'Read all resources' template")
-    print()
-    print("Then add to .env.shared:")
-    print("  CLOUDFLARE_API_TOKEN=your-token-here")
-    sys.exit(1)
+# REST and GraphQL (/graphql) base; override to point at a local stand-in (tests/fake_cloudflare.py)
+CF_API = os.getenv('CLOUDFLARE_API_URL', 'https://api.cloudflare.com/client/v4')
 
 # ── Cloudflare Free Tier Limits ────────────────────────────────────
 FREE_TIER = {
     'workers_requests_per_day': 100_000,
     'workers_cpu_ms_per_invocation': 10,
+    'workers_subrequests_per_invocation': 50,
     'kv_reads_per_day': 100_000,
     'kv_writes_per_day': 1_000,
+    'kv_deletes_per_day': 1_000,
+    'kv_lists_per_day': 1_000,
     'kv_storage_mb': 1_000,       # 1 GB
     'kv_keys_max': 1_000_000_000,  # 1 billion
     'pages_deployments_per_month': 500,
@@ -72,25 +78,46 @@ FREE_TIER = {
 }
 
 
+# Requests go through the shared rate-limited client (api_client.py); this
+# is the thread fan-out used by collect_usage().
+MAX_CONCURRENT_REQUESTS = 8
+
+
+def require_credentials():
+    """Exit with setup instructions unless CLOUDFLARE_API_TOKEN is set."""
+    if not CLOUDFLARE_API_TOKEN:
+        print("Error: CLOUDFLARE_API_TOKEN is required")
+        print()
+        print("Create an API token at: https://dash.cloudflare.com/profile/api-tokens")
+        print("Recommended: Use the 'Read all resources' template")
+        print()
+        print("Then add to .env.shared:")
+        print("  CLOUDFLARE_API_TOKEN=your-token-here")
+        sys.exit(1)
+
+
+def get_cloudflare():
+    """
+    The shared Cloudflare API client. api_client (httpx) is imported here
+    rather than at module level so --help and importing this module stay fast.
+    """
+    require_credentials()
+    import api_client
+
+    return api_client.cloudflare(CLOUDFLARE_API_TOKEN)
+
+
 def cf_get(path, params=None):
     """Make an authenticated GET request to the Cloudflare API."""
-    headers = {
-        'Authorization': f'Bearer {CLOUDFLARE_API_TOKEN}',
-        'Content-Type': 'application/json',
-    }
     url = f'{CF_API}{path}'
-    resp = requests.get(url, headers=headers, params=params, timeout=30)
+    resp = get_cloudflare().call('GET', url, params=params)
     return resp.status_code, resp.json()
 
 
 def cf_post(path, data=None):
-    """Make an authenticated POST request to the Cloudflare API."""
-    headers = {
-        'Authorization': f'Bearer {CLOUDFLARE_API_TOKEN}',
-        'Content-Type': 'application/json',
-    }
+    """Make an authenticated POST request to the Cloudflare API (GraphQL queries only)."""
     url = f'{CF_API}{path}'
-    resp = requests.post(url, headers=headers, json=data, timeout=30)
+    resp = get_cloudflare().call('POST', url, json=data, idempotent=True)
     return resp.status_code, resp.json()
 
 
@@ -114,6 +141,7 @@ def format_num(n):
     return str(n)
 
 
+@profiling.timed
 def check_token():
     """Verify the API token works."""
     status, data = cf_get('/user/tokens/verify')
@@ -126,58 +154,280 @@ def check_token():
     return True
 
 
-def get_workers_analytics():
-    """Get Workers analytics using GraphQL API."""
-    now = datetime.now(timezone.utc)
-    today = now.strftime('%Y-%m-%d')
-    yesterday = (now - timedelta(days=1)).strftime('%Y-%m-%d')
-    week_ago = (now - timedelta(days=7)).strftime('%Y-%m-%d')
-
-    # Use GraphQL analytics API
-    headers = {
-        'Authorization': f'Bearer {CLOUDFLARE_API_TOKEN}',
-        'Content-Type': 'application/json',
+# ── GraphQL Analytics ──────────────────────────────────────────────
+# Every dataset is fetched in one aliased query, grouped on the server by
+# the dimensions it selects. Each entry: alias -> (dataset, bucket, limit, selection),
+# where bucket is the time dimension rows are grouped by.
+ANALYTICS_DATASETS = {
+    'workers': ('workersInvocationsAdaptive', 'date', 1000, """
+        sum { requests subrequests errors }
+        dimensions { date scriptName }"""),
+    'pagesFunctions': ('pagesFunctionsInvocationsAdaptiveGroups', 'date', 1000, """
+        sum { requests errors }
+        dimensions { date scriptName }"""),
+    # CPU / wall time quantiles (microseconds) per script per day
+    'workersCpu': ('workersInvocationsAdaptive', 'date', 1000, """
+        sum { requests }
+        quantiles { cpuTimeP50 cpuTimeP90 cpuTimeP99 wallTimeP50 wallTimeP90 wallTimeP99 }
+        dimensions { date scriptName }"""),
+    'pagesFunctionsCpu': ('pagesFunctionsInvocationsAdaptiveGroups', 'date', 1000, """
+        sum { requests }
+        quantiles { cpuTimeP50 cpuTimeP90 cpuTimeP99 wallTimeP50 wallTimeP90 wallTimeP99 }
+        dimensions { date scriptName }"""),
+    # KV operations and stored keys/bytes per namespace per day
+    'kvOperations': ('kvOperationsAdaptiveGroups', 'date', 1000, """
+        sum { requests }
+        dimensions { date namespaceId actionType }"""),
+    'kvStorage': ('kvStorageAdaptiveGroups', 'date', 1000, """
+        max { keyCount byteCount }
+        dimensions { date namespaceId }"""),
+    # --hourly only: one row per script per hour
+    'workersHourly': ('workersInvocationsAdaptive', 'datetimeHour', 10000, """
+        sum { requests subrequests errors }
+        dimensions { datetimeHour scriptName }"""),
+}
+DEFAULT_ANALYTICS = (
+    'workers', 'pagesFunctions', 'workersCpu', 'pagesFunctionsCpu', 'kvOperations', 'kvStorage',
+)
+ANALYTICS_DAYS = 7
+ANALYTICS_CACHE_DAYS = 90                  # buckets kept in the local cache
+ANALYTICS_LATE_DATA = timedelta(hours=1)   # re-fetch overlap for late-arriving data
+ANALYTICS_MAX_PAGES = 20                   # requests per dataset that keeps hitting its row limit
+
+
+def build_analytics_query(aliases):
+    """
+    Build one GraphQL query that fetches each aliased dataset.
+
+    Each alias gets its own start variable ($<alias>Since) so cached
+    datasets can be fetched from where they left off. The end variables
+    ($until for daily, $untilHour for hourly buckets) are declared only
+    when an alias uses them: GraphQL rejects unused variables.
+    """
+    buckets = {ANALYTICS_DATASETS[alias][1] for alias in aliases}
+    params = ['$accountTag: string!']
+    if 'date' in buckets:
+        params.append('$until: Date!')
+    if buckets - {'date'}:
+        params.append('$untilHour: Time!')
+    fields = []
+    for alias in aliases:
+        dataset, bucket, limit, selection = ANALYTICS_DATASETS[alias]
+        if bucket == 'date':
+            params.append(f'${alias}Since: Date!')
+            time_filter = f'date_geq: ${alias}Since, date_leq: $until'
+        else:
+            params.append(f'${alias}Since: Time!')
+            time_filter = f'{bucket}_geq: ${alias}Since, {bucket}_leq: $untilHour'
+        fields.append(f"""
+      {alias}: {dataset}(
+        filter: {{{time_filter}}}
+        limit: {limit}
+        orderBy: [{bucket}_ASC]
+      ) {{{selection}
+      }}""")
+    return """
+query FeedownAnalytics(%s) {
+  viewer {
+    accounts(filter: {accountTag: $accountTag}) {%s
     }
-
-    query = """
-    query {
-      viewer {
-        accounts(filter: {accountTag: "%s"}) {
-          workersInvocationsAdaptive(
-            filter: {
-              datetimeHour_geq: "%sT00:00:00Z"
-              datetimeHour_leq: "%sT23:59:59Z"
-            }
-            limit: 1000
-            orderBy: [datetimeHour_ASC]
-          ) {
-            sum {
-              requests
-              subrequests
-              errors
+  }
+}
+""" % (', '.join(params), ''.join(fields))
+
+
+def failed_aliases(errors, aliases):
+    """Aliases named by GraphQL errors (by path, or by dataset in the message)."""
+    failed = set()
+    for e in errors:
+        path = e.get('path') or []
+        message = e.get('message', '')
+        for alias in aliases:
+            if alias in path or ANALYTICS_DATASETS[alias][0] in message:
+                failed.add(alias)
+    return failed
+
+
+def bucket_key(bucket, dt):
+    """Bucket value (as returned by the API) for the bucket containing dt."""
+    if bucket == 'date':
+        return dt.strftime('%Y-%m-%d')
+    return dt.replace(minute=0, second=0, microsecond=0).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def query_analytics_page(since_by_alias):
+    """
+    Fetch each alias from its start bucket in one GraphQL request.
+
+    Returns {'rows': {alias: [...]}, 'errors': [...]}, or None if the request
+    itself failed. A dataset the account can't query (e.g. Pages Functions
+    analytics not enabled) fails the whole query, so it is dropped and the
+    rest are fetched again in a single retry.
+    """
+    from api_client import HTTPError
+
+    aliases = list(since_by_alias)
+    errors = []
+    while aliases:
+        now = datetime.now(timezone.utc)
+        buckets = {ANALYTICS_DATASETS[alias][1] for alias in aliases}
+        variables = {
+            'accountTag': ACCOUNT_ID,
+            **({'until': bucket_key('date', now)} if 'date' in buckets else {}),
+            **({'untilHour': bucket_key('datetimeHour', now)} if buckets - {'date'} else {}),
+            **{f'{alias}Since': since_by_alias[alias] for alias in aliases},
+        }
+        try:
+            status, result = cf_post('/graphql', {
+                'query': build_analytics_query(aliases),
+                'variables': variables,
+            })
+        except (HTTPError, ValueError):
+            return None
+        if status != 200:
+            return None
+
+        errors.extend(result.get('errors') or [])
+        accounts = ((result.get('data') or {}).get('viewer') or {}).get('accounts') or []
+        if accounts:
+            return {
+                'rows': {alias: accounts[0].get(alias) or [] for alias in aliases},
+                'errors': errors,
             }
-            dimensions {
-              datetimeHour
-              scriptName
+
+        failed = failed_aliases(result.get('errors') or [], aliases)
+        if not failed or failed == set(aliases):
+            break
+        aliases = [a for a in aliases if a not in failed]
+
+    return {'rows': {}, 'errors': errors}
+
+
+@profiling.timed
+def query_analytics(since_by_alias):
+    """
+    Fetch each alias from its start bucket, paging past the row limit.
+
+    The API has no cursor, so a dataset that returns `limit` rows is
+    continued by time: its last bucket, which may be cut off, is dropped
+    and fetched again as the start of the next page. Returns
+    query_analytics_page()'s shape plus 'truncated', the aliases that still
+    hit the limit (a single bucket over it, a failed page, or
+    ANALYTICS_MAX_PAGES), or None if the first request failed.
+    """
+    result = query_analytics_page(since_by_alias)
+    if result is None:
+        return None
+    rows = result['rows']
+    errors = result['errors']
+    truncated = set()
+    page, since = rows, since_by_alias   # the last page fetched for each alias
+    for _ in range(ANALYTICS_MAX_PAGES):
+        next_since = {}
+        for alias, alias_rows in page.items():
+            _, bucket, limit, _ = ANALYTICS_DATASETS[alias]
+            if len(alias_rows) < limit:
+                continue
+            last = alias_rows[-1]['dimensions'][bucket]
+            if last == since[alias]:
+                truncated.add(alias)   # one bucket alone fills the page
+            else:
+                next_since[alias] = last
+        if not next_since:
+            break
+        more = query_analytics_page(next_since)
+        if more is None:
+            truncated.update(next_since)
+            break
+        errors.extend(more['errors'])
+        truncated.update(alias for alias in next_since if alias not in more['rows'])
+        page = {alias: more['rows'][alias] for alias in next_since if alias in more['rows']}
+        for alias, alias_rows in page.items():
+            bucket = ANALYTICS_DATASETS[alias][1]
+            rows[alias] = [r for r in rows[alias] if r['dimensions'][bucket] != next_since[alias]] + alias_rows
+        since = next_since
+    else:
+        truncated.update(alias for alias, alias_rows in page.items()
+                         if len(alias_rows) >= ANALYTICS_DATASETS[alias][2])
+    return {'rows': rows, 'errors': errors, 'truncated': sorted(truncated)}
+
+
+@profiling.timed
+def get_analytics(aliases=None, days=ANALYTICS_DAYS, use_cache=True):
+    """
+    Get the last `days` days of each dataset, fetching only what's new.
+
+    Rows are cached locally per dataset and bucket. A dataset whose cache
+    already covers the window is re-fetched from the bucket containing its
+    last fetch (minus ANALYTICS_LATE_DATA for late data), and the fresh
+    buckets replace the cached ones. Returns the same shape as
+    query_analytics(), with rows limited to the window. Truncated datasets
+    are not cached, so the next run fetches them again.
+    """
+    aliases = list(aliases or DEFAULT_ANALYTICS)
+    now = datetime.now(timezone.utc)
+    window_start = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    cache_name = f'cf_analytics_{ACCOUNT_ID}'
+    cache = (local_cache.load(cache_name) if use_cache else None) or {}
+
+    since_by_alias = {}
+    for alias in aliases:
+        bucket = ANALYTICS_DATASETS[alias][1]
+        entry = cache.get(alias)
+        start = window_start
+        if entry and entry['covers_from'] <= bucket_key(bucket, window_start):
+            fetched_at = datetime.fromisoformat(entry['fetched_at'])
+            start = max(window_start, fetched_at - ANALYTICS_LATE_DATA)
+        since_by_alias[alias] = bucket_key(bucket, start)
+
+    result = query_analytics(since_by_alias)
+    if result is None:
+        return None
+
+    keep_from = now - timedelta(days=ANALYTICS_CACHE_DAYS)
+    failed = failed_aliases(result['errors'], aliases)
+    rows = {}
+    for alias, fresh in result['rows'].items():
+        bucket = ANALYTICS_DATASETS[alias][1]
+        since = since_by_alias[alias]
+        entry = cache.get(alias) or {'covers_from': since, 'buckets': {}}
+
+        # Cached buckets from `since` on are replaced by the fresh rows
+        buckets = {k: v for k, v in entry['buckets'].items()
+                   if bucket_key(bucket, keep_from) <= k < since}
+        for row in fresh:
+            buckets.setdefault(row['dimensions'][bucket], []).append(row)
+        if alias not in failed and alias not in result['truncated']:
+            cache[alias] = {
+                'covers_from': max(min(entry['covers_from'], since), bucket_key(bucket, keep_from)),
+                'fetched_at': now.isoformat(),
+                'buckets': buckets,
             }
-          }
-        }
-      }
-    }
-    """ % (ACCOUNT_ID, week_ago, today)
 
-    resp = requests.post(
-        'https://api.cloudflare.com/client/v4/graphql',
-        headers=headers,
-        json={'query': query},
-        timeout=30,
-    )
+        first = bucket_key(bucket, window_start)
+        rows[alias] = [row for key in sorted(buckets) if key >= first for row in buckets[key]]
 
-    if resp.status_code == 200:
-        return resp.json()
-    return None
+    local_cache.save(cache_name, cache)
+    return {'rows': rows, 'errors': result['errors'], 'truncated': result['truncated']}
 
 
+def aggregate_daily(rows):
+    """Sum grouped rows into ({date: {'requests', 'errors'}}, {script: requests})."""
+    daily = {}
+    by_script = {}
+    for row in rows:
+        date = row['dimensions']['date']
+        script = row['dimensions'].get('scriptName') or 'unknown'
+        reqs = row['sum']['requests']
+        if date not in daily:
+            daily[date] = {'requests': 0, 'errors': 0}
+        daily[date]['requests'] += reqs
+        daily[date]['errors'] += row['sum']['errors']
+        by_script[script] = by_script.get(script, 0) + reqs
+    return daily, by_script
+
+
+@profiling.timed
 def get_pages_projects():
     """Get Pages projects and deployment info."""
     status, data = cf_get(f'/accounts/{ACCOUNT_ID}/pages/projects')
@@ -186,17 +436,82 @@ def get_pages_projects():
     return None
 
 
-def get_pages_deployments(project_name):
-    """Get recent deployments for a Pages project."""
-    status, data = cf_get(
-        f'/accounts/{ACCOUNT_ID}/pages/projects/{project_name}/deployments',
-        params={'per_page': 50}
-    )
-    if status == 200 and data.get('success'):
-        return data.get('result', [])
-    return None
-
-
+DEPLOYMENTS_PER_PAGE = 25
+MAX_DEPLOYMENT_PAGES = 40   # 1,000 deployments, twice the monthly limit
+
+
+def parse_cf_time(value):
+    """Parse a Cloudflare ISO timestamp, or return None."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+
+
+def billing_month_start(now=None):
+    """Start of the current billing (calendar) month in UTC."""
+    now = now or datetime.now(timezone.utc)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+@profiling.timed
+def get_pages_deployments(project_name, use_cache=True):
+    """
+    Get this billing month's deployments for a Pages project, newest first.
+
+    Pages through the deployments list until it passes the start of the
+    month. Deployments seen on earlier runs are cached locally, so later
+    runs stop at the first cached deployment and only fetch new ones. The
+    newest deployment before the month is kept as well, so the latest
+    deploy is known even in a quiet month.
+    """
+    month_start = billing_month_start()
+    cache_name = f'pages_deployments_{ACCOUNT_ID}_{project_name}'
+    cached = (local_cache.load(cache_name) if use_cache else None) or []
+    cached_ids = {dep['id'] for dep in cached}
+
+    fetched = []
+    reached_known = False
+    for page in range(1, MAX_DEPLOYMENT_PAGES + 1):
+        status, data = cf_get(
+            f'/accounts/{ACCOUNT_ID}/pages/projects/{project_name}/deployments',
+            params={'page': page, 'per_page': DEPLOYMENTS_PER_PAGE},
+        )
+        if status != 200 or not data.get('success'):
+            return None
+
+        result = data.get('result') or []
+        for dep in result:
+            if dep.get('id') in cached_ids:
+                reached_known = True
+                break
+            fetched.append({
+                'id': dep.get('id'),
+                'created_on': dep.get('created_on'),
+                'environment': dep.get('environment'),
+            })
+            created = parse_cf_time(dep.get('created_on'))
+            if created and created < month_start:
+                reached_known = True
+                break
+
+        total_pages = (data.get('result_info') or {}).get('total_pages')
+        if reached_known or len(result) < DEPLOYMENTS_PER_PAGE or (total_pages and page >= total_pages):
+            break
+
+    # Keep this month plus the newest deployment before it
+    deployments = []
+    for dep in fetched + cached:
+        deployments.append(dep)
+        created = parse_cf_time(dep.get('created_on'))
+        if created and created < month_start:
+            break
+
+    local_cache.save(cache_name, deployments)
+    return deployments
+
+
+@profiling.timed
 def get_kv_namespaces():
     """Get KV namespaces and their stats."""
     status, data = cf_get(f'/accounts/{ACCOUNT_ID}/storage/kv/namespaces')
@@ -205,6 +520,7 @@ def get_kv_namespaces():
     return None
 
 
+@profiling.timed
 def get_workers_list():
     """Get list of Workers scripts."""
     status, data = cf_get(f'/accounts/{ACCOUNT_ID}/workers/scripts')
@@ -213,111 +529,352 @@ def get_workers_list():
     return None
 
 
-def get_pages_functions_analytics():
-    """Get Pages Functions analytics using GraphQL API (httpRequests1dGroups)."""
-    now = datetime.now(timezone.utc)
-    today = now.strftime('%Y-%m-%d')
-    week_ago = (now - timedelta(days=7)).strftime('%Y-%m-%d')
+def hourly_profile(rows, days=ANALYTICS_DAYS, now=None):
+    """
+    Per-script load profile from hourly workersInvocationsAdaptive rows.
+
+    Hours with no invocations are filled in as zero so the percentiles
+    describe the whole window, not just the busy hours. Returns
+    ({script: stats}, [requests per UTC hour-of-day, all scripts]).
+    """
+    now = now or datetime.now(timezone.utc)
+    first_hour = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    last_hour = now.replace(minute=0, second=0, microsecond=0)
+    hours = int((last_hour - first_hour).total_seconds() // 3600) + 1
+
+    buckets = {}
+    by_hour_of_day = [0] * 24
+    for row in rows:
+        dt = parse_cf_time(row['dimensions']['datetimeHour'])
+        if dt is None:
+            continue
+        script = row['dimensions'].get('scriptName') or 'unknown'
+        b = buckets.setdefault(script, {})
+        prev = b.get(dt, (0, 0, 0))
+        b[dt] = (
+            prev[0] + row['sum']['requests'],
+            prev[1] + row['sum']['errors'],
+            prev[2] + row['sum'].get('subrequests', 0),
+        )
+        by_hour_of_day[dt.hour] += row['sum']['requests']
+
+    stats = {}
+    for script, b in buckets.items():
+        per_hour = [b.get(first_hour + timedelta(hours=i), (0, 0, 0))[0] for i in range(hours)]
+        requests_total = sum(v[0] for v in b.values())
+        errors_total = sum(v[1] for v in b.values())
+        subrequests_total = sum(v[2] for v in b.values())
+        peak_hour, peak = max(b.items(), key=lambda kv: kv[1][0])
+        busiest_ratio = max((v[2] / v[0] for v in b.values() if v[0]), default=0)
+        stats[script] = {
+            'requests': requests_total,
+            'peak_hour': peak_hour,
+            'peak_requests': peak[0],
+            'p50': percentile(per_hour, 50),
+            'p95': percentile(per_hour, 95),
+            'error_rate': errors_total / requests_total if requests_total else 0,
+            'subrequests_per_request': subrequests_total / requests_total if requests_total else 0,
+            'max_hourly_subrequests_per_request': busiest_ratio,
+        }
+    return stats, by_hour_of_day
+
+
+@profiling.timed
+def print_hourly_profile(rows, days=ANALYTICS_DAYS):
+    """Print the --hourly analysis for Workers invocations."""
+    stats, by_hour_of_day = hourly_profile(rows, days)
+    if not stats:
+        print("  No hourly data found.")
+        return
+
+    sub_limit = FREE_TIER['workers_subrequests_per_invocation']
+    print(f"  Hourly load profile (last {days} days, UTC):")
+    print(f"  {'Script':<24} {'Peak hour':<17} {'Peak':>7} {'p50/h':>7} {'p95/h':>7} {'Err%':>6} {'Sub/req':>8} {'Max/h':>6}")
+    print(f"  {'─'*24} {'─'*17} {'─'*7} {'─'*7} {'─'*7} {'─'*6} {'─'*8} {'─'*6}")
+    for script, st in sorted(stats.items(), key=lambda kv: -kv[1]['requests']):
+        print(f"  {script[:24]:<24} {st['peak_hour'].strftime('%Y-%m-%d %H:00'):<17} "
+              f"{st['peak_requests']:>7,} {st['p50']:>7,.0f} {st['p95']:>7,.0f} "
+              f"{st['error_rate'] * 100:>5.1f}% {st['subrequests_per_request']:>8.1f} "
+              f"{st['max_hourly_subrequests_per_request']:>6.1f}")
 
-    headers = {
-        'Authorization': f'Bearer {CLOUDFLARE_API_TOKEN}',
-        'Content-Type': 'application/json',
-    }
+    print()
+    print(f"  Subrequests per request vs the {sub_limit}-subrequest limit:")
+    for script, st in sorted(stats.items(), key=lambda kv: -kv[1]['max_hourly_subrequests_per_request']):
+        pct = st['max_hourly_subrequests_per_request'] / sub_limit * 100
+        print(f"    {script[:24]:<24} {progress_bar(pct)}")
+    print("  (Max/h is the busiest hour's average; single invocations can go higher.)")
 
-    # Pages Functions use a different analytics dataset
-    query = """
-    query {
-      viewer {
-        accounts(filter: {accountTag: "%s"}) {
-          pagesFunctionsInvocationsAdaptiveGroups(
-            filter: {
-              date_geq: "%s"
-              date_leq: "%s"
-            }
-            limit: 1000
-            orderBy: [date_ASC]
-          ) {
-            sum {
-              requests
-              errors
-            }
-            dimensions {
-              date
-              scriptName
-            }
-          }
+    print()
+    print("  Requests by hour of day (UTC, all scripts):")
+    peak = max(by_hour_of_day) or 1
+    for hour, reqs in enumerate(by_hour_of_day):
+        bar = '#' * round(reqs / peak * 40)
+        print(f"    {hour:02d}:00 {reqs:>9,} {bar}")
+
+
+CPU_QUANTILES = ('P50', 'P90', 'P99')
+
+
+def cpu_time_by_script(rows):
+    """
+    Daily CPU and wall time quantiles per script, in milliseconds.
+
+    Returns {script: {date: {'requests', 'cpu': (p50, p90, p99), 'wall': (...)}}}.
+    Quantiles can't be merged across days, so each day is kept separately.
+    """
+    by_script = {}
+    for row in rows:
+        q = row.get('quantiles') or {}
+        script = row['dimensions'].get('scriptName') or 'unknown'
+        by_script.setdefault(script, {})[row['dimensions']['date']] = {
+            'requests': row['sum']['requests'],
+            'cpu': tuple((q.get(f'cpuTime{p}') or 0) / 1000 for p in CPU_QUANTILES),
+            'wall': tuple((q.get(f'wallTime{p}') or 0) / 1000 for p in CPU_QUANTILES),
         }
-      }
-    }
-    """ % (ACCOUNT_ID, week_ago, today)
+    return by_script
 
-    resp = requests.post(
-        'https://api.cloudflare.com/client/v4/graphql',
-        headers=headers,
-        json={'query': query},
-        timeout=30,
-    )
 
-    if resp.status_code == 200:
-        result = resp.json()
-        # If the above dataset doesn't exist, try alternative
-        if result.get('errors'):
-            return get_pages_functions_analytics_alt()
-        return result
-    return None
+def cpu_status(ms):
+    """OK / WARNING / CRITICAL for a CPU time against the per-invocation limit."""
+    pct = ms / FREE_TIER['workers_cpu_ms_per_invocation'] * 100
+    if pct >= 90:
+        return 'CRITICAL'
+    if pct >= 70:
+        return 'WARNING'
+    return 'OK'
+
+
+def worst_day(days, kind, i):
+    """Highest daily value of one quantile ('cpu' or 'wall', index into CPU_QUANTILES)."""
+    return max(d[kind][i] for d in days.values())
+
+
+@profiling.timed
+def print_cpu_time(label, by_script):
+    """Print the CPU time table and per-day trend for one dataset."""
+    limit = FREE_TIER['workers_cpu_ms_per_invocation']
+    print(f"  {label} (worst day, ms; limit {limit} ms CPU per invocation):")
+    print(f"  {'Script':<24} {'CPU p50':>8} {'p90':>7} {'p99':>7} {'Wall p50':>9} {'p99':>8}  Status")
+    print(f"  {'─'*24} {'─'*8} {'─'*7} {'─'*7} {'─'*9} {'─'*8}  {'─'*8}")
+    for script, days in sorted(by_script.items(), key=lambda kv: -worst_day(kv[1], 'cpu', 2)):
+        p99 = worst_day(days, 'cpu', 2)
+        print(f"  {script[:24]:<24} {worst_day(days, 'cpu', 0):>8.2f} {worst_day(days, 'cpu', 1):>7.2f} {p99:>7.2f} "
+              f"{worst_day(days, 'wall', 0):>9.1f} {worst_day(days, 'wall', 2):>8.1f}  {cpu_status(p99)}")
+
+    for script, days in sorted(by_script.items()):
+        print()
+        print(f"  {script} - daily CPU time (ms):")
+        print(f"  {'Date':<14} {'Requests':>10} {'p50':>7} {'p90':>7} {'p99':>7}")
+        print(f"  {'─'*14} {'─'*10} {'─'*7} {'─'*7} {'─'*7}")
+        for date in sorted(days):
+            d = days[date]
+            warning = {'OK': '', 'WARNING': ' !', 'CRITICAL': ' !!!'}[cpu_status(d['cpu'][2])]
+            print(f"  {date:<14} {d['requests']:>10,} {d['cpu'][0]:>7.2f} {d['cpu'][1]:>7.2f} {d['cpu'][2]:>7.2f}{warning}")
+
+
+KV_ACTIONS = ('read', 'write', 'list', 'delete')
+
+
+def kv_usage(op_rows, storage_rows):
+    """
+    KV operations and storage per namespace per day.
+
+    Returns {namespace_id: {date: {'read', 'write', 'list', 'delete', 'keys', 'bytes'}}}.
+    """
+    usage = {}
+
+    def day(ns, date):
+        return usage.setdefault(ns, {}).setdefault(
+            date, {**{a: 0 for a in KV_ACTIONS}, 'keys': None, 'bytes': None})
+
+    for row in op_rows:
+        dims = row['dimensions']
+        action = dims.get('actionType')
+        if action in KV_ACTIONS:
+            day(dims['namespaceId'], dims['date'])[action] += row['sum']['requests']
+    for row in storage_rows:
+        dims = row['dimensions']
+        d = day(dims['namespaceId'], dims['date'])
+        d['keys'] = row['max']['keyCount']
+        d['bytes'] = row['max']['byteCount']
+    return usage
+
+
+def kv_daily_totals(usage):
+    """Account-wide KV operations per day (the free-tier limits are per account)."""
+    totals = {}
+    for days in usage.values():
+        for date, d in days.items():
+            t = totals.setdefault(date, {a: 0 for a in KV_ACTIONS})
+            for a in KV_ACTIONS:
+                t[a] += d[a]
+    return totals
+
+
+def cache_effectiveness(kv_days, proxy_daily):
+    """
+    Estimate the RSS proxy's KV cache hit ratio.
+
+    Every /fetch without bypass_cache does one KV read, and a miss writes
+    the fetched feed back, so hits ~= reads - writes. Requests that never
+    read KV (bypass_cache=1, errors) always go to the origin.
+    """
+    requests_total = sum(d['requests'] for d in proxy_daily.values())
+    reads = sum(d['read'] for d in kv_days.values())
+    writes = sum(d['write'] for d in kv_days.values())
+    hits = max(reads - writes, 0)
+    return {
+        'requests': requests_total,
+        'reads': reads,
+        'writes': writes,
+        'hits': hits,
+        'hit_ratio': hits / reads if reads else None,
+        'origin_fetches': max(requests_total - hits, 0),
+        'bypass': max(requests_total - reads, 0),
+    }
 
 
-def get_pages_functions_analytics_alt():
-    """Alternative: try workersInvocationsAdaptive which may include Pages Functions."""
-    now = datetime.now(timezone.utc)
-    today = now.strftime('%Y-%m-%d')
-    week_ago = (now - timedelta(days=7)).strftime('%Y-%m-%d')
+@profiling.timed
+def print_kv_usage(usage, namespaces, proxy_daily, days=ANALYTICS_DAYS):
+    """Print per-namespace KV usage, account-wide limits and the proxy cache estimate."""
+    titles = {ns.get('id'): ns.get('title', 'unknown') for ns in namespaces or []}
+    for ns_id, by_date in sorted(usage.items(), key=lambda kv: titles.get(kv[0], kv[0])):
+        print(f"  {titles.get(ns_id, ns_id)} ({ns_id[:12]}...):")
+        print(f"  {'Date':<14} {'Reads':>9} {'Writes':>7} {'Lists':>6} {'Deletes':>8} {'Keys':>8} {'Stored':>10}")
+        print(f"  {'─'*14} {'─'*9} {'─'*7} {'─'*6} {'─'*8} {'─'*8} {'─'*10}")
+        for date in sorted(by_date):
+            d = by_date[date]
+            keys = format_num(d['keys']) if d['keys'] is not None else '-'
+            print(f"  {date:<14} {d['read']:>9,} {d['write']:>7,} {d['list']:>6,} {d['delete']:>8,} "
+                  f"{keys:>8} {format_bytes(d['bytes']):>10}")
+        print()
 
-    headers = {
-        'Authorization': f'Bearer {CLOUDFLARE_API_TOKEN}',
-        'Content-Type': 'application/json',
+    totals = kv_daily_totals(usage)
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    today_ops = totals.get(today, {a: 0 for a in KV_ACTIONS})
+    print("  Today's usage (all namespaces):")
+    for action, key in (('read', 'kv_reads_per_day'), ('write', 'kv_writes_per_day'),
+                        ('list', 'kv_lists_per_day'), ('delete', 'kv_deletes_per_day')):
+        limit = FREE_TIER[key]
+        print(f"    {action.capitalize() + 's:':<9} {progress_bar(today_ops[action] / limit * 100)} "
+              f"({format_num(today_ops[action])} / {format_num(limit)})")
+
+    write_limit = FREE_TIER['kv_writes_per_day']
+    busy = [date for date, t in sorted(totals.items()) if t['write'] >= write_limit * 0.7]
+    if busy:
+        print(f"    Write volume over 70% of the {format_num(write_limit)}/day limit on: {', '.join(busy)}")
+
+    cache = cache_effectiveness(usage.get(PROXY_KV_NAMESPACE_ID, {}), proxy_daily)
+    print()
+    print(f"  RSS proxy cache ({PROXY_WORKER}, {days}-day totals):")
+    if cache['hit_ratio'] is None:
+        print("    No KV reads recorded for the CACHE namespace.")
+        return
+    print(f"    Proxy requests:       {format_num(cache['requests'])}")
+    print(f"    KV reads / writes:    {format_num(cache['reads'])} / {format_num(cache['writes'])}")
+    print(f"    Est. cache hit ratio: {cache['hit_ratio'] * 100:.1f}% (hits ~= reads - writes)")
+    print(f"    Est. origin fetches:  {format_num(cache['origin_fetches'])} "
+          f"({format_num(cache['bypass'])} without a cache lookup)")
+
+
+@profiling.timed
+def collect_usage(use_cache=True, hourly=False, days=ANALYTICS_DAYS):
+    """
+    Fetch everything the report needs, concurrently over the shared session.
+
+    The token check, resource lists and analytics go out together; each
+    project's deployments are requested as soon as the project list arrives.
+    Returns a dict of results keyed by section ('deployments' maps project
+    name -> deployments).
+    """
+    fetchers = {
+        'workers': get_workers_list,
+        'kv_namespaces': get_kv_namespaces,
+        'projects': get_pages_projects,
+        'analytics': lambda: get_analytics(
+            DEFAULT_ANALYTICS + (('workersHourly',) if hourly else ()), days, use_cache),
     }
-
-    # Try broader query that may include Pages Functions
-    query = """
-    query {
-      viewer {
-        accounts(filter: {accountTag: "%s"}) {
-          workersInvocationsAdaptive(
-            filter: {
-              datetimeHour_geq: "%sT00:00:00Z"
-              datetimeHour_leq: "%sT23:59:59Z"
-            }
-            limit: 10000
-            orderBy: [datetimeHour_ASC]
-          ) {
-            sum {
-              requests
-              errors
-            }
-            dimensions {
-              datetimeHour
-              scriptName
-            }
-          }
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        token = pool.submit(profiling.propagate(check_token))
+        futures = {key: pool.submit(profiling.propagate(fn)) for key, fn in fetchers.items()}
+
+        projects = futures['projects'].result()
+        deploy_futures = {
+            proj.get('name'): pool.submit(profiling.propagate(get_pages_deployments), proj.get('name'), use_cache)
+            for proj in projects or []
         }
-      }
-    }
-    """ % (ACCOUNT_ID, week_ago, today)
 
-    resp = requests.post(
-        'https://api.cloudflare.com/client/v4/graphql',
-        headers=headers,
-        json={'query': query},
-        timeout=30,
-    )
+        token.result()
+        results = {key: future.result() for key, future in futures.items()}
+        results['deployments'] = {name: future.result() for name, future in deploy_futures.items()}
+    return results
 
-    if resp.status_code == 200:
-        return resp.json()
-    return None
 
+def build_history_samples(workers, kv_namespaces, workers_daily, pf_daily, deploys_this_month,
+                          cpu_by_script=None, kv_daily=None):
+    """
+    Collect this run's metrics as usage_history samples.
+
+    Daily request totals are recorded per complete UTC day (today is still
+    filling in), so re-running the script updates rather than duplicates them.
+    """
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    samples = []
+
+    daily_series = (
+        ('workers_requests_per_day', 'workers_errors_per_day', workers_daily),
+        ('pages_functions_per_day', 'pages_functions_errors_per_day', pf_daily),
+    )
+    for metric, error_metric, daily_data in daily_series:
+        limit = FREE_TIER[metric]
+        for date, d in daily_data.items():
+            if date < today:
+                day = usage_history.day_start(date)
+                samples.append((metric, d['requests'], limit, day))
+                samples.append((error_metric, d['errors'], None, day))
+
+    kv_metrics = (('read', 'kv_reads_per_day'), ('write', 'kv_writes_per_day'),
+                  ('list', 'kv_lists_per_day'), ('delete', 'kv_deletes_per_day'))
+    for date, ops in (kv_daily or {}).items():
+        if date < today:
+            for action, metric in kv_metrics:
+                samples.append((metric, ops[action], FREE_TIER[metric], usage_history.day_start(date)))
+
+    cpu_limit = FREE_TIER['workers_cpu_ms_per_invocation']
+    for script, days in (cpu_by_script or {}).items():
+        for date, d in days.items():
+            if date < today:
+                samples.append((f'workers_cpu_ms_p99:{script}', d['cpu'][2], cpu_limit,
+                                usage_history.day_start(date)))
+
+    deploy_limit = FREE_TIER['pages_deployments_per_month']
+    for name, count in deploys_this_month.items():
+        samples.append((f'pages_deployments_per_month:{name}', count, deploy_limit))
+
+    if workers is not None:
+        samples.append(('workers_scripts', len(workers), None))
+    if kv_namespaces is not None:
+        samples.append(('kv_namespaces', len(kv_namespaces), None))
+    return samples
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Cloudflare Free Tier Usage Checker")
+    parser.add_argument("--days", type=int, default=ANALYTICS_DAYS,
+                        help=f"Analytics lookback in days (default: {ANALYTICS_DAYS}, cached up to {ANALYTICS_CACHE_DAYS})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the local deployment and analytics caches and re-fetch everything")
+    parser.add_argument("--no-record", action="store_true",
+                        help="Don't append this run to the usage history")
+    parser.add_argument("--hourly", action="store_true",
+                        help="Add an hourly Workers load profile with subrequests per request")
+    parser.add_argument("--http-stats", action="store_true",
+                        help="Print per-endpoint API latency and retry counts at the end")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+    require_credentials()
 
-def main():
     print()
     print("=" * 70)
     print("  FeedOwn - Cloudflare Free Tier Usage Report")
@@ -326,9 +883,9 @@ def main():
     print(f"  Date:       {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print()
 
-    # Verify token
-    print("  Verifying API token...", end=" ")
-    check_token()
+    # Verify token and fetch everything up front, concurrently
+    print("  Verifying API token...", end=" ", flush=True)
+    usage = collect_usage(use_cache=not args.no_cache, hourly=args.hourly, days=args.days)
     print("OK")
     print()
 
@@ -337,7 +894,7 @@ def main():
     print("  1. Workers")
     print("-" * 70)
 
-    workers = get_workers_list()
+    workers = usage['workers']
     if workers is not None:
         print(f"  Active Workers: {len(workers)}")
         for w in workers:
@@ -355,37 +912,19 @@ def main():
 
     print()
 
-    # Workers analytics via GraphQL
-    analytics = get_workers_analytics()
-    if analytics and 'data' in analytics:
-        accounts = analytics['data'].get('viewer', {}).get('accounts', [])
-        if accounts:
-            invocations = accounts[0].get('workersInvocationsAdaptive', [])
-
-            # Aggregate by date
-            daily = {}
-            for inv in invocations:
-                dt_str = inv['dimensions']['datetimeHour'][:10]
-                reqs = inv['sum']['requests']
-                errs = inv['sum']['errors']
-                if dt_str not in daily:
-                    daily[dt_str] = {'requests': 0, 'errors': 0}
-                daily[dt_str]['requests'] += reqs
-                daily[dt_str]['errors'] += errs
-
-            # Aggregate by script
-            by_script = {}
-            for inv in invocations:
-                script = inv['dimensions'].get('scriptName', 'unknown')
-                reqs = inv['sum']['requests']
-                if script not in by_script:
-                    by_script[script] = 0
-                by_script[script] += reqs
+    # Workers analytics via GraphQL (one request for every dataset)
+    daily = {}
+    analytics = usage['analytics']
+    rows = (analytics or {}).get('rows', {})
+    workers_rows = rows.get('workers')
+    if workers_rows is not None:
+        if workers_rows:
+            daily, by_script = aggregate_daily(workers_rows)
 
             limit = FREE_TIER['workers_requests_per_day']
 
             if daily:
-                print("  Daily Requests (last 7 days):")
+                print(f"  Daily Requests (last {args.days} days):")
                 print(f"  {'Date':<14} {'Requests':>10} {'Errors':>8} {'% of 100K':>10}")
                 print(f"  {'─'*14} {'─'*10} {'─'*8} {'─'*10}")
 
@@ -403,13 +942,17 @@ def main():
                 print(f"  Today's usage: {progress_bar(today_pct)}")
                 print(f"  ({format_num(today_reqs)} / {format_num(limit)} requests)")
             else:
-                print("  No request data found for the last 7 days.")
+                print(f"  No request data found for the last {args.days} days.")
 
             if by_script:
                 print()
-                print("  Requests by Script (7-day total):")
+                print(f"  Requests by Script ({args.days}-day total):")
                 for script, reqs in sorted(by_script.items(), key=lambda x: -x[1]):
                     print(f"    - {script}: {format_num(reqs)} requests")
+
+            if args.hourly:
+                print()
+                print_hourly_profile(rows.get('workersHourly') or [], args.days)
         else:
             print("  No analytics data found.")
     else:
@@ -418,6 +961,10 @@ def main():
             print(f"  Analytics error: {errors[0].get('message', errors)}")
         else:
             print("  Could not fetch Workers analytics.")
+    truncated = (analytics or {}).get('truncated')
+    if truncated:
+        print(f"  Warning: {', '.join(truncated)} still hit the GraphQL row limit; "
+              f"their totals are incomplete (try fewer --days)")
 
     print()
 
@@ -426,7 +973,7 @@ def main():
     print("  2. KV Storage")
     print("-" * 70)
 
-    kv_namespaces = get_kv_namespaces()
+    kv_namespaces = usage['kv_namespaces']
     if kv_namespaces is not None:
         print(f"  KV Namespaces: {len(kv_namespaces)}")
         for ns in kv_namespaces:
@@ -434,15 +981,23 @@ def main():
             ns_id = ns.get('id', '')
             print(f"    - {title} ({ns_id[:12]}...)")
         print()
+    else:
+        print("  Could not fetch KV namespaces (may need KV Storage:Read permission)")
+        print()
+
+    kv = kv_usage(rows.get('kvOperations') or [], rows.get('kvStorage') or [])
+    kv_daily = kv_daily_totals(kv)
+    if kv:
+        proxy_daily, _ = aggregate_daily(
+            [r for r in workers_rows or [] if r['dimensions'].get('scriptName') == PROXY_WORKER])
+        print_kv_usage(kv, kv_namespaces, proxy_daily, args.days)
+    else:
         print(f"  Free tier limits:")
         print(f"    Reads:   {format_num(FREE_TIER['kv_reads_per_day'])}/day")
         print(f"    Writes:  {format_num(FREE_TIER['kv_writes_per_day'])}/day")
         print(f"    Storage: {format_num(FREE_TIER['kv_storage_mb'])} MB")
         print()
-        print(f"  Note: KV read/write counts require the Cloudflare Dashboard")
-        print(f"  (GraphQL analytics or Dashboard > Workers & Pages > KV)")
-    else:
-        print("  Could not fetch KV namespaces (may need KV Storage:Read permission)")
+        print(f"  No KV analytics found (needs Account Analytics:Read permission).")
 
     print()
 
@@ -451,7 +1006,8 @@ def main():
     print("  3. Cloudflare Pages")
     print("-" * 70)
 
-    projects = get_pages_projects()
+    projects = usage['projects']
+    deploys_this_month = {}
     if projects is not None:
         print(f"  Pages Projects: {len(projects)}")
         for proj in projects:
@@ -467,28 +1023,17 @@ def main():
             print(f"    - {name} ({subdomain}) created: {created}")
 
             # Get deployments for this project
-            deployments = get_pages_deployments(name)
+            deployments = usage['deployments'].get(name)
             if deployments:
                 # Count deployments this month
-                now = datetime.now(timezone.utc)
-                month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                this_month = 0
-                latest_deploy = None
-
-                for dep in deployments:
-                    dep_time = dep.get('created_on', '')
-                    if dep_time:
-                        try:
-                            dt = datetime.fromisoformat(dep_time.replace('Z', '+00:00'))
-                            if dt >= month_start:
-                                this_month += 1
-                            if latest_deploy is None:
-                                latest_deploy = dt
-                        except (ValueError, AttributeError):
-                            pass
+                month_start = billing_month_start()
+                times = [t for t in (parse_cf_time(dep.get('created_on')) for dep in deployments) if t]
+                this_month = sum(1 for t in times if t >= month_start)
+                latest_deploy = times[0] if times else None
 
                 deploy_limit = FREE_TIER['pages_deployments_per_month']
                 deploy_pct = (this_month / deploy_limit) * 100
+                deploys_this_month[name] = this_month
 
                 print(f"      Deployments this month: {this_month} / {deploy_limit}")
                 print(f"      Usage: {progress_bar(deploy_pct)}")
@@ -504,44 +1049,14 @@ def main():
     print("  4. Pages Functions")
     print("-" * 70)
 
-    pf_analytics = get_pages_functions_analytics()
-    pf_daily = {}
-    pf_by_script = {}
-
-    if pf_analytics and 'data' in pf_analytics:
-        accounts = pf_analytics['data'].get('viewer', {}).get('accounts', [])
-        if accounts:
-            # Try pagesFunctionsInvocationsAdaptiveGroups first
-            invocations = accounts[0].get('pagesFunctionsInvocationsAdaptiveGroups', [])
-            if invocations:
-                for inv in invocations:
-                    dt_str = inv['dimensions'].get('date', inv['dimensions'].get('datetimeHour', '')[:10])
-                    reqs = inv['sum']['requests']
-                    errs = inv['sum']['errors']
-                    script = inv['dimensions'].get('scriptName', 'unknown')
-                    if dt_str not in pf_daily:
-                        pf_daily[dt_str] = {'requests': 0, 'errors': 0}
-                    pf_daily[dt_str]['requests'] += reqs
-                    pf_daily[dt_str]['errors'] += errs
-                    pf_by_script[script] = pf_by_script.get(script, 0) + reqs
-            else:
-                # Fallback: workersInvocationsAdaptive (includes Pages Functions)
-                invocations = accounts[0].get('workersInvocationsAdaptive', [])
-                for inv in invocations:
-                    dt_str = inv['dimensions']['datetimeHour'][:10]
-                    reqs = inv['sum']['requests']
-                    errs = inv['sum']['errors']
-                    script = inv['dimensions'].get('scriptName', 'unknown')
-                    if dt_str not in pf_daily:
-                        pf_daily[dt_str] = {'requests': 0, 'errors': 0}
-                    pf_daily[dt_str]['requests'] += reqs
-                    pf_daily[dt_str]['errors'] += errs
-                    pf_by_script[script] = pf_by_script.get(script, 0) + reqs
+    # Falls back to the Workers rows, which include Pages Functions
+    pf_rows = rows.get('pagesFunctions') or workers_rows or []
+    pf_daily, pf_by_script = aggregate_daily(pf_rows)
 
     limit = FREE_TIER['pages_functions_per_day']
 
     if pf_daily:
-        print("  Daily Requests (last 7 days):")
+        print(f"  Daily Requests (last {args.days} days):")
         print(f"  {'Date':<14} {'Requests':>10} {'Errors':>8} {'% of 100K':>10}")
         print(f"  {'─'*14} {'─'*10} {'─'*8} {'─'*10}")
 
@@ -560,7 +1075,7 @@ def main():
 
         if pf_by_script:
             print()
-            print("  Requests by Script (7-day total):")
+            print(f"  Requests by Script ({args.days}-day total):")
             for script, reqs in sorted(pf_by_script.items(), key=lambda x: -x[1]):
                 print(f"    - {script}: {format_num(reqs)} requests")
     else:
@@ -569,31 +1084,41 @@ def main():
 
     print()
 
-    # ── 5. Summary ─────────────────────────────────────────────────
+    # ── 5. CPU Time ────────────────────────────────────────────────
     print("-" * 70)
-    print("  5. Summary")
+    print("  5. CPU Time")
+    print("-" * 70)
+
+    cpu_by_script = {}
+    for alias, label in (('workersCpu', 'Workers'), ('pagesFunctionsCpu', 'Pages Functions')):
+        by_script = cpu_time_by_script(rows.get(alias) or [])
+        if by_script:
+            print_cpu_time(label, by_script)
+            print()
+            cpu_by_script.update(by_script)
+    if not cpu_by_script:
+        print("  No CPU time data found.")
+        print()
+
+    # ── 6. Summary ─────────────────────────────────────────────────
+    print("-" * 70)
+    print("  6. Summary")
     print("-" * 70)
 
     checks = []
 
     # Workers requests check
-    if analytics and 'data' in analytics:
-        accounts = analytics['data'].get('viewer', {}).get('accounts', [])
-        if accounts:
-            invocations = accounts[0].get('workersInvocationsAdaptive', [])
-            today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-            today_reqs = sum(
-                inv['sum']['requests'] for inv in invocations
-                if inv['dimensions']['datetimeHour'][:10] == today
-            )
-            limit = FREE_TIER['workers_requests_per_day']
-            pct = (today_reqs / limit) * 100
-            if pct < 70:
-                checks.append(('Workers Requests', 'OK', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
-            elif pct < 90:
-                checks.append(('Workers Requests', 'WARNING', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
-            else:
-                checks.append(('Workers Requests', 'CRITICAL', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
+    if workers_rows is not None:
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        today_reqs = daily.get(today, {}).get('requests', 0)
+        limit = FREE_TIER['workers_requests_per_day']
+        pct = (today_reqs / limit) * 100
+        if pct < 70:
+            checks.append(('Workers Requests', 'OK', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
+        elif pct < 90:
+            checks.append(('Workers Requests', 'WARNING', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
+        else:
+            checks.append(('Workers Requests', 'CRITICAL', f'{format_num(today_reqs)}/{format_num(limit)}/day'))
 
     # Pages Functions requests check
     if pf_daily:
@@ -608,19 +1133,30 @@ def main():
         else:
             checks.append(('Pages Functions', 'CRITICAL', f'{format_num(today_pf_reqs)}/{format_num(pf_limit)}/day'))
 
-    # Pages deployments check (feedown only to avoid too many API calls)
+    # KV writes check (today, all namespaces)
+    if kv_daily:
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        today_writes = kv_daily.get(today, {}).get('write', 0)
+        kv_limit = FREE_TIER['kv_writes_per_day']
+        pct = (today_writes / kv_limit) * 100
+        status = 'OK' if pct < 70 else 'WARNING' if pct < 90 else 'CRITICAL'
+        checks.append(('KV Writes', status, f'{format_num(today_writes)}/{format_num(kv_limit)}/day'))
+
+    # CPU time check (worst daily p99 of any script)
+    if cpu_by_script:
+        script, p99 = max(
+            ((name, worst_day(days, 'cpu', 2)) for name, days in cpu_by_script.items()),
+            key=lambda x: x[1],
+        )
+        cpu_limit = FREE_TIER['workers_cpu_ms_per_invocation']
+        checks.append(('CPU Time p99', cpu_status(p99), f'{p99:.2f}/{cpu_limit} ms ({script})'))
+
+    # Pages deployments check (feedown only)
     if projects:
         feedown_proj = next((p for p in projects if p.get('name') == 'feedown'), None)
         if feedown_proj:
-            deployments = get_pages_deployments('feedown')
-            if deployments:
-                now = datetime.now(timezone.utc)
-                month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                this_month = sum(
-                    1 for d in deployments
-                    if d.get('created_on') and
-                    datetime.fromisoformat(d['created_on'].replace('Z', '+00:00')) >= month_start
-                )
+            if 'feedown' in deploys_this_month:
+                this_month = deploys_this_month['feedown']
                 limit = FREE_TIER['pages_deployments_per_month']
                 pct = (this_month / limit) * 100
                 if pct < 70:
@@ -648,6 +1184,21 @@ def main():
         print("  >>> VERDICT: Comfortably within free tier limits. <<<")
 
     print()
+
+    if not args.no_record:
+        samples = build_history_samples(workers, kv_namespaces, daily, pf_daily, deploys_this_month,
+                                        cpu_by_script, kv_daily)
+        recorded = usage_history.record('cloudflare', samples)
+        print(f"  Recorded {recorded} metrics to usage history.")
+        print("  Forecast: python scripts/usage_history.py forecast")
+        print()
+
+    if args.http_stats:
+        import api_client
+
+        api_client.print_stats()
+        print()
+
     print("=" * 70)
 
 
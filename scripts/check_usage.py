@@ -6,24 +6,38 @@ Checks current usage against Supabase free tier limits.
 
 Usage:
   python scripts/check_usage.py
+  python scripts/check_usage.py --count exact    # Force exact row counts
+  python scripts/check_usage.py --count planned  # Planner estimates only (fastest)
+  python scripts/check_usage.py --timings        # Time, calls and bytes per phase
+  python scripts/check_usage.py --profile        # Same, plus cProfile (check_usage.prof)
+  python scripts/feedown_admin.py usage          # Same, via the admin CLI
 
 Optional: Set SUPABASE_ACCESS_TOKEN for detailed DB size info.
   Get it from: https://supabase.com/dashboard/account/tokens
+
+Optional: Install scripts/sql/table_sizes.sql (SQL Editor) for measured
+  per-table / per-index sizes. Results are cached locally for
+  SIZES_CACHE_TTL seconds; pass --no-cache to re-measure.
+
+Every run is appended to the local usage history (see usage_history.py);
+pass --no-record to skip.
 """
 
 import os
 import sys
 import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
-try:
-    import requests
-except ImportError:
-    print("Error: requests library not installed")
-    print("Run: pip install requests")
-    sys.exit(1)
+import local_cache
+import usage_history
+import profiling
+from report_utils import format_bytes
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -42,14 +56,10 @@ SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
 SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 SUPABASE_ACCESS_TOKEN = os.getenv('SUPABASE_ACCESS_TOKEN')  # Optional: personal access token
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
-    sys.exit(1)
-
 # Extract project ref from URL (e.g., https://abcdef.supabase.co -> abcdef)
-PROJECT_REF = SUPABASE_URL.replace('https://', '').split('.')[0]
+PROJECT_REF = (urlsplit(SUPABASE_URL or '').hostname or '').split('.')[0]
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+MANAGEMENT_API = os.getenv('SUPABASE_MANAGEMENT_API_URL', 'https://api.supabase.com')
 
 # ── Supabase Free Tier Limits ──────────────────────────────────────
 FREE_TIER = {
@@ -61,17 +71,71 @@ FREE_TIER = {
     'bandwidth_gb': 5,
 }
 
+# ── Row Count Strategy ─────────────────────────────────────────────
+# 'exact'     - COUNT(*) (full scan on large tables)
+# 'planned'   - Postgres planner estimate (pg_class.reltuples, instant)
+# 'estimated' - exact below PostgREST's max-rows, planned above it
+# 'auto'      - planned first, exact only if below COUNT_EXACT_THRESHOLD
+COUNT_STRATEGY = {
+    'user_profiles': 'exact',
+    'feeds': 'exact',
+    'articles': 'auto',
+    'read_articles': 'auto',
+    'favorites': 'auto',
+    'recommended_feeds': 'exact',
+}
+COUNT_EXACT_THRESHOLD = 100_000
+COUNT_METHODS = ('auto', 'exact', 'planned', 'estimated')
+
+# ── Size Measurement (scripts/sql/table_sizes.sql) ─────────────────
+TABLE_SIZES_RPC = 'feedown_table_sizes'
+DATABASE_SIZE_RPC = 'feedown_database_size'
+READ_STATE_RPC = 'feedown_read_state_summary'  # scripts/sql/orphaned_read_state.sql
+SIZES_CACHE_TTL = 15 * 60  # seconds
+
+# ── Management API Discovery ───────────────────────────────────────
+# Candidate endpoints in order of preference. The last one is project info,
+# which has no DB size but still confirms the token works.
+MANAGEMENT_ENDPOINTS = [
+    '/v1/projects/{ref}/usage',
+    '/v1/projects/{ref}/database/usage',
+    '/v1/projects/{ref}/readonly/database/size',
+    '/v1/projects/{ref}',
+]
+MANAGEMENT_PROBE_TIMEOUT = 3            # seconds per endpoint while discovering
+MANAGEMENT_TIMEOUT = 10                 # seconds for the cached endpoint
+MANAGEMENT_CACHE_TTL = 24 * 60 * 60     # how long a working endpoint is trusted
+MANAGEMENT_MISS_TTL = 15 * 60           # how long "nothing works" is remembered
+
+# Fallback: rough average row sizes in bytes (based on schema), used only
+# when the sizing RPCs are not installed
+AVG_ROW_SIZES = {
+    'user_profiles': 200,       # UUID + email + booleans + timestamp
+    'feeds': 500,               # UUID + URLs + titles + timestamps
+    'articles': 800,            # hash + UUIDs + text fields + timestamps
+    'read_articles': 100,       # 2 UUIDs + timestamp
+    'favorites': 600,           # hash + UUID + text fields + timestamp
+    'recommended_feeds': 300,   # UUID + name + URL + metadata
+}
+INDEX_OVERHEAD = 1.3  # ~30% on top of row data for indexes
 
-def format_bytes(b):
-    """Format bytes to human-readable string."""
-    if b < 1024:
-        return f"{b} B"
-    elif b < 1024 ** 2:
-        return f"{b / 1024:.1f} KB"
-    elif b < 1024 ** 3:
-        return f"{b / 1024 ** 2:.1f} MB"
-    else:
-        return f"{b / 1024 ** 3:.2f} GB"
+
+# ── Clients ────────────────────────────────────────────────────────
+# supabase-py and api_client (httpx) are imported on first use, so --help
+# and importing this module (watch_usage.py) stay fast and offline.
+
+def require_credentials():
+    """Exit with a message unless the Supabase credentials are set."""
+    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
+        sys.exit(1)
+
+
+def get_supabase():
+    """The shared Supabase client (service role); api_client is imported on first use."""
+    import api_client
+
+    return api_client.supabase_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 
 def progress_bar(pct, width=30):
@@ -87,13 +151,14 @@ def progress_bar(pct, width=30):
     return f"[{bar}] {pct:5.1f}% {status}"
 
 
+@profiling.timed
 def get_auth_stats():
     """Get auth user statistics."""
     all_users = []
     page = 1
     per_page = 100
     while True:
-        res = supabase.auth.admin.list_users(page=page, per_page=per_page)
+        res = get_supabase().auth.admin.list_users(page=page, per_page=per_page)
         batch = res if isinstance(res, list) else getattr(res, 'users', res)
         if not batch:
             break
@@ -124,21 +189,127 @@ def get_auth_stats():
     return total, mau
 
 
-def get_table_row_counts():
-    """Get row counts for all application tables."""
-    tables = ['user_profiles', 'feeds', 'articles', 'read_articles', 'favorites', 'recommended_feeds']
+@profiling.timed
+def count_table_rows(table, strategy='exact'):
+    """Count rows in one table. Returns (count, method_used, seconds)."""
+    start = time.perf_counter()
+    method = strategy
+    try:
+        if strategy == 'auto':
+            planned = _count_rows(table, 'planned')
+            if planned >= COUNT_EXACT_THRESHOLD:
+                count, method = planned, 'planned'
+            else:
+                count, method = _count_rows(table, 'exact'), 'exact'
+        else:
+            count = _count_rows(table, strategy)
+    except Exception as e:
+        count = f"Error: {e}"
+    return count, method, time.perf_counter() - start
+
+
+def _count_rows(table, method):
+    result = get_supabase().table(table).select('*', count=method).limit(0).execute()
+    return result.count if result.count is not None else 0
+
+
+@profiling.timed
+def get_table_row_counts(strategy=None):
+    """
+    Get row counts for all application tables.
+
+    Counts run concurrently over the shared client. `strategy` overrides
+    COUNT_STRATEGY for every table. Returns (counts, details) where details
+    maps table -> {'method', 'seconds'}.
+    """
+    tables = list(COUNT_STRATEGY)
+    with ThreadPoolExecutor(max_workers=len(tables)) as pool:
+        futures = {
+            table: pool.submit(profiling.propagate(count_table_rows), table, strategy or COUNT_STRATEGY[table])
+            for table in tables
+        }
+        results = {table: f.result() for table, f in futures.items()}
+
     counts = {}
-    for table in tables:
-        try:
-            result = supabase.table(table).select('*', count='exact').limit(0).execute()
-            counts[table] = result.count if result.count is not None else 0
-        except Exception as e:
-            counts[table] = f"Error: {e}"
-    return counts
+    details = {}
+    for table, (count, method, seconds) in results.items():
+        counts[table] = count
+        details[table] = {'method': method, 'seconds': seconds}
+    return counts, details
+
+
+def response_shape(data):
+    """Short signature of a JSON response's structure, used to detect format changes."""
+    if isinstance(data, dict):
+        return {'type': 'object', 'keys': sorted(data)}
+    if isinstance(data, list):
+        first = data[0] if data else None
+        return {'type': 'array', 'keys': sorted(first) if isinstance(first, dict) else []}
+    return {'type': type(data).__name__}
+
 
+def _management_get(endpoint, headers, timeout, retries=None):
+    """GET a Management API endpoint template. Returns parsed JSON, or None if unusable."""
+    import api_client
 
-def get_db_size_via_management_api():
-    """Try to get DB size via Supabase Management API."""
+    url = f'{MANAGEMENT_API}{endpoint.format(ref=PROJECT_REF)}'
+    try:
+        resp = api_client.supabase_management().call('GET', url, headers=headers, timeout=timeout, retries=retries)
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+    except (api_client.HTTPError, ValueError):
+        return None
+    return data if data and data != {} else None
+
+
+def _management_result(endpoint, data):
+    """Wrap a response in the {'endpoint', 'data'} form main() reads."""
+    if endpoint == MANAGEMENT_ENDPOINTS[-1]:
+        # Project info: keep only the fields that may carry size information
+        return {
+            'endpoint': 'project_info',
+            'data': {
+                'name': data.get('name'),
+                'region': data.get('region'),
+                'status': data.get('status'),
+                'database': data.get('database', {}),
+            }
+        }
+    return {'endpoint': endpoint.format(ref=PROJECT_REF), 'data': data}
+
+
+@profiling.timed
+def discover_management_endpoint(headers):
+    """
+    Probe all candidate endpoints concurrently with a short timeout.
+
+    Returns (endpoint_template, data) for the most preferred endpoint that
+    answered with data, or (None, None).
+    """
+    with ThreadPoolExecutor(max_workers=len(MANAGEMENT_ENDPOINTS)) as pool:
+        futures = [
+            pool.submit(profiling.propagate(_management_get), endpoint, headers, MANAGEMENT_PROBE_TIMEOUT, retries=1)
+            for endpoint in MANAGEMENT_ENDPOINTS
+        ]
+        responses = [f.result() for f in futures]
+
+    for endpoint, data in zip(MANAGEMENT_ENDPOINTS, responses):
+        if data is not None:
+            return endpoint, data
+    return None, None
+
+
+@profiling.timed
+def get_db_size_via_management_api(use_cache=True):
+    """
+    Try to get DB size via Supabase Management API.
+
+    The endpoint that worked and the shape of its response are cached for
+    MANAGEMENT_CACHE_TTL, keyed by a fingerprint of the access token. When the
+    cached endpoint stops answering or its response shape changes, the cache is
+    dropped and all candidates are probed again.
+    """
     if not SUPABASE_ACCESS_TOKEN:
         return None
 
@@ -146,89 +317,122 @@ def get_db_size_via_management_api():
         'Authorization': f'Bearer {SUPABASE_ACCESS_TOKEN}',
         'Content-Type': 'application/json',
     }
+    token_id = hashlib.sha256(SUPABASE_ACCESS_TOKEN.encode()).hexdigest()[:12]
+    cache_name = f'mgmt_endpoint_{PROJECT_REF}'
+    miss_cache_name = f'mgmt_endpoint_miss_{PROJECT_REF}'
+
+    if use_cache:
+        if local_cache.load(miss_cache_name, MANAGEMENT_MISS_TTL) == token_id:
+            return None
+        cached = local_cache.load(cache_name, MANAGEMENT_CACHE_TTL)
+        if cached and cached.get('token') == token_id:
+            data = _management_get(cached['endpoint'], headers, MANAGEMENT_TIMEOUT)
+            if data is not None and response_shape(data) == cached.get('shape'):
+                return _management_result(cached['endpoint'], data)
+            local_cache.invalidate(cache_name)
+
+    endpoint, data = discover_management_endpoint(headers)
+    if endpoint is None:
+        local_cache.save(miss_cache_name, token_id)
+        return None
+
+    local_cache.invalidate(miss_cache_name)
+    local_cache.save(cache_name, {
+        'token': token_id,
+        'endpoint': endpoint,
+        'shape': response_shape(data),
+    })
+    return _management_result(endpoint, data)
+
+
+@profiling.timed
+def get_db_size_via_rpc(use_cache=True):
+    """Get pg_database_size() via the feedown_database_size RPC (scripts/sql/table_sizes.sql)."""
+    cache_name = f'db_size_{PROJECT_REF}'
+    if use_cache:
+        cached = local_cache.load(cache_name, SIZES_CACHE_TTL)
+        if cached is not None:
+            return cached
 
-    # Try multiple endpoints to find DB size
-    endpoints = [
-        f'/v1/projects/{PROJECT_REF}/usage',
-        f'/v1/projects/{PROJECT_REF}/database/usage',
-        f'/v1/projects/{PROJECT_REF}/readonly/database/size',
-    ]
-
-    for endpoint in endpoints:
-        try:
-            url = f'https://api.supabase.com{endpoint}'
-            resp = requests.get(url, headers=headers, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                if data and data != {}:
-                    return {'endpoint': endpoint, 'data': data}
-        except Exception:
-            pass
-
-    # Fallback: get project info and extract any size-related fields
     try:
-        url = f'https://api.supabase.com/v1/projects/{PROJECT_REF}'
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            proj = resp.json()
-            # Extract useful fields
-            return {
-                'endpoint': 'project_info',
-                'data': {
-                    'name': proj.get('name'),
-                    'region': proj.get('region'),
-                    'status': proj.get('status'),
-                    'database': proj.get('database', {}),
-                }
-            }
+        result = get_supabase().rpc(DATABASE_SIZE_RPC).execute()
+    except Exception:
+        return None
+
+    size = result.data
+    if not isinstance(size, (int, float)):
+        return None
+    local_cache.save(cache_name, size)
+    return size
+
+
+@profiling.timed
+def get_table_sizes(use_cache=True):
+    """
+    Get measured sizes for every public table via the feedown_table_sizes RPC.
+
+    Returns {table: {'total_bytes', 'table_bytes', 'toast_bytes', 'index_bytes',
+    'live_tuples', 'dead_tuples', 'dead_bytes_est'}}, or None if the RPC is not
+    installed. Results are cached for SIZES_CACHE_TTL seconds so repeated runs
+    don't hit the catalog views.
+    """
+    cache_name = f'table_sizes_{PROJECT_REF}'
+    if use_cache:
+        cached = local_cache.load(cache_name, SIZES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
+    try:
+        result = get_supabase().rpc(TABLE_SIZES_RPC).execute()
     except Exception:
-        pass
+        return None
 
-    return None
+    sizes = {row['table_name']: row for row in (result.data or [])}
+    if not sizes:
+        return None
+    local_cache.save(cache_name, sizes)
+    return sizes
 
 
-def get_db_size_via_rpc():
-    """Try to get DB size by calling pg_database_size via PostgREST RPC."""
-    # This requires a function to exist. Try common approaches.
-    headers = {
-        'apikey': SUPABASE_SERVICE_ROLE_KEY,
-        'Authorization': f'Bearer {SUPABASE_SERVICE_ROLE_KEY}',
-        'Content-Type': 'application/json',
-        'Prefer': 'return=representation',
-    }
+@profiling.timed
+def get_read_state_summary(use_cache=True):
+    """
+    Live vs orphaned read_articles rows via the feedown_read_state_summary RPC.
+
+    Returns {'read_live', 'read_orphaned'} or None if the RPC is not installed.
+    Cached like the size measurements, since it anti-joins two large tables.
+    """
+    cache_name = f'read_state_{PROJECT_REF}'
+    if use_cache:
+        cached = local_cache.load(cache_name, SIZES_CACHE_TTL)
+        if cached is not None:
+            return cached
 
-    # Try raw SQL via PostgREST (won't work without a function, but worth trying)
     try:
-        url = f'{SUPABASE_URL}/rest/v1/rpc/pg_database_size'
-        resp = requests.post(url, headers=headers, json={'db_name': 'postgres'}, timeout=10)
-        if resp.status_code == 200:
-            return resp.json()
+        result = get_supabase().rpc(READ_STATE_RPC).execute()
     except Exception:
-        pass
+        return None
 
-    return None
+    rows = result.data or []
+    if not rows:
+        return None
+    local_cache.save(cache_name, rows[0])
+    return rows[0]
 
 
 def estimate_table_sizes(row_counts):
-    """Estimate table sizes based on row counts and average row sizes."""
-    # Rough estimates of average row size in bytes (based on schema)
-    avg_row_sizes = {
-        'user_profiles': 200,       # UUID + email + booleans + timestamp
-        'feeds': 500,               # UUID + URLs + titles + timestamps
-        'articles': 800,            # hash + UUIDs + text fields + timestamps
-        'read_articles': 100,       # 2 UUIDs + timestamp
-        'favorites': 600,           # hash + UUID + text fields + timestamp
-        'recommended_feeds': 300,   # UUID + name + URL + metadata
-    }
+    """
+    Estimate table sizes based on row counts and average row sizes.
 
+    Fallback only, used when feedown_table_sizes is not installed.
+    """
     total_bytes = 0
     table_sizes = {}
     for table, count in row_counts.items():
         if isinstance(count, int):
-            avg = avg_row_sizes.get(table, 300)
+            avg = AVG_ROW_SIZES.get(table, 300)
             size = count * avg
-            # Add ~30% overhead for indexes
-            size_with_idx = int(size * 1.3)
+            size_with_idx = int(size * INDEX_OVERHEAD)
             table_sizes[table] = size_with_idx
             total_bytes += size_with_idx
         else:
@@ -237,7 +441,29 @@ def estimate_table_sizes(row_counts):
     return table_sizes, total_bytes
 
 
-def main():
+def bytes_per_row(table, row_counts, measured_sizes):
+    """Average on-disk bytes per row including indexes, measured when possible."""
+    count = row_counts.get(table)
+    if measured_sizes and table in measured_sizes and isinstance(count, int) and count > 0:
+        return measured_sizes[table]['total_bytes'] / count
+    return AVG_ROW_SIZES.get(table, 300) * INDEX_OVERHEAD
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Supabase Free Tier Usage Checker")
+    parser.add_argument("--count", choices=COUNT_METHODS,
+                        help="Row count method for all tables (default: per-table COUNT_STRATEGY)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached sizes and Management API endpoint discovery")
+    parser.add_argument("--http-stats", action="store_true",
+                        help="Print per-endpoint API latency and retry counts at the end")
+    parser.add_argument("--no-record", action="store_true",
+                        help="Don't append this run to the usage history")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+    require_credentials()
+
     print()
     print("=" * 70)
     print("  FeedOwn - Supabase Free Tier Usage Report")
@@ -266,24 +492,61 @@ def main():
     print("  2. Database Tables")
     print("-" * 70)
 
-    row_counts = get_table_row_counts()
+    count_start = time.perf_counter()
+    row_counts, count_details = get_table_row_counts(args.count)
+    count_elapsed = time.perf_counter() - count_start
     total_rows = 0
 
-    print(f"  {'Table':<25} {'Rows':>10} {'Est. Size':>12}")
-    print(f"  {'─'*25} {'─'*10} {'─'*12}")
+    measured_sizes = get_table_sizes(use_cache=not args.no_cache)
+    if measured_sizes:
+        table_sizes = {t: measured_sizes[t]['total_bytes'] for t in row_counts if t in measured_sizes}
+        total_size_bytes = sum(table_sizes.values())
+        size_label = 'Size'
+    else:
+        table_sizes, total_size_bytes = estimate_table_sizes(row_counts)
+        size_label = 'Est. Size'
 
-    table_sizes, total_est_bytes = estimate_table_sizes(row_counts)
+    print(f"  {'Table':<25} {'Rows':>10} {size_label:>12} {'Count':>8} {'Time':>8}")
+    print(f"  {'─'*25} {'─'*10} {'─'*12} {'─'*8} {'─'*8}")
 
     for table, count in row_counts.items():
+        method = count_details[table]['method']
+        elapsed = f"{count_details[table]['seconds'] * 1000:.0f}ms"
         if isinstance(count, int):
             total_rows += count
             size_str = format_bytes(table_sizes.get(table, 0))
-            print(f"  {table:<25} {count:>10,} {size_str:>12}")
+            approx = '~' if method != 'exact' else ''
+            count_str = f"{approx}{count:,}"
+            print(f"  {table:<25} {count_str:>10} {size_str:>12} {method:>8} {elapsed:>8}")
         else:
-            print(f"  {table:<25} {'Error':>10}")
+            print(f"  {table:<25} {'Error':>10} {'':>12} {method:>8} {elapsed:>8}")
 
-    print(f"  {'─'*25} {'─'*10} {'─'*12}")
-    print(f"  {'TOTAL':<25} {total_rows:>10,} {format_bytes(total_est_bytes):>12}")
+    print(f"  {'─'*25} {'─'*10} {'─'*12} {'─'*8} {'─'*8}")
+    print(f"  {'TOTAL':<25} {total_rows:>10,} {format_bytes(total_size_bytes):>12}")
+    print(f"  (counted {len(row_counts)} tables concurrently in {count_elapsed:.2f}s)")
+    print()
+
+    read_state = get_read_state_summary(use_cache=not args.no_cache)
+    if read_state:
+        read_total = read_state['read_live'] + read_state['read_orphaned']
+        orphan_pct = (read_state['read_orphaned'] / read_total * 100) if read_total else 0
+        print(f"  read_articles: {read_state['read_live']:,} live / "
+              f"{read_state['read_orphaned']:,} orphaned ({orphan_pct:.1f}%)")
+        if read_state['read_orphaned']:
+            print("  (reclaim with: python scripts/compact_read_state.py --delete)")
+        print()
+
+    if measured_sizes:
+        print("  Size breakdown (measured):")
+        print(f"  {'Table':<25} {'Heap':>10} {'TOAST':>10} {'Indexes':>10} {'Dead (est)':>11}")
+        print(f"  {'─'*25} {'─'*10} {'─'*10} {'─'*10} {'─'*11}")
+        for table, row in measured_sizes.items():
+            heap, toast, indexes, dead = (format_bytes(row[k]) for k in
+                                          ('table_bytes', 'toast_bytes', 'index_bytes', 'dead_bytes_est'))
+            print(f"  {table:<25} {heap:>10} {toast:>10} {indexes:>10} {dead:>11}")
+    else:
+        print("  Sizes are estimated from row counts.")
+        print("  Tip: Run scripts/sql/table_sizes.sql in the SQL Editor for measured sizes.")
     print()
 
     # ── 3. Database Size ───────────────────────────────────────────
@@ -295,7 +558,7 @@ def main():
     db_limit_bytes = db_limit_mb * 1024 * 1024
 
     # Try Management API
-    db_info = get_db_size_via_management_api()
+    db_info = get_db_size_via_management_api(use_cache=not args.no_cache)
     actual_size = None
 
     if db_info and isinstance(db_info, dict):
@@ -323,15 +586,28 @@ def main():
                         actual_size = db_obj[key]
                         break
 
+    db_size_estimated = False
     if actual_size and isinstance(actual_size, (int, float)) and actual_size > 0:
-        db_pct = (actual_size / db_limit_bytes) * 100
-        print(f"  Database size (actual):   {format_bytes(int(actual_size))}")
+        db_size = int(actual_size)
+        print(f"  Database size (actual):   {format_bytes(db_size)}")
+        print(f"  Free tier limit:          {db_limit_mb} MB")
+        print(f"  Usage: {progress_bar((db_size / db_limit_bytes) * 100)}")
+    elif (rpc_size := get_db_size_via_rpc(use_cache=not args.no_cache)):
+        db_size = int(rpc_size)
+        print(f"  Database size (measured): {format_bytes(db_size)}")
         print(f"  Free tier limit:          {db_limit_mb} MB")
-        print(f"  Usage: {progress_bar(db_pct)}")
+        print(f"  Usage: {progress_bar((db_size / db_limit_bytes) * 100)}")
+    elif measured_sizes:
+        db_size = total_size_bytes
+        print(f"  Database size (tables):   {format_bytes(db_size)}")
+        print(f"  Free tier limit:          {db_limit_mb} MB")
+        print(f"  Usage: {progress_bar((db_size / db_limit_bytes) * 100)}  (public tables only)")
     else:
         # Use estimate
-        est_pct = (total_est_bytes / db_limit_bytes) * 100
-        print(f"  Database size (estimate): {format_bytes(total_est_bytes)}")
+        db_size = total_size_bytes
+        db_size_estimated = True
+        est_pct = (db_size / db_limit_bytes) * 100
+        print(f"  Database size (estimate): {format_bytes(db_size)}")
         print(f"  Free tier limit:          {db_limit_mb} MB")
         print(f"  Usage: {progress_bar(est_pct)}  (estimated)")
         if db_info:
@@ -354,8 +630,12 @@ def main():
 
     if isinstance(articles_count, int) and isinstance(feeds_count, int) and feeds_count > 0:
         avg_articles_per_feed = articles_count / feeds_count if feeds_count else 0
+        article_bytes = bytes_per_row('articles', row_counts, measured_sizes)
+        feed_bytes = bytes_per_row('feeds', row_counts, measured_sizes)
+        read_bytes = bytes_per_row('read_articles', row_counts, measured_sizes)
         print(f"  Avg articles per feed:    {avg_articles_per_feed:.1f}")
         print(f"  Articles TTL:             7 days")
+        print(f"  Bytes per article:        {article_bytes:.0f} ({'measured' if measured_sizes else 'estimated'})")
         print()
 
         # Estimate max DB size at different user counts
@@ -365,8 +645,8 @@ def main():
         for user_count in [10, 50, 100, 500, 1000]:
             est_feeds = user_count * (feeds_count / max(total_users, 1))
             est_articles = est_feeds * avg_articles_per_feed
-            # Estimate size: articles ~800B, feeds ~500B, read_articles ~100B per article, overhead 30%
-            est_size = int((est_articles * 800 + est_feeds * 500 + est_articles * 100) * 1.3)
+            # One read_articles row per article in the worst case
+            est_size = int(est_articles * article_bytes + est_feeds * feed_bytes + est_articles * read_bytes)
             pct = (est_size / db_limit_bytes) * 100
             warning = ' !!!' if pct >= 90 else ' !' if pct >= 70 else ''
             print(f"  {user_count:<10} {est_feeds:<15.0f} {est_articles:<18.0f} {format_bytes(est_size):<15} {pct:.1f}%{warning}")
@@ -388,13 +668,14 @@ def main():
         checks.append(('Auth (MAU)', 'CRITICAL', f'{mau}/{mau_limit:,}'))
 
     # DB size check
-    est_pct = (total_est_bytes / db_limit_bytes) * 100
-    if est_pct < 70:
-        checks.append(('Database Size', 'OK', f'~{format_bytes(total_est_bytes)}/{db_limit_mb}MB'))
-    elif est_pct < 90:
-        checks.append(('Database Size', 'WARNING', f'~{format_bytes(total_est_bytes)}/{db_limit_mb}MB'))
+    db_pct = (db_size / db_limit_bytes) * 100
+    db_detail = f"{'~' if db_size_estimated else ''}{format_bytes(db_size)}/{db_limit_mb}MB"
+    if db_pct < 70:
+        checks.append(('Database Size', 'OK', db_detail))
+    elif db_pct < 90:
+        checks.append(('Database Size', 'WARNING', db_detail))
     else:
-        checks.append(('Database Size', 'CRITICAL', f'~{format_bytes(total_est_bytes)}/{db_limit_mb}MB'))
+        checks.append(('Database Size', 'CRITICAL', db_detail))
 
     # Row count check (articles with TTL should stay manageable)
     if articles_count > 50000:
@@ -418,6 +699,30 @@ def main():
         print("  >>> VERDICT: Comfortably within free tier limits. <<<")
 
     print()
+
+    if not args.no_record:
+        samples = [
+            ('auth_users', total_users, None),
+            ('auth_mau', mau, mau_limit),
+            ('db_size_bytes_estimated' if db_size_estimated else 'db_size_bytes', db_size, db_limit_bytes),
+        ]
+        samples += [(f'rows:{table}', count, None) for table, count in row_counts.items()]
+        if read_state:
+            samples.append(('rows:read_articles_orphaned', read_state['read_orphaned'], None))
+        if measured_sizes:
+            samples += [(f'table_bytes:{table}', row['total_bytes'], None)
+                        for table, row in measured_sizes.items()]
+        recorded = usage_history.record('supabase', samples)
+        print(f"  Recorded {recorded} metrics to usage history.")
+        print("  Forecast: python scripts/usage_history.py forecast")
+        print()
+
+    if args.http_stats:
+        import api_client
+
+        api_client.print_stats()
+        print()
+
     print("=" * 70)
 
 
@@ -7,13 +7,17 @@ Uses the Admin API (auth.users) to get all users, not just user_profiles.
 
 Usage:
   python scripts/check_users.py
+  python scripts/check_users.py --timings
+  python scripts/feedown_admin.py users
 """
 
 import os
 import sys
+import argparse
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+import profiling
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -31,12 +35,12 @@ if not os.getenv('SUPABASE_URL'):
 SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
 SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required")
-    print("Set them in .env.shared or as environment variables")
-    sys.exit(1)
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+def get_supabase():
+    """The shared Supabase client (service role); api_client is imported on first use."""
+    import api_client
+
+    return api_client.supabase_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 
 def parse_dt(s):
@@ -53,23 +57,28 @@ def parse_dt(s):
         return None
 
 
+@profiling.timed
 def get_user_stats():
+    supabase = get_supabase()
+
     # Get all auth users via Admin API (paginates automatically)
     all_users = []
     page = 1
     per_page = 100
-    while True:
-        res = supabase.auth.admin.list_users(page=page, per_page=per_page)
-        batch = res if isinstance(res, list) else getattr(res, 'users', res)
-        if not batch:
-            break
-        all_users.extend(batch)
-        if len(batch) < per_page:
-            break
-        page += 1
+    with profiling.phase('list_users'):
+        while True:
+            res = supabase.auth.admin.list_users(page=page, per_page=per_page)
+            batch = res if isinstance(res, list) else getattr(res, 'users', res)
+            if not batch:
+                break
+            all_users.extend(batch)
+            if len(batch) < per_page:
+                break
+            page += 1
 
     # Get user_profiles for test account info
-    profiles_result = supabase.table('user_profiles').select('id, is_test_account').execute()
+    with profiling.phase('select user_profiles'):
+        profiles_result = supabase.table('user_profiles').select('id, is_test_account').execute()
     profile_map = {p['id']: p for p in profiles_result.data}
 
     # Sort by created_at descending
@@ -110,18 +119,21 @@ def get_user_stats():
     print()
 
     # Per-user stats: feeds and articles count
-    feeds_result = supabase.table('feeds').select('user_id').execute()
-    articles_result = supabase.table('articles').select('user_id').execute()
-
-    feed_counts = {}
-    for f in feeds_result.data:
-        uid = f['user_id']
-        feed_counts[uid] = feed_counts.get(uid, 0) + 1
-
-    article_counts = {}
-    for a in articles_result.data:
-        uid = a['user_id']
-        article_counts[uid] = article_counts.get(uid, 0) + 1
+    with profiling.phase('select feeds'):
+        feeds_result = supabase.table('feeds').select('user_id').execute()
+    with profiling.phase('select articles'):
+        articles_result = supabase.table('articles').select('user_id').execute()
+
+    with profiling.phase('count per user'):
+        feed_counts = {}
+        for f in feeds_result.data:
+            uid = f['user_id']
+            feed_counts[uid] = feed_counts.get(uid, 0) + 1
+
+        article_counts = {}
+        for a in articles_result.data:
+            uid = a['user_id']
+            article_counts[uid] = article_counts.get(uid, 0) + 1
 
     print("-" * 70)
     print("  Database Summary")
@@ -137,30 +149,39 @@ def get_user_stats():
     print(f"  {'#':<4} {'Email':<35} {'Feeds':<7} {'Articles':<10} {'Profile':<9} {'Last Sign In'}")
     print(f"  {'─'*4} {'─'*35} {'─'*7} {'─'*10} {'─'*9} {'─'*19}")
 
-    for i, user in enumerate(all_users, 1):
-        uid = getattr(user, 'id', '')
-        email = getattr(user, 'email', 'N/A') or 'N/A'
-        feeds = feed_counts.get(uid, 0)
-        articles = article_counts.get(uid, 0)
-        has_prof = 'Yes' if uid in profile_map else ''
-        last_sign_in = ''
-        raw = getattr(user, 'last_sign_in_at', None)
-        if raw:
-            dt = parse_dt(raw)
-            if dt:
-                last_sign_in = dt.strftime('%Y-%m-%d %H:%M')
-        created = ''
-        raw_c = getattr(user, 'created_at', None)
-        if raw_c:
-            dt_c = parse_dt(raw_c)
-            if dt_c:
-                created = dt_c.strftime('%Y-%m-%d %H:%M')
-
-        print(f"  {i:<4} {email:<35} {feeds:<7} {articles:<10} {has_prof:<9} {last_sign_in}")
+    with profiling.phase('print users'):
+        for i, user in enumerate(all_users, 1):
+            uid = getattr(user, 'id', '')
+            email = getattr(user, 'email', 'N/A') or 'N/A'
+            feeds = feed_counts.get(uid, 0)
+            articles = article_counts.get(uid, 0)
+            has_prof = 'Yes' if uid in profile_map else ''
+            last_sign_in = ''
+            raw = getattr(user, 'last_sign_in_at', None)
+            if raw:
+                dt = parse_dt(raw)
+                if dt:
+                    last_sign_in = dt.strftime('%Y-%m-%d %H:%M')
+            created = ''
+            raw_c = getattr(user, 'created_at', None)
+            if raw_c:
+                dt_c = parse_dt(raw_c)
+                if dt_c:
+                    created = dt_c.strftime('%Y-%m-%d %H:%M')
+
+            print(f"  {i:<4} {email:<35} {feeds:<7} {articles:<10} {has_prof:<9} {last_sign_in}")
 
     print()
     print("=" * 70)
 
 
-if __name__ == '__main__':
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn User Statistics")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
     get_user_stats()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Orphaned Read State Compaction
+
+read_articles.article_id has no FK to articles, so once an article expires
+and is deleted its read marks stay behind. This script counts orphaned read
+marks per user and for the whole database (anti-join against articles),
+estimates the reclaimable bytes, and deletes them in bounded batches.
+
+favorites keep their own copy of each article and are kept forever by
+design; favorites whose article is gone are reported as "detached" but
+never deleted.
+
+Usage:
+  python scripts/compact_read_state.py                      # Report only
+  python scripts/compact_read_state.py --delete             # Delete orphaned read marks
+  python scripts/compact_read_state.py --delete --batch-size 500 --pause 1
+  python scripts/compact_read_state.py --delete --max-batches 20   # Bounded run
+
+Deletion totals are checkpointed after every batch; an interrupted or
+bounded run picks up where it left off the next time --delete is given.
+
+Optional: Install scripts/sql/orphaned_read_state.sql to run the anti-joins
+  and deletes inside Postgres (otherwise both tables are scanned here).
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+import local_cache
+import profiling
+from report_utils import format_bytes
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+# Load environment variables
+env_path = os.path.join(os.path.dirname(__file__), '..', '.env.shared')
+load_dotenv(env_path)
+
+if not os.getenv('SUPABASE_URL'):
+    env_path_parent = os.path.join(os.path.dirname(__file__), '..', '.env')
+    load_dotenv(env_path_parent)
+
+SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+PROJECT_REF = (urlsplit(SUPABASE_URL or '').hostname or '').split('.')[0]
+
+
+def get_supabase():
+    """The shared Supabase client (service role); api_client is imported on first use."""
+    import api_client
+
+    return api_client.supabase_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+
+BY_USER_RPC = 'feedown_read_state_by_user'
+SUMMARY_RPC = 'feedown_read_state_summary'
+DELETE_RPC = 'feedown_delete_orphaned_read_articles'
+TABLE_SIZES_RPC = 'feedown_table_sizes'
+
+EST_READ_ROW_BYTES = 100 * 1.3  # fallback incl. ~30% index overhead
+
+SCAN_PAGE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAUSE = 0.5
+IN_CHUNK = 200  # ids per DELETE ... IN (...) on the client-side path
+TOP_USERS = 10
+
+
+@profiling.timed
+def scan_column(table, columns, key):
+    """
+    Yield every row of a table in primary key order (client-side fallback only).
+
+    Keyset-paginated like purge_expired_articles' scan, so rows deleted or
+    added meanwhile don't shift the pages. `key` is the table's primary key:
+    one column, or (group, column) for a composite key such as read_articles
+    (user_id, article_id). PostgREST has no row comparison, so a composite
+    key is paged within its current group first, then on to the next group.
+    `columns` must include the key.
+    """
+    group, column = key if isinstance(key, tuple) else (None, key)
+    last = None  # key of the last row yielded
+    within_group = False
+    while True:
+        query = get_supabase().table(table).select(columns)
+        if within_group:
+            query = query.eq(group, last[group]).gt(column, last[column]).order(column)
+        elif group:
+            query = query.order(group).order(column)
+            if last is not None:
+                query = query.gt(group, last[group])
+        else:
+            query = query.order(column)
+            if last is not None:
+                query = query.gt(column, last[column])
+        page = query.limit(SCAN_PAGE_SIZE).execute().data or []
+        yield from page
+        if len(page) < SCAN_PAGE_SIZE:
+            if not within_group:
+                break
+            within_group = False  # group exhausted; continue after it
+            continue
+        last = page[-1]
+        within_group = group is not None
+
+
+@profiling.timed
+def find_orphans_client_side():
+    """
+    Anti-join in Python: read marks and favorites whose article id is gone.
+
+    Returns (stats_by_user, orphaned) where orphaned maps user_id -> [article_id].
+    """
+    article_ids = {a['id'] for a in scan_column('articles', 'id', 'id')}
+    stats = {}
+    orphaned = {}
+
+    def user_stats(uid):
+        return stats.setdefault(uid, {
+            'read_live': 0, 'read_orphaned': 0, 'favorites': 0, 'favorites_detached': 0,
+        })
+
+    for r in scan_column('read_articles', 'user_id, article_id', ('user_id', 'article_id')):
+        s = user_stats(r['user_id'])
+        if r['article_id'] in article_ids:
+            s['read_live'] += 1
+        else:
+            s['read_orphaned'] += 1
+            orphaned.setdefault(r['user_id'], []).append(r['article_id'])
+
+    for f in scan_column('favorites', 'id, user_id', 'id'):
+        s = user_stats(f['user_id'])
+        s['favorites'] += 1
+        if f['id'] not in article_ids:
+            s['favorites_detached'] += 1
+
+    return stats, orphaned
+
+
+@profiling.timed
+def get_read_state_by_user():
+    """Per-user read state for every user (paged past db-max-rows). Returns (stats_by_user, source)."""
+    import api_client
+
+    try:
+        rows = api_client.rpc_rows(get_supabase(), BY_USER_RPC, page_size=SCAN_PAGE_SIZE)
+        return {row['user_id']: row for row in rows}, 'rpc'
+    except Exception:
+        stats, _ = find_orphans_client_side()
+        return stats, 'scan'
+
+
+@profiling.timed
+def get_read_totals():
+    """Database-wide {'read_live', 'read_orphaned'} from one summary row, or None."""
+    try:
+        result = get_supabase().rpc(SUMMARY_RPC).execute()
+        return (result.data or [None])[0]
+    except Exception:
+        return None
+
+
+@profiling.timed
+def get_read_row_bytes():
+    """Measured bytes per read_articles row (incl. indexes), or an estimate."""
+    try:
+        result = get_supabase().rpc(TABLE_SIZES_RPC).execute()
+        for row in result.data or []:
+            if row['table_name'] == 'read_articles' and row.get('live_tuples'):
+                return row['total_bytes'] / row['live_tuples'], True
+    except Exception:
+        pass
+    return EST_READ_ROW_BYTES, False
+
+
+@profiling.timed
+def report():
+    """Print orphaned read marks per user and for the whole database."""
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Orphaned Read State")
+    print("=" * 70)
+    print(f"  Project: {PROJECT_REF}")
+    print(f"  Date:    {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M')} UTC")
+    print()
+
+    start = time.perf_counter()
+    stats, source = get_read_state_by_user()
+    elapsed = time.perf_counter() - start
+    row_bytes, measured = get_read_row_bytes()
+
+    totals = {'read_live': 0, 'read_orphaned': 0, 'favorites': 0, 'favorites_detached': 0}
+    for s in stats.values():
+        for key in totals:
+            totals[key] += s[key]
+    if source == 'rpc':
+        # One summary row: the database-wide counts, independent of the per-user paging
+        totals.update(get_read_totals() or {})
+
+    # ── 1. Per user ────────────────────────────────────────────────
+    print("-" * 70)
+    print(f"  1. Read marks by user (top {TOP_USERS} by orphaned, source: {source}, {elapsed:.2f}s)")
+    print("-" * 70)
+    affected = [(uid, s) for uid, s in stats.items() if s['read_orphaned']]
+    if affected:
+        print(f"  {'User':<38} {'Live':>8} {'Orphaned':>9} {'Fav (detached)':>15}")
+        print(f"  {'─'*38} {'─'*8} {'─'*9} {'─'*15}")
+        for uid, s in sorted(affected, key=lambda x: -x[1]['read_orphaned'])[:TOP_USERS]:
+            fav = f"{s['favorites']} ({s['favorites_detached']})"
+            print(f"  {uid:<38} {s['read_live']:>8,} {s['read_orphaned']:>9,} {fav:>15}")
+        if len(affected) > TOP_USERS:
+            print(f"  ... and {len(affected) - TOP_USERS} more users")
+    else:
+        print("  No orphaned read marks.")
+    print()
+
+    # ── 2. Database totals ─────────────────────────────────────────
+    total_reads = totals['read_live'] + totals['read_orphaned']
+    orphan_pct = (totals['read_orphaned'] / total_reads * 100) if total_reads else 0
+    print("-" * 70)
+    print("  2. Database totals")
+    print("-" * 70)
+    print(f"  read_articles live:       {totals['read_live']:,}")
+    print(f"  read_articles orphaned:   {totals['read_orphaned']:,} ({orphan_pct:.1f}%, {len(affected)} users)")
+    print(f"  Bytes per row:            {row_bytes:.0f} ({'measured' if measured else 'estimated'})")
+    print(f"  Reclaimable (est):        {format_bytes(totals['read_orphaned'] * row_bytes)}")
+    print(f"  favorites:                {totals['favorites']:,} "
+          f"({totals['favorites_detached']:,} detached from expired articles, kept by design)")
+    if totals['read_orphaned']:
+        print()
+        print("  Run with --delete to remove orphaned read marks in batches.")
+    print()
+    print("=" * 70)
+
+
+@profiling.timed
+def delete_batch_rpc(batch_size):
+    """Delete one batch inside Postgres. Returns rows deleted."""
+    result = get_supabase().rpc(DELETE_RPC, {'batch_size': batch_size}).execute()
+    return int(result.data or 0)
+
+
+def iter_client_side_batches(batch_size):
+    """Yield callables that each delete one batch of orphans found by a client-side scan."""
+    from postgrest.types import ReturnMethod
+
+    _, orphaned = find_orphans_client_side()
+    pairs = [(uid, aid) for uid, ids in orphaned.items() for aid in ids]
+
+    for start in range(0, len(pairs), batch_size):
+        batch = pairs[start:start + batch_size]
+
+        def run(batch=batch):
+            by_user = {}
+            for uid, aid in batch:
+                by_user.setdefault(uid, []).append(aid)
+            deleted = 0
+            for uid, ids in by_user.items():
+                for i in range(0, len(ids), IN_CHUNK):
+                    result = get_supabase().table('read_articles') \
+                        .delete(count='exact', returning=ReturnMethod.minimal) \
+                        .eq('user_id', uid) \
+                        .in_('article_id', ids[i:i + IN_CHUNK]) \
+                        .execute()
+                    deleted += result.count or 0
+            return deleted
+
+        yield run
+
+
+@profiling.timed
+def delete_orphans(batch_size, pause, max_batches, restart):
+    """Delete orphaned read marks in bounded batches with a resumable checkpoint."""
+    checkpoint_name = f'compact_read_state_{PROJECT_REF}'
+    checkpoint = None if restart else local_cache.load(checkpoint_name)
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Orphaned Read State Compaction")
+    print("=" * 70)
+    if checkpoint:
+        print(f"  Resuming compaction started {checkpoint['started_at']}")
+        print(f"  ({checkpoint['deleted']:,} read marks already deleted)")
+    else:
+        checkpoint = {
+            'started_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+            'deleted': 0,
+            'batches': 0,
+        }
+
+    # Prefer the server-side delete; fall back to a client-side anti-join
+    try:
+        first = delete_batch_rpc(batch_size)
+        mode = 'rpc'
+
+        def next_batch():
+            return delete_batch_rpc(batch_size)
+    except Exception:
+        first = None
+        mode = 'scan'
+        batches = iter_client_side_batches(batch_size)
+
+        def next_batch():
+            run = next(batches, None)
+            return run() if run else 0
+
+    print(f"  Mode: {mode}, batch size {batch_size}, pause {pause}s"
+          + (f", max {max_batches} batches" if max_batches else ''))
+    print()
+
+    run_start = time.perf_counter()
+    run_deleted = 0
+    run_batches = 0
+    done = False
+    try:
+        while not max_batches or run_batches < max_batches:
+            deleted = first if first is not None else next_batch()
+            first = None
+
+            if deleted == 0:
+                done = True
+                break
+
+            run_deleted += deleted
+            run_batches += 1
+            checkpoint['deleted'] += deleted
+            checkpoint['batches'] += 1
+            local_cache.save(checkpoint_name, checkpoint)
+
+            elapsed = time.perf_counter() - run_start
+            rate = run_deleted / elapsed if elapsed else 0
+            print(f"  [batch {checkpoint['batches']:>5}] deleted {run_deleted:>9,} this run "
+                  f"({checkpoint['deleted']:,} total)  {rate:,.0f} rows/s")
+
+            if mode == 'rpc' and deleted < batch_size:
+                done = True
+                break
+            time.sleep(pause)
+    except KeyboardInterrupt:
+        print()
+        print("  Interrupted. Progress is saved; run --delete again to resume.")
+
+    print()
+    if done:
+        local_cache.invalidate(checkpoint_name)
+        print(f"  Done: deleted {checkpoint['deleted']:,} orphaned read marks in {checkpoint['batches']} batches.")
+    else:
+        print(f"  Stopped after {run_batches} batches; run --delete again to resume.")
+    print()
+    print("=" * 70)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Orphaned Read State Compaction")
+    parser.add_argument("--delete", action="store_true", help="Delete orphaned read marks (default: report only)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE,
+                        help=f"Seconds to wait between batches (default: {DEFAULT_PAUSE})")
+    parser.add_argument("--max-batches", type=int, default=0, help="Stop after N batches (resume later)")
+    parser.add_argument("--restart", action="store_true", help="Discard saved progress totals")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+
+    if args.delete:
+        delete_orphans(args.batch_size, args.pause, args.max_batches, args.restart)
+    else:
+        report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+FeedOwn Admin CLI
+
+Single entry point for the admin scripts in this directory. Each subcommand
+runs the corresponding script's main() with the remaining arguments, so
+`feedown-admin usage --count exact` is the same as
+`python scripts/check_usage.py --count exact`.
+
+Script modules are imported only when their subcommand runs, and the
+scripts themselves import supabase-py / httpx / requests and build their
+clients on first use. --help, `history` and `feeds check/test` never load
+the Supabase client.
+
+Usage:
+  python scripts/feedown_admin.py --help
+  python scripts/feedown_admin.py users
+  python scripts/feedown_admin.py usage --count planned
+  python scripts/feedown_admin.py cloudflare --hourly
+  python scripts/feedown_admin.py history forecast
+  python scripts/feedown_admin.py watch --port 9100
+  python scripts/feedown_admin.py purge --purge --max-chunks 50
+  python scripts/feedown_admin.py compact --delete
+  python scripts/feedown_admin.py plans --only refresh
+  python scripts/feedown_admin.py feeds check
+  python scripts/feedown_admin.py feeds test https://example.com/rss
+  python scripts/feedown_admin.py feeds sync
+  python scripts/feedown_admin.py usage --timings     # any command: --timings / --profile / --profile-out PATH / --trace PATH
+  python scripts/feedown_admin.py trace usage.jsonl
+
+  yarn admin <command> ...   # same, from the repository root
+
+Startup time:
+  python -X importtime scripts/feedown_admin.py feeds test --help 2> importtime.log
+"""
+
+import sys
+import argparse
+import importlib
+
+import profiling
+
+PROG = 'feedown-admin'
+
+# (command, module, help) - the module's main(argv, prog) gets the rest of the arguments
+COMMANDS = [
+    ('users', 'check_users', 'User statistics (auth users, feeds, articles)'),
+    ('usage', 'check_usage', 'Supabase free tier usage report'),
+    ('cloudflare', 'check_cloudflare', 'Cloudflare free tier usage report'),
+    ('history', 'usage_history', 'Usage history and free tier forecast'),
+    ('watch', 'watch_usage', 'Poll usage and serve it as Prometheus metrics'),
+    ('purge', 'purge_expired_articles', 'Analyze / purge expired articles'),
+    ('compact', 'compact_read_state', 'Report / delete orphaned read marks'),
+    ('plans', 'query_plans', 'EXPLAIN the API queries and try candidate indexes'),
+    ('trace', 'trace_report', 'Summarize or compare --trace files'),
+]
+
+
+def run_script(args, rest):
+    module = importlib.import_module(args.module)
+    module.main(rest, prog=f'{PROG} {args.command}')
+
+
+def run_feeds(args, rest):
+    import sync_recommended_feeds as feeds
+
+    profiling.start(args, f'{PROG} feeds {args.action}')
+    if args.action == 'check':
+        sys.exit(0 if feeds.check_all_feeds() else 1)
+    if args.action == 'test':
+        sys.exit(0 if feeds.test_single_feed(args.url) else 1)
+    feeds.run_sync()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog=PROG, description="FeedOwn Admin CLI")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    # add_help=False so --help reaches the script's own parser
+    for command, module, help_text in COMMANDS:
+        p = sub.add_parser(command, help=help_text, add_help=False)
+        p.set_defaults(func=run_script, module=module)
+
+    p_feeds = sub.add_parser("feeds", help="Validate or sync the recommended feeds list")
+    actions = p_feeds.add_subparsers(dest="action", required=True, metavar="action")
+    p_check = actions.add_parser("check", help="Validate every feed in RECOMMENDED_FEEDS")
+    p_test = actions.add_parser("test", help="Validate a single feed URL")
+    p_test.add_argument("url")
+    p_sync = actions.add_parser("sync", help="Upsert the list to the database (needs SUPABASE_* credentials)")
+    for p in (p_check, p_test, p_sync):
+        profiling.add_arguments(p)
+    p_feeds.set_defaults(func=run_feeds)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.func is not run_script:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.func(args, rest)
+
+
+if __name__ == '__main__':
+    main()
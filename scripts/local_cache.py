@@ -0,0 +1,52 @@
+"""
+Local JSON cache shared by the admin scripts.
+
+Entries are stored in scripts/.cache/ (override with FEEDOWN_CACHE_DIR)
+together with the time they were written, so each caller decides how
+stale a value may be.
+"""
+
+import os
+import re
+import json
+import time
+import tempfile
+
+CACHE_DIR = os.getenv('FEEDOWN_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.cache'
+)
+
+
+def cache_path(name):
+    """Path of the cache file for an entry name."""
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+    return os.path.join(CACHE_DIR, f'{safe_name}.json')
+
+
+def load(name, ttl=None):
+    """Return cached data, or None if missing, unreadable or older than ttl seconds."""
+    try:
+        with open(cache_path(name), encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if ttl is not None and time.time() - entry.get('saved_at', 0) > ttl:
+        return None
+    return entry.get('data')
+
+
+def save(name, data):
+    """Write data for name (atomically, so a crashed run never leaves half a file)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'saved_at': time.time(), 'data': data}, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, cache_path(name))
+
+
+def invalidate(name):
+    """Remove a cache entry if it exists."""
+    try:
+        os.remove(cache_path(name))
+    except FileNotFoundError:
+        pass
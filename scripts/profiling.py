@@ -0,0 +1,407 @@
+"""
+Profiling hooks shared by the admin scripts.
+
+Every script accepts:
+  --profile         run under cProfile, write the stats to <script>.prof
+                    (for `python -m pstats` or snakeviz) and print the
+                    hottest functions and the phase summary
+  --profile-out PATH
+                    write the cProfile stats to PATH instead (implies
+                    --profile)
+  --timings         print the phase summary only, without cProfile overhead
+  --trace PATH      write every phase and outbound HTTP call as a span to
+                    PATH (JSONL, appended; see trace_report.py)
+
+Phases are named spans around the work a script does: network calls,
+pagination, parsing and printing. Decorate a function with @timed, or wrap
+a block in `with phase('name'):`. Each phase records its wall time, calls
+and the response bytes received through api_client (or passed to
+add_bytes()) while it is open, including by work it hands to a thread pool
+through propagate(). Nested phases are included in their parents. Recording
+costs two perf_counter() calls per phase, so the hooks stay in place
+whether or not a summary is printed.
+
+cProfile only sees the thread that started it. Work fanned out to a
+ThreadPoolExecutor shows up in the phase summary, not in the function list.
+
+Traces follow the OpenTelemetry data model. Each line of the file is an
+OTLP/JSON ExportTraceServiceRequest (the OpenTelemetry Collector file
+exporter's format), so it can be replayed into any OTLP backend. Phases are
+INTERNAL spans, and HTTP calls are CLIENT spans under the phase that made
+them. A call has the method, URL template, status, response bytes, retries
+(http.request.resend_count), time waiting for the rate limiter and one
+event per attempt. The phase stack is per thread: submit work to a thread
+pool as `pool.submit(propagate(fn), ...)` so its phases and calls become
+children of the phase that submitted it.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import pstats
+import threading
+from functools import wraps
+from urllib.parse import urlsplit
+
+from report_utils import format_bytes
+
+TOP_FUNCTIONS = 15
+TRACE_FLUSH_SPANS = 100   # watch mode runs for days; don't hold every span until exit
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_phases = {}
+_lock = threading.Lock()
+_local = threading.local()
+_started = None
+_tracer = None
+
+
+class PhaseStats:
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class phase:
+    """Time a block: `with phase('get_auth_stats'):`. Re-entrant and thread-safe."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        # [name, start, bytes, span] - kept on the thread's stack, not on self
+        span = start_span(self.name, SPAN_KIND_INTERNAL, current_span_id())
+        _stack().append([self.name, time.perf_counter(), 0, span])
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        entry = _stack().pop()
+        name, start, _, span = entry
+        elapsed = time.perf_counter() - start
+        with _lock:
+            received = entry[2]
+            stats = _phases.setdefault(name, PhaseStats())
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.bytes += received
+        if span is not None:
+            span.set('feedown.bytes', received)
+            span.end(error=exc)
+        return False
+
+
+def timed(func):
+    """Decorator: record every call of `func` as a phase named after it."""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with phase(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def propagate(func):
+    """
+    Wrap `func` to run under the phases open on the calling thread.
+
+    For work handed to another thread (ThreadPoolExecutor.submit): its
+    phases and HTTP calls get the submitting phase as their parent span,
+    and the bytes it receives count towards the submitting phases too.
+    """
+    parents = list(getattr(_local, 'stack', ()))
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        saved = getattr(_local, 'stack', None)
+        _local.stack = list(parents)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.stack = saved
+    return wrapper
+
+
+def add_bytes(n):
+    """Count n received bytes towards every phase open on this thread (or propagated to it)."""
+    stack = getattr(_local, 'stack', ())
+    if not stack:
+        return
+    # Propagated entries are shared with the submitting thread and its other workers
+    with _lock:
+        for entry in stack:
+            entry[2] += n
+
+
+# ── Tracing ────────────────────────────────────────────────────────
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}   # int64 is a string in OTLP/JSON
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_attributes(attributes):
+    return [{'key': k, 'value': otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+class Span:
+    """One span; finished spans go to the tracer. Only the thread that started it touches it."""
+
+    def __init__(self, name, kind, parent_id):
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = {}
+        self.events = []
+        self.status = STATUS_UNSET
+        self.message = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        self.events.append((time.time_ns(), name, attributes))
+
+    def end(self, error=None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = STATUS_ERROR
+            self.message = f'{type(error).__name__}: {error}'
+            self.set('error.type', type(error).__name__)
+        _tracer.record(self)
+
+    def to_otlp(self, trace_id):
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': otlp_attributes(self.attributes),
+            'events': [{'timeUnixNano': str(ts), 'name': name, 'attributes': otlp_attributes(attrs)}
+                       for ts, name, attrs in self.events],
+            'status': {'code': self.status, **({'message': self.message} if self.message else {})},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Tracer:
+    """Collects finished spans of one run (one trace) and appends them to a JSONL file."""
+
+    def __init__(self, path, service):
+        self.path = path
+        self.trace_id = os.urandom(16).hex()
+        self.resource = otlp_attributes({
+            'service.name': service,
+            'process.pid': os.getpid(),
+            'process.command_line': ' '.join(sys.argv),
+        })
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def record(self, span):
+        with self.lock:
+            self.pending.append(span)
+            if len(self.pending) >= TRACE_FLUSH_SPANS:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        line = {'resourceSpans': [{
+            'resource': {'attributes': self.resource},
+            'scopeSpans': [{
+                'scope': {'name': 'feedown.scripts'},
+                'spans': [s.to_otlp(self.trace_id) for s in self.pending],
+            }],
+        }]}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(line, separators=(',', ':')) + '\n')
+        self.pending = []
+
+
+def tracing():
+    return _tracer is not None
+
+
+def current_span_id():
+    """Span id of the innermost traced phase on this thread (or propagated to it), if any."""
+    for entry in reversed(getattr(_local, 'stack', ())):
+        if entry[3] is not None:
+            return entry[3].span_id
+    return None
+
+
+def start_span(name, kind=SPAN_KIND_INTERNAL, parent_id=None):
+    """A new Span, or None when --trace is off (callers check before setting attributes)."""
+    if _tracer is None:
+        return None
+    return Span(name, kind, parent_id)
+
+
+class client_span:
+    """
+    Trace an HTTP call that doesn't go through api_client (e.g. requests):
+
+        with client_span('GET', url) as span:
+            response = requests.get(url)
+            span.response(response.status_code, len(response.content))
+    """
+
+    def __init__(self, method, url, template=None):
+        self.method = method
+        self.url = url
+        self.template = template
+        self.span = None
+
+    def __enter__(self):
+        self.span = start_span(f'{self.method} {self.template or url_path(self.url)}',
+                               SPAN_KIND_CLIENT, current_span_id())
+        if self.span is not None:
+            set_http_attributes(self.span, self.method, self.url, self.template)
+        return self
+
+    def response(self, status, size):
+        if self.span is not None:
+            self.span.set('http.response.status_code', status)
+            self.span.set('http.response.body.size', size)
+            if status >= 400:
+                self.span.status = STATUS_ERROR
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.end(error=exc)
+        return False
+
+
+def url_path(url):
+    return urlsplit(str(url)).path or '/'
+
+
+def set_http_attributes(span, method, url, template=None):
+    """Semantic-convention attributes for an outgoing request; the query string is left out."""
+    parts = urlsplit(str(url))
+    span.set('http.request.method', method)
+    span.set('server.address', parts.hostname)
+    span.set('server.port', parts.port)
+    span.set('url.full', f'{parts.scheme}://{parts.netloc}{parts.path}')
+    span.set('url.template', template or parts.path)
+
+
+def summary():
+    """{phase: {calls, total_s, mean_ms, max_ms, bytes}}, slowest first."""
+    with _lock:
+        items = sorted(_phases.items(), key=lambda kv: kv[1].total, reverse=True)
+        return {name: {
+            'calls': s.calls,
+            'total_s': s.total,
+            'mean_ms': s.total / s.calls * 1000 if s.calls else 0.0,
+            'max_ms': s.max * 1000,
+            'bytes': s.bytes,
+        } for name, s in items}
+
+
+def print_summary():
+    phases = summary()
+    print()
+    print("-" * 70)
+    elapsed = f" - run {time.perf_counter() - _started:.2f}s" if _started is not None else ""
+    print(f"  Phases (wall time, nested phases included){elapsed}")
+    print("-" * 70)
+    if not phases:
+        print("  No phases recorded.")
+        return
+    print(f"  {'Phase':<34} {'Calls':>6} {'Total s':>8} {'Mean ms':>8} {'Max ms':>8} {'Bytes':>9}")
+    print(f"  {'─'*34} {'─'*6} {'─'*8} {'─'*8} {'─'*8} {'─'*9}")
+    for name, s in phases.items():
+        label = name if len(name) <= 34 else name[:31] + '...'
+        print(f"  {label:<34} {s['calls']:>6} {s['total_s']:>8.2f} {s['mean_ms']:>8.1f} "
+              f"{s['max_ms']:>8.1f} {format_bytes(s['bytes'] or None):>9}")
+
+
+def print_top_functions(profiler, path, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:limit]
+    print()
+    print("-" * 70)
+    print(f"  cProfile - top {limit} by cumulative time (main thread)")
+    print("-" * 70)
+    print(f"  {'Calls':>8} {'Own s':>7} {'Cum s':>7}  Function")
+    print(f"  {'─'*8} {'─'*7} {'─'*7}  {'─'*40}")
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in rows:
+        where = f"{os.path.basename(filename)}:{line}" if line else filename
+        print(f"  {ncalls:>8} {tottime:>7.3f} {cumtime:>7.3f}  {func} ({where})")
+    print()
+    print(f"  Written to {path}  (python -m pstats {path})")
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true",
+                       help="Run under cProfile, write pstats to <script>.prof and print the phase summary")
+    group.add_argument("--profile-out", metavar="PATH",
+                       help="Write the cProfile stats to PATH instead (implies --profile)")
+    group.add_argument("--timings", action="store_true",
+                       help="Print time, calls and bytes per phase at the end")
+    group.add_argument("--trace", metavar="PATH",
+                       help="Append phases and HTTP calls as OpenTelemetry spans to PATH (JSONL)")
+
+
+def start(args, prog=None):
+    """Begin profiling / tracing as requested by the flags; results print at exit."""
+    global _started, _tracer
+    name = (prog or os.path.splitext(os.path.basename(sys.argv[0]))[0]).replace(' ', '-')
+    if args.trace:
+        _tracer = Tracer(args.trace, name)
+        atexit.register(_tracer.flush)
+    profile = args.profile or args.profile_out
+    if not (profile or args.timings):
+        return
+    _started = time.perf_counter()
+    profiler = path = None
+    if profile:
+        path = args.profile_out or f'{name}.prof'
+        profiler = cProfile.Profile()
+        profiler.enable()
+    atexit.register(_finish, profiler, path)
+
+
+def _finish(profiler, path):
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print_top_functions(profiler, path)
+    print_summary()
+    print()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Expired Article Backlog Analyzer / Purge Tool
+
+/api/refresh only deletes expired articles for the user who is refreshing,
+so inactive users' articles stay in the table past their 7-day TTL. This
+script shows the backlog across all users and purges it in small,
+rate-limited chunks.
+
+Usage:
+  python scripts/purge_expired_articles.py                 # Analyze only
+  python scripts/purge_expired_articles.py --purge         # Purge all expired articles
+  python scripts/purge_expired_articles.py --purge --chunk-size 100 --pause 1
+  python scripts/purge_expired_articles.py --purge --max-chunks 50   # Bounded run
+  python scripts/purge_expired_articles.py --purge --restart         # Ignore saved progress
+  python scripts/purge_expired_articles.py --timings                 # Time per phase
+
+Purge progress is checkpointed after every chunk. An interrupted or bounded
+run resumes from the checkpoint (same cutoff time, running totals) the next
+time --purge is given.
+
+Optional: Install scripts/sql/expired_articles.sql for a server-side
+  histogram (otherwise the articles table is scanned page by page), and
+  scripts/sql/table_sizes.sql for measured bytes per article.
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+import local_cache
+import profiling
+from report_utils import format_bytes
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+# Load environment variables
+env_path = os.path.join(os.path.dirname(__file__), '..', '.env.shared')
+load_dotenv(env_path)
+
+if not os.getenv('SUPABASE_URL'):
+    env_path_parent = os.path.join(os.path.dirname(__file__), '..', '.env')
+    load_dotenv(env_path_parent)
+
+SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+PROJECT_REF = (urlsplit(SUPABASE_URL or '').hostname or '').split('.')[0]
+
+
+def get_supabase():
+    """The shared Supabase client (service role); api_client is imported on first use."""
+    import api_client
+
+    return api_client.supabase_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+
+HISTOGRAM_RPC = 'feedown_expiry_histogram'
+TABLE_SIZES_RPC = 'feedown_table_sizes'
+
+# Fallback bytes per row (incl. ~30% index overhead) when sizes can't be measured
+EST_ARTICLE_BYTES = 800 * 1.3
+EST_READ_ROW_BYTES = 100 * 1.3
+
+SCAN_PAGE_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 200   # ids per DELETE ... IN (...), same bound as refresh.ts
+DEFAULT_PAUSE = 0.5        # seconds between chunks
+TOP_USERS = 10
+
+
+@profiling.timed
+def get_expiry_histogram():
+    """
+    Article counts by (expiry day, user).
+
+    Returns (rows, source) where rows are dicts with 'day' (YYYY-MM-DD),
+    'user_id', 'articles' and 'read_rows' (None when unknown). The RPC has
+    a row per day and user, so it is paged past db-max-rows.
+    """
+    import api_client
+
+    try:
+        rows = api_client.rpc_rows(get_supabase(), HISTOGRAM_RPC, page_size=SCAN_PAGE_SIZE)
+        return [{**row, 'day': str(row['day'])[:10]} for row in rows], 'rpc'
+    except Exception:
+        pass
+
+    # Fallback: keyset-paginated scan of (id, user_id, expires_at)
+    groups = {}
+    last_id = None
+    while True:
+        query = get_supabase().table('articles').select('id, user_id, expires_at').order('id').limit(SCAN_PAGE_SIZE)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        page = query.execute().data or []
+        for a in page:
+            key = (a['expires_at'][:10], a['user_id'])
+            groups[key] = groups.get(key, 0) + 1
+        if len(page) < SCAN_PAGE_SIZE:
+            break
+        last_id = page[-1]['id']
+
+    rows = [
+        {'day': day, 'user_id': uid, 'articles': count, 'read_rows': None}
+        for (day, uid), count in sorted(groups.items())
+    ]
+    return rows, 'scan'
+
+
+@profiling.timed
+def get_row_bytes():
+    """Measured (bytes per article, bytes per read_articles row), or estimates."""
+    try:
+        result = get_supabase().rpc(TABLE_SIZES_RPC).execute()
+        sizes = {row['table_name']: row for row in (result.data or [])}
+    except Exception:
+        sizes = {}
+
+    def per_row(table, fallback):
+        row = sizes.get(table)
+        if row and row.get('live_tuples'):
+            return row['total_bytes'] / row['live_tuples'], True
+        return fallback, False
+
+    article_bytes, measured = per_row('articles', EST_ARTICLE_BYTES)
+    read_bytes, _ = per_row('read_articles', EST_READ_ROW_BYTES)
+    return article_bytes, read_bytes, measured
+
+
+@profiling.timed
+def analyze():
+    """Print the expiry histogram, per-user backlog and reclaimable bytes."""
+    now = datetime.now(timezone.utc)
+    today = now.strftime('%Y-%m-%d')
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Expired Article Backlog")
+    print("=" * 70)
+    print(f"  Project: {PROJECT_REF}")
+    print(f"  Date:    {now.strftime('%Y-%m-%d %H:%M')} UTC")
+    print()
+
+    start = time.perf_counter()
+    rows, source = get_expiry_histogram()
+    elapsed = time.perf_counter() - start
+    article_bytes, read_bytes, measured = get_row_bytes()
+
+    by_day = {}
+    by_user = {}
+    for row in rows:
+        d = by_day.setdefault(row['day'], {'articles': 0, 'read_rows': 0})
+        d['articles'] += row['articles']
+        d['read_rows'] += row['read_rows'] or 0
+        # expires_at on today's date may or may not have passed yet; count it
+        # as expired only for earlier days to keep the estimate conservative
+        if row['day'] < today:
+            u = by_user.setdefault(row['user_id'], {'articles': 0, 'read_rows': 0})
+            u['articles'] += row['articles']
+            u['read_rows'] += row['read_rows'] or 0
+
+    # ── 1. Expiry histogram ────────────────────────────────────────
+    print("-" * 70)
+    print(f"  1. Articles by expiry day (source: {source}, {elapsed:.2f}s)")
+    print("-" * 70)
+
+    peak = max((d['articles'] for d in by_day.values()), default=0)
+    print(f"  {'Day':<12} {'Articles':>10} {'Read rows':>10}  ")
+    print(f"  {'─'*12} {'─'*10} {'─'*10}  {'─'*30}")
+    for day in sorted(by_day):
+        d = by_day[day]
+        bar = '#' * int(30 * d['articles'] / peak) if peak else ''
+        marker = ' expired' if day < today else ''
+        read_str = f"{d['read_rows']:,}" if source == 'rpc' else '-'
+        print(f"  {day:<12} {d['articles']:>10,} {read_str:>10}  {bar}{marker}")
+    print()
+
+    # ── 2. Backlog per user ────────────────────────────────────────
+    expired_articles = sum(u['articles'] for u in by_user.values())
+    expired_reads = sum(u['read_rows'] for u in by_user.values())
+
+    print("-" * 70)
+    print(f"  2. Expired backlog by user (top {TOP_USERS})")
+    print("-" * 70)
+    if by_user:
+        print(f"  {'User':<38} {'Articles':>10} {'Est. Bytes':>12}")
+        print(f"  {'─'*38} {'─'*10} {'─'*12}")
+        top = sorted(by_user.items(), key=lambda x: -x[1]['articles'])[:TOP_USERS]
+        for uid, u in top:
+            user_bytes = u['articles'] * article_bytes + u['read_rows'] * read_bytes
+            print(f"  {uid:<38} {u['articles']:>10,} {format_bytes(user_bytes):>12}")
+        if len(by_user) > TOP_USERS:
+            print(f"  ... and {len(by_user) - TOP_USERS} more users")
+    else:
+        print("  No expired articles.")
+    print()
+
+    # ── 3. Reclaimable space ───────────────────────────────────────
+    reclaim_bytes = expired_articles * article_bytes + expired_reads * read_bytes
+    print("-" * 70)
+    print("  3. Reclaimable space")
+    print("-" * 70)
+    print(f"  Expired articles:       {expired_articles:,} (across {len(by_user)} users)")
+    if source == 'rpc':
+        print(f"  Read marks removed:     {expired_reads:,}")
+    print(f"  Bytes per article:      {article_bytes:.0f} ({'measured' if measured else 'estimated'})")
+    print(f"  Reclaimable (est):      {format_bytes(reclaim_bytes)}")
+    print()
+    print("  Note: Postgres reuses freed space after (auto)vacuum; the database")
+    print("  size reported by Supabase shrinks only after VACUUM FULL.")
+    if expired_articles:
+        print()
+        print("  Run with --purge to delete them in chunks.")
+    print()
+    print("=" * 70)
+
+
+@profiling.timed
+def purge_chunk(cutoff, chunk_size):
+    """
+    Delete one chunk of expired articles and their read marks.
+
+    Returns (articles_deleted, read_rows_deleted). 0 articles means done.
+    """
+    from postgrest.types import ReturnMethod
+
+    page = get_supabase().table('articles') \
+        .select('id, user_id') \
+        .lt('expires_at', cutoff) \
+        .order('expires_at') \
+        .limit(chunk_size) \
+        .execute().data or []
+    if not page:
+        return 0, 0
+
+    ids_by_user = {}
+    for a in page:
+        ids_by_user.setdefault(a['user_id'], []).append(a['id'])
+
+    get_supabase().table('articles') \
+        .delete(returning=ReturnMethod.minimal) \
+        .in_('id', [a['id'] for a in page]) \
+        .execute()
+
+    # read_articles.article_id has no FK, so remove the read marks explicitly
+    read_deleted = 0
+    for uid, ids in ids_by_user.items():
+        result = get_supabase().table('read_articles') \
+            .delete(count='exact', returning=ReturnMethod.minimal) \
+            .eq('user_id', uid) \
+            .in_('article_id', ids) \
+            .execute()
+        read_deleted += result.count or 0
+
+    return len(page), read_deleted
+
+
+@profiling.timed
+def count_expired(cutoff):
+    """Number of articles that expired before cutoff."""
+    result = get_supabase().table('articles').select('*', count='exact').lt('expires_at', cutoff).limit(0).execute()
+    return result.count or 0
+
+
+@profiling.timed
+def purge(chunk_size, pause, max_chunks, restart):
+    """Purge expired articles in bounded chunks with a resumable checkpoint."""
+    checkpoint_name = f'purge_expired_{PROJECT_REF}'
+    checkpoint = None if restart else local_cache.load(checkpoint_name)
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Expired Article Purge")
+    print("=" * 70)
+
+    if checkpoint:
+        print(f"  Resuming purge started {checkpoint['started_at']}")
+        print(f"  ({checkpoint['articles']:,} articles already deleted)")
+    else:
+        checkpoint = {
+            'cutoff': datetime.now(timezone.utc).isoformat(),
+            'started_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+            'articles': 0,
+            'read_rows': 0,
+            'chunks': 0,
+        }
+    cutoff = checkpoint['cutoff']
+    print(f"  Cutoff:     expires_at < {cutoff}")
+
+    remaining = count_expired(cutoff)
+    print(f"  Remaining:  {remaining:,} articles")
+    print(f"  Chunk size: {chunk_size}, pause {pause}s" + (f", max {max_chunks} chunks" if max_chunks else ''))
+    print()
+
+    run_start = time.perf_counter()
+    run_articles = 0
+    run_chunks = 0
+    done = False
+    try:
+        while not max_chunks or run_chunks < max_chunks:
+            articles, read_rows = purge_chunk(cutoff, chunk_size)
+            if articles == 0:
+                done = True
+                break
+
+            run_articles += articles
+            run_chunks += 1
+            checkpoint['articles'] += articles
+            checkpoint['read_rows'] += read_rows
+            checkpoint['chunks'] += 1
+            local_cache.save(checkpoint_name, checkpoint)
+
+            elapsed = time.perf_counter() - run_start
+            rate = run_articles / elapsed if elapsed else 0
+            left = max(remaining - run_articles, 0)
+            pct = (run_articles / remaining * 100) if remaining else 100
+            eta = f"{left / rate:.0f}s" if rate else '-'
+            print(f"  [chunk {checkpoint['chunks']:>5}] {run_articles:>9,} / {remaining:,} ({pct:5.1f}%)"
+                  f"  read marks {checkpoint['read_rows']:,}  {rate:,.0f} rows/s  ETA {eta}")
+
+            if articles < chunk_size:
+                done = True
+                break
+            time.sleep(pause)
+    except KeyboardInterrupt:
+        print()
+        print("  Interrupted. Progress is saved; run --purge again to resume.")
+
+    print()
+    if done:
+        local_cache.invalidate(checkpoint_name)
+        print(f"  Done: deleted {checkpoint['articles']:,} articles and "
+              f"{checkpoint['read_rows']:,} read marks in {checkpoint['chunks']} chunks.")
+    else:
+        print(f"  Stopped after {run_chunks} chunks; run --purge again to resume.")
+    print()
+    print("=" * 70)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Expired Article Backlog Analyzer / Purge Tool")
+    parser.add_argument("--purge", action="store_true", help="Delete expired articles (default: analyze only)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Articles per DELETE (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE,
+                        help=f"Seconds to wait between chunks (default: {DEFAULT_PAUSE})")
+    parser.add_argument("--max-chunks", type=int, default=0, help="Stop after N chunks (resume later)")
+    parser.add_argument("--restart", action="store_true", help="Discard saved purge progress")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+
+    if args.purge:
+        purge(args.chunk_size, args.pause, args.max_chunks, args.restart)
+    else:
+        analyze()
+
+
+if __name__ == '__main__':
+    main()
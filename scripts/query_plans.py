@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Query Plans and Index Advisor
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for the queries the Pages Functions issue
+on every refresh, article list and batch-read, flags sequential scans,
+filters that throw most of the rows away and sorts that no index
+provides, then builds each candidate index for the flagged queries, runs
+them again and reports the measured difference.
+
+Usage:
+  python scripts/query_plans.py                          # All queries, with index trials
+  python scripts/query_plans.py --only refresh           # Queries whose name contains 'refresh'
+  python scripts/query_plans.py --plans                  # Also print the plan trees
+  python scripts/query_plans.py --no-trials              # Plans only
+  python scripts/query_plans.py --user <uuid> --runs 5
+
+Requires scripts/sql/query_plans.sql (the feedown_explain RPC). Run it
+against a local Postgres seeded with scripts/sql/seed_scale.sql, not the
+production project: the queries really execute (DELETEs are rolled back)
+and each trial index is built with a plain CREATE INDEX, which blocks
+writes to the table while it builds.
+
+The SQL mirrors the WHERE / ORDER BY / LIMIT that PostgREST generates for
+each supabase-js call; the JSON wrapping PostgREST adds around it does not
+change the plan of the inner query. It runs as the function owner, so RLS
+is bypassed; the user_id filter every policy adds is written out instead.
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+import profiling
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+# Load environment variables
+env_path = os.path.join(os.path.dirname(__file__), '..', '.env.shared')
+load_dotenv(env_path)
+
+if not os.getenv('SUPABASE_URL'):
+    env_path_parent = os.path.join(os.path.dirname(__file__), '..', '.env')
+    load_dotenv(env_path_parent)
+
+SUPABASE_URL = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
+SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+
+def get_supabase():
+    """The shared Supabase client (service role); api_client is imported on first use."""
+    import api_client
+
+    return api_client.supabase_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+
+
+EXPLAIN_RPC = 'feedown_explain'
+
+DEFAULT_RUNS = 3          # the median run is reported; the first one warms the cache
+DEFAULT_MIN_ROWS = 1000   # scans / sorts / filters below this many rows are not flagged
+DEFAULT_MIN_GAIN = 0.2    # a candidate must cut execution time by 20% to be suggested
+DEFAULT_IN_SIZE = 250     # ids in the IN (...) lists (batch-read / refresh read-mark cleanup)
+FILTER_WASTE = 0.9        # share of rows read that a filter may throw away before it is flagged
+
+ARTICLE_COLUMNS = ('id, feed_id, feed_title, title, url, description, published_at, fetched_at, '
+                   'expires_at, author, image_url')
+
+# Candidate indexes: (name, table, columns)
+FEEDS_BY_FETCHED = ('idx_feeds_last_fetched_at', 'feeds', 'user_id, last_fetched_at NULLS FIRST')
+ARTICLES_BY_EXPIRY = ('idx_articles_user_expires_at', 'articles', 'user_id, expires_at')
+ARTICLES_BY_PUBLISHED = ('idx_articles_published_nulls_last', 'articles',
+                         'user_id, published_at DESC NULLS LAST')
+ARTICLES_BY_FEED = ('idx_articles_feed_published', 'articles', 'feed_id, published_at DESC NULLS LAST')
+
+# (name, source, SQL with {uid} {feed} {now} {ids} placeholders, candidate indexes)
+CATALOG = [
+    ('feeds.list', 'api/feeds/index.ts',
+     'SELECT * FROM feeds WHERE user_id = {uid} ORDER BY "order" ASC LIMIT 100', []),
+    ('refresh.feeds', 'api/refresh.ts',
+     'SELECT * FROM feeds WHERE user_id = {uid} ORDER BY last_fetched_at ASC NULLS FIRST LIMIT 100',
+     [FEEDS_BY_FETCHED]),
+    ('refresh.existing_ids', 'api/refresh.ts',
+     'SELECT id FROM articles WHERE user_id = {uid} LIMIT 1000 OFFSET 0', []),
+    ('refresh.expired_ids', 'api/refresh.ts',
+     'SELECT id FROM articles WHERE user_id = {uid} AND expires_at < {now} LIMIT 1000 OFFSET 0',
+     [ARTICLES_BY_EXPIRY]),
+    ('refresh.delete_expired', 'api/refresh.ts',
+     'DELETE FROM articles WHERE user_id = {uid} AND expires_at < {now}', [ARTICLES_BY_EXPIRY]),
+    ('refresh.delete_read', 'api/refresh.ts',
+     'DELETE FROM read_articles WHERE user_id = {uid} AND article_id IN ({ids})', []),
+    ('articles.list', 'api/articles/index.ts',
+     f'SELECT {ARTICLE_COLUMNS} FROM articles WHERE user_id = {{uid}} AND expires_at > {{now}} '
+     'ORDER BY published_at DESC NULLS LAST LIMIT 1000 OFFSET 0', [ARTICLES_BY_PUBLISHED]),
+    ('articles.list_feed', 'api/articles/index.ts',
+     f'SELECT {ARTICLE_COLUMNS} FROM articles WHERE user_id = {{uid}} AND expires_at > {{now}} '
+     'AND feed_id = {feed} ORDER BY published_at DESC NULLS LAST LIMIT 1000 OFFSET 0',
+     [ARTICLES_BY_FEED, ARTICLES_BY_PUBLISHED]),
+    ('articles.read_ids', 'api/articles/index.ts',
+     'SELECT article_id FROM read_articles WHERE user_id = {uid} LIMIT 1000 OFFSET 0', []),
+    ('batch_read.existing', 'api/articles/batch-read.ts',
+     'SELECT article_id FROM read_articles WHERE user_id = {uid} AND article_id IN ({ids})', []),
+    ('recommended.list', 'api/recommended-feeds.ts',
+     'SELECT id, name, url, sort_order FROM recommended_feeds WHERE is_active = true ORDER BY sort_order ASC', []),
+    ('cron.delete_expired', 'pg_cron (docs/SUPABASE_SETUP.md)',
+     'DELETE FROM articles WHERE expires_at < {now}', []),
+]
+
+
+class NotInstalled(Exception):
+    pass
+
+
+def sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def index_ddl(candidate, concurrently=False):
+    name, table, columns = candidate
+    return f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} ON {table} ({columns})"
+
+
+# ── Parameters ─────────────────────────────────────────────────────
+
+@profiling.timed
+def pick_parameters(user, in_size):
+    """Values for the placeholders: a user with articles, one of their feeds and article ids."""
+    supabase = get_supabase()
+    if not user:
+        newest = supabase.table('articles').select('user_id').order('published_at', desc=True) \
+            .limit(1).execute().data
+        if not newest:
+            print("Error: the articles table is empty; seed it first (scripts/sql/seed_scale.sql)")
+            sys.exit(1)
+        user = newest[0]['user_id']
+    articles = supabase.table('articles').select('id, feed_id').eq('user_id', user) \
+        .limit(in_size).execute().data or []
+    if not articles:
+        print(f"Error: user {user} has no articles")
+        sys.exit(1)
+    return {
+        'uid': sql_literal(user),
+        'feed': sql_literal(articles[0]['feed_id']),
+        'now': sql_literal(datetime.now(timezone.utc).isoformat()),
+        'ids': ', '.join(sql_literal(a['id']) for a in articles),
+    }, user, len(articles)
+
+
+# ── Plans ──────────────────────────────────────────────────────────
+
+@profiling.timed
+def explain(sql, setup=None, runs=DEFAULT_RUNS):
+    """The median of `runs` EXPLAIN ANALYZE plans (by execution time)."""
+    try:
+        plans = get_supabase().rpc(EXPLAIN_RPC, {'query': sql, 'setup': setup, 'runs': runs}).execute().data
+    except Exception as e:
+        if 'PGRST202' in str(e) or 'Could not find the function' in str(e):
+            raise NotInstalled() from e
+        raise
+    plans = sorted(plans or [], key=lambda p: p.get('Execution Time', 0))
+    return plans[len(plans) // 2] if plans else None
+
+
+def walk(node, depth=0):
+    yield depth, node
+    for child in node.get('Plans', []):
+        yield from walk(child, depth + 1)
+
+
+def node_rows(node):
+    return node.get('Actual Rows', 0) * (node.get('Actual Loops') or 1)
+
+
+def find_issues(plan, min_rows):
+    """Human-readable problems in a plan: big seq scans, wasteful filters, sorts no index provides."""
+    issues = []
+    for _, node in walk(plan['Plan']):
+        kind = node['Node Type']
+        relation = node.get('Relation Name', '')
+        kept = node_rows(node)
+        removed = node.get('Rows Removed by Filter', 0) * (node.get('Actual Loops') or 1)
+        if kind == 'Seq Scan' and kept + removed >= min_rows:
+            issues.append(f"Seq Scan on {relation}: read {kept + removed:,} rows, kept {kept:,}")
+        elif 'Scan' in kind and removed >= min_rows and removed >= FILTER_WASTE * (kept + removed):
+            via = f" via {node['Index Name']}" if node.get('Index Name') else ''
+            issues.append(f"{kind} on {relation}{via}: filter dropped {removed:,} of {kept + removed:,} rows")
+        elif kind in ('Sort', 'Incremental Sort'):
+            sorted_rows = sum(node_rows(child) for child in node.get('Plans', []))
+            if node.get('Sort Space Type') == 'Disk':
+                issues.append(f"Sort of {sorted_rows:,} rows spilled to disk ({node.get('Sort Method')})")
+            elif sorted_rows >= min_rows:
+                keys = ', '.join(node.get('Sort Key', []))
+                issues.append(f"Sort of {sorted_rows:,} rows{' by ' + keys if keys else ''} "
+                              "(no index provides the order)")
+    return issues
+
+
+def plan_metrics(plan):
+    top = plan['Plan']
+    hit, read = top.get('Shared Hit Blocks'), top.get('Shared Read Blocks')
+    return {
+        'ms': plan.get('Execution Time', 0.0),
+        'rows': node_rows(top),
+        'buffers': None if hit is None else hit + (read or 0),
+        'indexes': {n['Index Name'] for _, n in walk(top) if n.get('Index Name')},
+    }
+
+
+def format_buffers(blocks):
+    if blocks is None:
+        return '-'
+    size = blocks * 8 * 1024
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.1f} GB"
+    if size >= 1024 ** 2:
+        return f"{size / 1024 ** 2:.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def print_plan(plan):
+    for depth, node in walk(plan['Plan']):
+        target = node.get('Relation Name', '')
+        if node.get('Index Name'):
+            target += f" using {node['Index Name']}"
+        time_ms = node.get('Actual Total Time')
+        timing = f"  {time_ms:.1f}ms" if time_ms is not None else ''
+        print(f"      {'  ' * depth}{node['Node Type']}{' on ' + target if target else ''}"
+              f"  rows={node_rows(node):,}{timing}")
+        for key in ('Index Cond', 'Filter', 'Sort Key'):
+            if node.get(key):
+                value = ', '.join(node[key]) if isinstance(node[key], list) else node[key]
+                print(f"      {'  ' * depth}  {key}: {value[:90]}")
+
+
+# ── Report ─────────────────────────────────────────────────────────
+
+@profiling.timed
+def run(args):
+    params, user, id_count = pick_parameters(args.user, args.in_size)
+    explain('SELECT 1', runs=1)   # fails fast with NotInstalled
+    queries = [q for q in CATALOG if not args.only or any(o in q[0] for o in args.only)]
+    if not queries:
+        print(f"Error: no query matches {', '.join(args.only)} (known: {', '.join(q[0] for q in CATALOG)})")
+        sys.exit(1)
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Query Plans")
+    print("=" * 70)
+    print(f"  Database: {SUPABASE_URL}")
+    print(f"  User:     {user} ({id_count} ids in IN lists)")
+    print(f"  Runs:     {args.runs} per query (median shown), flag at >= {args.min_rows:,} rows")
+    print()
+
+    # ── 1. Baseline ────────────────────────────────────────────────
+    print("-" * 70)
+    print("  1. Current plans")
+    print("-" * 70)
+    print(f"  {'Query':<24} {'Exec ms':>9} {'Rows':>8} {'Buffers':>9}  Index used")
+    print(f"  {'─'*24} {'─'*9} {'─'*8} {'─'*9}  {'─'*22}")
+    baseline = {}
+    for name, source, template, candidates in queries:
+        sql = template.format(**params)
+        plan = explain(sql, runs=args.runs)
+        metrics = plan_metrics(plan)
+        issues = find_issues(plan, args.min_rows)
+        baseline[name] = (sql, plan, metrics, issues)
+        used = ', '.join(sorted(metrics['indexes'])) or '(none)'
+        print(f"  {name:<24} {metrics['ms']:>9.1f} {metrics['rows']:>8,} "
+              f"{format_buffers(metrics['buffers']):>9}  {used}")
+        for issue in issues:
+            print(f"    ! {issue}")
+        if args.plans and (issues or args.plans == 'all'):
+            print_plan(plan)
+    flagged = [q for q in queries if baseline[q[0]][3]]
+    print()
+    print(f"  {len(flagged)} of {len(queries)} queries flagged.")
+    print()
+
+    if args.no_trials:
+        print("=" * 70)
+        return
+
+    # ── 2. Candidate indexes ───────────────────────────────────────
+    print("-" * 70)
+    print("  2. Candidate indexes (built, measured and rolled back)")
+    print("-" * 70)
+    trials = [(q, c) for q in queries for c in q[3] if q in flagged or args.try_all]
+    if not trials:
+        print("  Nothing to try: no flagged query has a candidate index.")
+        print()
+        print("=" * 70)
+        return
+    print(f"  {'Query':<24} {'Index':<34} {'Before':>8} {'After':>8} {'Change':>7}")
+    print(f"  {'─'*24} {'─'*34} {'─'*8} {'─'*8} {'─'*7}")
+    results = {}
+    for (name, _, _, _), candidate in trials:
+        sql, _, before, issues_before = baseline[name]
+        plan = explain(sql, setup=index_ddl(candidate), runs=args.runs)
+        after = plan_metrics(plan)
+        issues_after = find_issues(plan, args.min_rows)
+        gain = 1 - after['ms'] / before['ms'] if before['ms'] else 0.0
+        used = candidate[0] in after['indexes']
+        results.setdefault(candidate, []).append((name, before, after, gain, used))
+        print(f"  {name:<24} {candidate[0]:<34} {before['ms']:>6.1f}ms {after['ms']:>6.1f}ms "
+              f"{-gain * 100:>+6.0f}%")
+        detail = [f"flags {len(issues_before)} -> {len(issues_after)}"]
+        if before['buffers'] is not None:
+            detail.append(f"buffers {format_buffers(before['buffers'])} -> {format_buffers(after['buffers'])}")
+        if not used:
+            detail.append("NOT USED by the planner")
+        print(f"    {', '.join(detail)}")
+    print()
+
+    # ── 3. Suggestions ─────────────────────────────────────────────
+    print("-" * 70)
+    print(f"  3. Suggested indexes (used, and >= {args.min_gain * 100:.0f}% faster on a query)")
+    print("-" * 70)
+    suggested = [(c, rows) for c, rows in results.items()
+                 if any(used and gain >= args.min_gain for _, _, _, gain, used in rows)]
+    if not suggested:
+        print("  None: no candidate made a flagged query measurably faster.")
+    for candidate, rows in suggested:
+        print(f"  {index_ddl(candidate, concurrently=True)};")
+        for name, before, after, gain, used in rows:
+            print(f"    {name:<24} {before['ms']:.1f}ms -> {after['ms']:.1f}ms ({-gain * 100:+.0f}%)"
+                  + ('' if used else ', not used'))
+    if suggested:
+        print()
+        print("  CONCURRENTLY avoids blocking writes on the production tables; add the")
+        print("  index to docs/SUPABASE_SETUP.md as well.")
+    print()
+    print("=" * 70)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Query Plans and Index Advisor")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="Only queries whose name contains NAME (e.g. refresh, articles.list)")
+    parser.add_argument("--user", help="User whose queries are explained (default: owner of the newest article)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"EXPLAIN ANALYZE runs per query, median shown (default: {DEFAULT_RUNS})")
+    parser.add_argument("--in-size", type=int, default=DEFAULT_IN_SIZE,
+                        help=f"Article ids in the IN (...) lists (default: {DEFAULT_IN_SIZE})")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                        help=f"Flag scans, filters and sorts from this many rows (default: {DEFAULT_MIN_ROWS})")
+    parser.add_argument("--min-gain", type=float, default=DEFAULT_MIN_GAIN,
+                        help=f"Speed-up needed to suggest an index (default: {DEFAULT_MIN_GAIN})")
+    parser.add_argument("--plans", nargs="?", const='flagged', choices=['flagged', 'all'],
+                        help="Print the plan tree of flagged (default) or all queries")
+    parser.add_argument("--no-trials", action="store_true", help="Don't build candidate indexes")
+    parser.add_argument("--try-all", action="store_true",
+                        help="Try the candidate indexes of every query, not only flagged ones")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+
+    try:
+        run(args)
+    except NotInstalled:
+        print()
+        print(f"Error: the {EXPLAIN_RPC} function is not installed.")
+        print("  Run scripts/sql/query_plans.sql on the (local) database first.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Report helpers shared by the admin scripts.
+
+One byte formatter and one percentile rule, so sizes and latencies read
+the same in every report.
+"""
+
+
+def format_bytes(b):
+    """Human-readable size (B, KB, MB, GB); '-' when unknown."""
+    if b is None:
+        return '-'
+    if b >= 1024 ** 3:
+        return f"{b / 1024 ** 3:.2f} GB"
+    if b >= 1024 ** 2:
+        return f"{b / 1024 ** 2:.1f} MB"
+    if b >= 1024:
+        return f"{b / 1024:.1f} KB"
+    return f"{b:.0f} B"
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (pct in 0-100); 0.0 when empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
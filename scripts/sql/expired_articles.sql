@@ -0,0 +1,35 @@
+-- FeedOwn: expired-article backlog for scripts/purge_expired_articles.py
+--
+-- Run once in the Supabase SQL Editor. The script falls back to a paginated
+-- scan of the articles table when this function is not installed.
+
+-- Article counts grouped by expiry day and user, with the number of
+-- read_articles rows pointing at those articles (removed with them).
+-- One row per (day, user), ordered by both, so the script pages through
+-- the result past db-max-rows.
+CREATE OR REPLACE FUNCTION public.feedown_expiry_histogram()
+RETURNS TABLE (
+  day DATE,
+  user_id UUID,
+  articles BIGINT,
+  read_rows BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    (a.expires_at AT TIME ZONE 'UTC')::DATE,
+    a.user_id,
+    COUNT(*),
+    COUNT(ra.article_id)
+  FROM articles a
+  LEFT JOIN read_articles ra
+    ON ra.user_id = a.user_id AND ra.article_id = a.id
+  GROUP BY 1, 2
+  ORDER BY 1, 2;
+$$;
+
+REVOKE ALL ON FUNCTION public.feedown_expiry_histogram() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.feedown_expiry_histogram() TO service_role;
@@ -0,0 +1,94 @@
+-- FeedOwn: orphaned read state for scripts/compact_read_state.py and check_usage.py
+--
+-- Run once in the Supabase SQL Editor. read_articles.article_id has no FK to
+-- articles, so read marks outlive the articles they point at. favorites keep
+-- their own copy of the article by design and are only reported, never deleted.
+
+-- Live vs orphaned read marks (and favorites whose article is gone) per user
+CREATE OR REPLACE FUNCTION public.feedown_read_state_by_user()
+RETURNS TABLE (
+  user_id UUID,
+  read_live BIGINT,
+  read_orphaned BIGINT,
+  favorites BIGINT,
+  favorites_detached BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  WITH reads AS (
+    SELECT ra.user_id,
+           COUNT(a.id) AS read_live,
+           COUNT(*) FILTER (WHERE a.id IS NULL) AS read_orphaned
+    FROM read_articles ra
+    LEFT JOIN articles a ON a.id = ra.article_id
+    GROUP BY ra.user_id
+  ),
+  favs AS (
+    SELECT f.user_id,
+           COUNT(*) AS favorites,
+           COUNT(*) FILTER (WHERE a.id IS NULL) AS favorites_detached
+    FROM favorites f
+    LEFT JOIN articles a ON a.id = f.id
+    GROUP BY f.user_id
+  )
+  SELECT
+    COALESCE(r.user_id, f.user_id),
+    COALESCE(r.read_live, 0),
+    COALESCE(r.read_orphaned, 0),
+    COALESCE(f.favorites, 0),
+    COALESCE(f.favorites_detached, 0)
+  FROM reads r
+  FULL OUTER JOIN favs f ON f.user_id = r.user_id
+  ORDER BY 3 DESC, 1;   -- stable, so callers can page past db-max-rows
+$$;
+
+-- Database-wide totals (one row), cheap enough for every check_usage.py run
+CREATE OR REPLACE FUNCTION public.feedown_read_state_summary()
+RETURNS TABLE (
+  read_live BIGINT,
+  read_orphaned BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    COUNT(*) FILTER (WHERE EXISTS (SELECT 1 FROM articles a WHERE a.id = ra.article_id)),
+    COUNT(*) FILTER (WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = ra.article_id))
+  FROM read_articles ra;
+$$;
+
+-- Delete up to batch_size orphaned read marks; returns the number deleted
+CREATE OR REPLACE FUNCTION public.feedown_delete_orphaned_read_articles(batch_size INTEGER DEFAULT 1000)
+RETURNS BIGINT
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  WITH doomed AS (
+    SELECT ra.user_id, ra.article_id
+    FROM read_articles ra
+    WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = ra.article_id)
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  ),
+  deleted AS (
+    DELETE FROM read_articles ra
+    USING doomed d
+    WHERE ra.user_id = d.user_id AND ra.article_id = d.article_id
+    RETURNING 1
+  )
+  SELECT COUNT(*) FROM deleted;
+$$;
+
+REVOKE ALL ON FUNCTION public.feedown_read_state_by_user() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.feedown_read_state_summary() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.feedown_delete_orphaned_read_articles(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.feedown_read_state_by_user() TO service_role;
+GRANT EXECUTE ON FUNCTION public.feedown_read_state_summary() TO service_role;
+GRANT EXECUTE ON FUNCTION public.feedown_delete_orphaned_read_articles(INTEGER) TO service_role;
@@ -0,0 +1,52 @@
+-- FeedOwn: query plans for scripts/query_plans.py
+--
+-- Install on a local Postgres (e.g. `supabase start`) seeded with
+-- scripts/sql/seed_scale.sql, not on the production project: the function
+-- executes the statement it explains and builds the trial index with a
+-- plain CREATE INDEX, which blocks writes to the table while it runs.
+
+-- EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) `query`, `runs` times, and return
+-- the plans as a JSON array. `setup` may be one CREATE INDEX statement that
+-- is built first, so a candidate index can be measured. Every run and the
+-- setup are rolled back: rows a DELETE removes and the trial index are
+-- never kept.
+CREATE OR REPLACE FUNCTION public.feedown_explain(query TEXT, setup TEXT DEFAULT NULL, runs INTEGER DEFAULT 1)
+RETURNS JSON
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+DECLARE
+  plan JSON;
+  plans JSON[] := '{}';
+BEGIN
+  IF query !~* '^\s*(SELECT|WITH|DELETE|UPDATE)\s' OR rtrim(query, E'; \n\t') ~ ';' THEN
+    RAISE EXCEPTION 'feedown_explain: query must be a single SELECT, WITH, DELETE or UPDATE statement';
+  END IF;
+  IF setup IS NOT NULL AND (setup !~* '^\s*CREATE\s+INDEX\s' OR rtrim(setup, E'; \n\t') ~ ';') THEN
+    RAISE EXCEPTION 'feedown_explain: setup must be a single CREATE INDEX statement';
+  END IF;
+
+  BEGIN
+    IF setup IS NOT NULL THEN
+      EXECUTE setup;
+    END IF;
+    FOR i IN 1..GREATEST(runs, 1) LOOP
+      BEGIN
+        EXECUTE 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' || query INTO plan;
+        RAISE EXCEPTION USING ERRCODE = 'FX001';   -- undo what the run changed
+      EXCEPTION WHEN SQLSTATE 'FX001' THEN
+        plans := array_append(plans, plan -> 0);
+      END;
+    END LOOP;
+    RAISE EXCEPTION USING ERRCODE = 'FX002';       -- drop the trial index
+  EXCEPTION WHEN SQLSTATE 'FX002' THEN
+    NULL;
+  END;
+  RETURN array_to_json(plans);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.feedown_explain(TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.feedown_explain(TEXT, TEXT, INTEGER) TO service_role;
@@ -0,0 +1,64 @@
+-- FeedOwn: measured table / index sizes for scripts/check_usage.py
+--
+-- Run once in the Supabase SQL Editor. check_usage.py calls these through
+-- PostgREST RPC (service role only) and falls back to row-count heuristics
+-- when they are not installed.
+
+-- Per-table sizes in bytes:
+--   total_bytes    = heap + TOAST + indexes (pg_total_relation_size)
+--   table_bytes    = main heap fork only (pg_relation_size)
+--   toast_bytes    = TOAST table + its index
+--   index_bytes    = all indexes on the table (pg_indexes_size)
+--   dead_bytes_est = share of the heap held by dead tuples (reclaimable by VACUUM)
+CREATE OR REPLACE FUNCTION public.feedown_table_sizes()
+RETURNS TABLE (
+  table_name TEXT,
+  total_bytes BIGINT,
+  table_bytes BIGINT,
+  toast_bytes BIGINT,
+  index_bytes BIGINT,
+  live_tuples BIGINT,
+  dead_tuples BIGINT,
+  dead_bytes_est BIGINT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    c.relname::TEXT,
+    pg_total_relation_size(c.oid),
+    pg_relation_size(c.oid),
+    COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0),
+    pg_indexes_size(c.oid),
+    COALESCE(s.n_live_tup, 0),
+    COALESCE(s.n_dead_tup, 0),
+    CASE
+      WHEN COALESCE(s.n_live_tup, 0) + COALESCE(s.n_dead_tup, 0) > 0
+        THEN (pg_relation_size(c.oid) * s.n_dead_tup / (s.n_live_tup + s.n_dead_tup))::BIGINT
+      ELSE 0
+    END
+  FROM pg_class c
+  JOIN pg_namespace n ON n.oid = c.relnamespace
+  LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+  WHERE n.nspname = 'public'
+    AND c.relkind IN ('r', 'p')
+  ORDER BY pg_total_relation_size(c.oid) DESC;
+$$;
+
+-- Whole database size (what the 500MB free-tier limit is measured against)
+CREATE OR REPLACE FUNCTION public.feedown_database_size()
+RETURNS BIGINT
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT pg_database_size(current_database());
+$$;
+
+REVOKE ALL ON FUNCTION public.feedown_table_sizes() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.feedown_database_size() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.feedown_table_sizes() TO service_role;
+GRANT EXECUTE ON FUNCTION public.feedown_database_size() TO service_role;
@@ -17,6 +17,8 @@ Commands:
   python scripts/sync_recommended_feeds.py --check   # Validate all feeds
   python scripts/sync_recommended_feeds.py --test URL # Test a single feed URL
 
+  Or via the admin CLI: python scripts/feedown_admin.py feeds {sync,check,test URL}
+
 The script uses the service role key to bypass RLS for write operations.
 """
 
@@ -24,21 +26,19 @@ import os
 import sys
 import argparse
 import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+import profiling
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-try:
-    import requests
-except ImportError:
-    print("Error: requests library not installed")
-    print("Run: pip install requests")
-    sys.exit(1)
-
 # Load environment variables from .env.shared
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env.shared')
 load_dotenv(env_path)
@@ -97,7 +97,18 @@ RECOMMENDED_FEEDS = [
 # =============================================================================
 
 
-def get_supabase_client() -> Client:
+def import_requests():
+    """Import requests on first use; only feed validation needs it."""
+    try:
+        import requests
+    except ImportError:
+        print("Error: requests library not installed")
+        print("Run: pip install requests")
+        sys.exit(1)
+    return requests
+
+
+def get_supabase_client() -> "Client":
     """Create Supabase client with service role key (bypasses RLS)"""
     url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
     key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -113,10 +124,14 @@ def get_supabase_client() -> Client:
         print("You can find it in your Supabase dashboard under Settings > API")
         sys.exit(1)
 
-    return create_client(url, key)
+    from supabase import create_client
+    import api_client
 
+    return create_client(url, key, options=api_client.supabase_options())
 
-def sync_recommended_feeds(supabase: Client):
+
+@profiling.timed
+def sync_recommended_feeds(supabase: "Client"):
     """Sync recommended feeds to database using upsert"""
     print(f"Syncing {len(RECOMMENDED_FEEDS)} recommended feeds...")
 
@@ -155,7 +170,8 @@ def sync_recommended_feeds(supabase: Client):
     print(f"Total: {len(all_feeds.data)} feeds in database")
 
 
-def deactivate_missing_feeds(supabase: Client):
+@profiling.timed
+def deactivate_missing_feeds(supabase: "Client"):
     """Mark feeds that are no longer in RECOMMENDED_FEEDS as inactive"""
     current_urls = {feed["url"] for feed in RECOMMENDED_FEEDS}
 
@@ -179,6 +195,7 @@ def deactivate_missing_feeds(supabase: Client):
         print("\nNo feeds to deactivate.")
 
 
+@profiling.timed
 def validate_feed(url: str) -> dict:
     """
     Validate a single RSS feed URL.
@@ -192,11 +209,15 @@ def validate_feed(url: str) -> dict:
         "item_count": 0,
         "error": None,
     }
+    requests = import_requests()
 
     try:
         # Fetch the feed
         headers = {"User-Agent": "FeedOwn/1.0 (RSS Reader)"}
-        response = requests.get(url, headers=headers, timeout=10)
+        with profiling.client_span('GET', url, template='{feed}') as span:
+            response = requests.get(url, headers=headers, timeout=10)
+            span.response(response.status_code, len(response.content))
+        profiling.add_bytes(len(response.content))
         response.raise_for_status()
 
         content = response.text
@@ -328,23 +349,8 @@ def test_single_feed(url: str):
     return result["valid"]
 
 
-def main():
-    parser = argparse.ArgumentParser(description="FeedOwn Recommended Feeds Manager")
-    parser.add_argument("--check", action="store_true", help="Validate all feeds without syncing")
-    parser.add_argument("--test", metavar="URL", help="Test a single feed URL")
-    args = parser.parse_args()
-
-    # Test single URL
-    if args.test:
-        success = test_single_feed(args.test)
-        sys.exit(0 if success else 1)
-
-    # Check all feeds
-    if args.check:
-        success = check_all_feeds()
-        sys.exit(0 if success else 1)
-
-    # Default: sync to database
+def run_sync():
+    """Upsert RECOMMENDED_FEEDS and deactivate feeds no longer in the list"""
     print("=" * 60)
     print("FeedOwn - Recommended Feeds Sync")
     print("=" * 60)
@@ -363,5 +369,27 @@ def main():
     print("\nSync complete!")
 
 
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Recommended Feeds Manager")
+    parser.add_argument("--check", action="store_true", help="Validate all feeds without syncing")
+    parser.add_argument("--test", metavar="URL", help="Test a single feed URL")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+
+    # Test single URL
+    if args.test:
+        success = test_single_feed(args.test)
+        sys.exit(0 if success else 1)
+
+    # Check all feeds
+    if args.check:
+        success = check_all_feeds()
+        sys.exit(0 if success else 1)
+
+    # Default: sync to database
+    run_sync()
+
+
 if __name__ == "__main__":
     main()
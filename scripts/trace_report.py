@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Trace Report
+
+Summarizes the span files written with --trace (see profiling.py): which
+phases and HTTP calls take the wall-clock time of a run, and how that
+changes between runs as the data grows.
+
+Usage:
+  python scripts/trace_report.py trace.jsonl                # Last run in the file
+  python scripts/trace_report.py trace.jsonl --all          # Every run, aggregated
+  python scripts/trace_report.py trace.jsonl --tree         # Span tree of the last run
+  python scripts/trace_report.py before.jsonl after.jsonl   # Compare two runs
+  python scripts/feedown_admin.py trace trace.jsonl         # Same, via the admin CLI
+
+Each run of a script is one trace. The files are OTLP/JSON, one export
+request per line, so they can also be loaded into Jaeger, Tempo or any
+other OpenTelemetry backend.
+"""
+
+import sys
+import json
+import argparse
+from collections import defaultdict
+
+from report_utils import format_bytes
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+KIND_LABELS = {1: 'phase', 3: 'http'}
+
+
+def attribute_value(value):
+    for key in ('stringValue', 'boolValue', 'doubleValue'):
+        if key in value:
+            return value[key]
+    return int(value['intValue']) if 'intValue' in value else None
+
+
+def load_traces(path):
+    """{trace id: {'service', 'spans'}} in file order; span times in ms."""
+    traces = {}
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                print(f"  Warning: {path}:{line_no} is not JSON, skipped")
+                continue
+            for rs in request.get('resourceSpans', []):
+                resource = {a['key']: attribute_value(a['value'])
+                            for a in rs.get('resource', {}).get('attributes', [])}
+                for ss in rs.get('scopeSpans', []):
+                    for s in ss.get('spans', []):
+                        trace = traces.setdefault(s['traceId'], {
+                            'service': resource.get('service.name', '?'),
+                            'command': resource.get('process.command_line', ''),
+                            'spans': [],
+                        })
+                        trace['spans'].append({
+                            'id': s['spanId'],
+                            'parent': s.get('parentSpanId'),
+                            'name': s['name'],
+                            'kind': s.get('kind', 1),
+                            'start': int(s['startTimeUnixNano']) / 1e6,
+                            'end': int(s['endTimeUnixNano']) / 1e6,
+                            'error': s.get('status', {}).get('code') == 2,
+                            'attributes': {a['key']: attribute_value(a['value']) for a in s.get('attributes', [])},
+                        })
+    return traces
+
+
+def wall_ms(spans):
+    return max(s['end'] for s in spans) - min(s['start'] for s in spans) if spans else 0.0
+
+
+def aggregate(spans):
+    """{(kind, name): totals} for a list of spans."""
+    rows = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0, 'bytes': 0, 'retries': 0, 'errors': 0})
+    for s in spans:
+        row = rows[(s['kind'], s['name'])]
+        duration = s['end'] - s['start']
+        row['count'] += 1
+        row['total'] += duration
+        row['max'] = max(row['max'], duration)
+        attrs = s['attributes']
+        row['bytes'] += attrs.get('http.response.body.size') or (attrs.get('feedown.bytes') if s['kind'] == 1 else 0) or 0
+        row['retries'] += attrs.get('http.request.resend_count') or 0
+        row['errors'] += s['error']
+    return rows
+
+
+def label(kind, name, width=40):
+    text = f"{KIND_LABELS.get(kind, kind)}  {name}"
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def print_summary(spans, wall, limit):
+    rows = sorted(aggregate(spans).items(), key=lambda kv: kv[1]['total'], reverse=True)
+    print(f"  {'Span':<40} {'Count':>6} {'Total ms':>9} {'% wall':>7} {'Max ms':>8} {'Bytes':>9} {'Retry':>5} {'Err':>4}")
+    print(f"  {'─'*40} {'─'*6} {'─'*9} {'─'*7} {'─'*8} {'─'*9} {'─'*5} {'─'*4}")
+    for (kind, name), r in rows[:limit]:
+        share = r['total'] / wall * 100 if wall else 0
+        print(f"  {label(kind, name):<40} {r['count']:>6} {r['total']:>9.0f} {share:>6.0f}% {r['max']:>8.0f} "
+              f"{format_bytes(r['bytes'] or None):>9} {r['retries']:>5} {r['errors']:>4}")
+    if len(rows) > limit:
+        print(f"  ... {len(rows) - limit} more (--limit)")
+    print()
+    print("  % wall: share of the run's wall-clock time. Concurrent spans and nested")
+    print("  phases overlap, so the column can add up to more than 100%.")
+
+
+def print_tree(spans, limit):
+    children = defaultdict(list)
+    ids = {s['id'] for s in spans}
+    for s in spans:
+        children[s['parent'] if s['parent'] in ids else None].append(s)
+    origin = min((s['start'] for s in spans), default=0)
+    lines = 0
+
+    def walk(parent, depth):
+        nonlocal lines
+        for s in sorted(children[parent], key=lambda s: s['start']):
+            if lines >= limit:
+                return
+            lines += 1
+            status = s['attributes'].get('http.response.status_code')
+            extra = f"  {status}" if status else ''
+            extra += '  ERROR' if s['error'] else ''
+            print(f"  {s['start'] - origin:>8.0f}ms {s['end'] - s['start']:>8.0f}ms  "
+                  f"{'  ' * depth}{s['name']}{extra}")
+            walk(s['id'], depth + 1)
+
+    print(f"  {'Start':>10} {'Duration':>10}  Span")
+    print(f"  {'─'*10} {'─'*10}  {'─'*44}")
+    walk(None, 0)
+    if lines >= limit:
+        print(f"  ... truncated at {limit} spans (--limit)")
+
+
+def print_comparison(before, after, limit):
+    (spans_a, wall_a), (spans_b, wall_b) = before, after
+    a, b = aggregate(spans_a), aggregate(spans_b)
+    empty = {'total': 0.0, 'count': 0}
+    keys = sorted(set(a) | set(b), key=lambda k: abs(b.get(k, empty)['total'] - a.get(k, empty)['total']),
+                  reverse=True)
+    print(f"  Wall time: {wall_a:,.0f}ms -> {wall_b:,.0f}ms")
+    print()
+    print(f"  {'Span':<40} {'Before ms':>10} {'After ms':>10} {'Δ ms':>8} {'Change':>7} {'Count':>9}")
+    print(f"  {'─'*40} {'─'*10} {'─'*10} {'─'*8} {'─'*7} {'─'*9}")
+    for kind, name in keys[:limit]:
+        ra, rb = a.get((kind, name), empty), b.get((kind, name), empty)
+        ta, tb = ra['total'], rb['total']
+        if not ra['count'] or not rb['count']:
+            change = 'new' if rb['count'] else 'gone'
+        else:
+            change = f"{(tb / ta - 1) * 100:+.0f}%" if ta >= 1 else '-'
+        counts = f"{ra['count']}->{rb['count']}"
+        print(f"  {label(kind, name):<40} {ta:>10.0f} {tb:>10.0f} {tb - ta:>+8.0f} {change:>7} {counts:>9}")
+
+
+def select_spans(traces, use_all):
+    """(spans, wall ms, description) of the last run, or of every run with --all."""
+    if not traces:
+        return [], 0.0, None
+    if use_all:
+        return ([s for t in traces.values() for s in t['spans']],
+                sum(wall_ms(t['spans']) for t in traces.values()), f"{len(traces)} runs")
+    trace = list(traces.values())[-1]
+    return trace['spans'], wall_ms(trace['spans']), f"{trace['service']}: {trace['command']}"
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Trace Report")
+    parser.add_argument("files", nargs="+", metavar="FILE", help="--trace file(s); two files are compared")
+    parser.add_argument("--all", action="store_true", help="Aggregate every run in each file, not just the last")
+    parser.add_argument("--tree", action="store_true", help="Print the span tree instead of the summary")
+    parser.add_argument("--limit", type=int, default=40, help="Rows to print (default: 40)")
+    args = parser.parse_args(argv)
+    if len(args.files) > 2:
+        parser.error("give one file to summarize or two to compare")
+
+    try:
+        loaded = [select_spans(load_traces(path), args.all) for path in args.files]
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Trace Report")
+    print("=" * 70)
+    for path, (spans, _, description) in zip(args.files, loaded):
+        print(f"  {path}: {description or 'no spans'} ({len(spans):,} spans)")
+    print()
+    print("-" * 70)
+
+    if len(loaded) == 2:
+        print("  Comparison")
+        print("-" * 70)
+        print_comparison(loaded[0][:2], loaded[1][:2], args.limit)
+    elif args.tree:
+        print("  Span Tree")
+        print("-" * 70)
+        print_tree(loaded[0][0], args.limit)
+    else:
+        print("  Where the Time Goes")
+        print("-" * 70)
+        print_summary(loaded[0][0], loaded[0][1], args.limit)
+    print()
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Usage History / Free Tier Forecast
+
+check_usage.py and check_cloudflare.py append every run's metrics to a
+local SQLite time series. This script fits growth curves to that history
+and estimates the date each free-tier limit will be reached.
+
+Usage:
+  python scripts/usage_history.py forecast             # All metrics with a limit
+  python scripts/usage_history.py forecast --days 30   # Fit on the last 30 days only
+  python scripts/usage_history.py list                 # Recorded metrics
+  python scripts/usage_history.py show db_size_bytes   # Samples for one metric
+
+History is stored in scripts/.data/usage_history.db (override the directory
+with FEEDOWN_DATA_DIR).
+
+Metric naming:
+  - Metrics with a free-tier limit are named after the FREE_TIER key they are
+    checked against (auth_mau, workers_requests_per_day, ...).
+  - '*_per_day' metrics are stored as one sample per complete UTC day.
+  - '*_per_month*' metrics are month-to-date counters; they are forecast within
+    the current month only, since they reset on the 1st.
+"""
+
+import os
+import sys
+import math
+import sqlite3
+import argparse
+from datetime import datetime, timezone, timedelta
+
+import profiling
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+DATA_DIR = os.getenv('FEEDOWN_DATA_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.data'
+)
+HISTORY_DB = os.path.join(DATA_DIR, 'usage_history.db')
+
+MIN_POINTS = 3              # samples needed before a forecast is attempted
+MAX_HORIZON_DAYS = 5 * 365  # ETAs further out than this are not meaningful
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+  ts REAL NOT NULL,
+  source TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  value REAL NOT NULL,
+  lim REAL,
+  PRIMARY KEY (source, metric, ts)
+);
+CREATE INDEX IF NOT EXISTS idx_samples_metric_ts ON samples(metric, ts);
+"""
+
+
+def connect(path=None):
+    """Open (and create if needed) the history database."""
+    path = path or HISTORY_DB
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def day_start(date_str):
+    """UTC datetime for the start of a 'YYYY-MM-DD' day."""
+    return datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+
+
+@profiling.timed
+def record(source, samples, ts=None):
+    """
+    Append samples to the history.
+
+    samples is an iterable of (metric, value, limit) or (metric, value, limit, ts)
+    tuples; limit may be None and ts defaults to the ts argument (or now). A
+    sample with the same source, metric and ts replaces the earlier one, so
+    daily buckets can be re-recorded while they fill in. Returns the number of
+    samples written.
+    """
+    default_ts = (ts or datetime.now(timezone.utc)).timestamp()
+    rows = []
+    for sample in samples:
+        metric, value, limit = sample[:3]
+        sample_ts = sample[3].timestamp() if len(sample) > 3 else default_ts
+        if not isinstance(value, (int, float)):
+            continue
+        rows.append((sample_ts, source, metric, float(value), limit))
+
+    with connect() as conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO samples (ts, source, metric, value, lim) VALUES (?, ?, ?, ?, ?)',
+            rows,
+        )
+    return len(rows)
+
+
+def load_series(conn, metric, since=None):
+    """Return [(ts, value)] for a metric in time order."""
+    query = 'SELECT ts, value FROM samples WHERE metric = ?'
+    params = [metric]
+    if since is not None:
+        query += ' AND ts >= ?'
+        params.append(since.timestamp())
+    return conn.execute(query + ' ORDER BY ts', params).fetchall()
+
+
+def latest_limit(conn, metric):
+    """The most recently recorded limit for a metric, or None."""
+    row = conn.execute(
+        'SELECT lim FROM samples WHERE metric = ? AND lim IS NOT NULL ORDER BY ts DESC LIMIT 1',
+        (metric,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+# ── Curve Fitting ──────────────────────────────────────────────────
+
+def fit_linear(xs, ys):
+    """Least-squares y = a + b*x. Returns (a, b) or None."""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    return mean_y - slope * mean_x, slope
+
+
+@profiling.timed
+def fit_models(xs, ys):
+    """
+    Fit linear and exponential growth curves to (day, value) points.
+
+    Returns a list of dicts with 'model', 'predict' (day -> value),
+    'solve' (value -> day or None) and 'sse', best fit first.
+    """
+    models = []
+
+    linear = fit_linear(xs, ys)
+    if linear:
+        a, b = linear
+        models.append({
+            'model': 'linear',
+            'predict': lambda x, a=a, b=b: a + b * x,
+            'solve': lambda y, a=a, b=b: (y - a) / b if b > 0 else None,
+        })
+
+    if all(y > 0 for y in ys):
+        log_fit = fit_linear(xs, [math.log(y) for y in ys])
+        if log_fit:
+            a, b = log_fit
+            models.append({
+                'model': 'exp',
+                'predict': lambda x, a=a, b=b: math.exp(min(a + b * x, 700)),
+                'solve': lambda y, a=a, b=b: (math.log(y) - a) / b if b > 0 else None,
+            })
+
+    for m in models:
+        m['sse'] = sum((m['predict'](x) - y) ** 2 for x, y in zip(xs, ys))
+    models.sort(key=lambda m: m['sse'])
+    return models
+
+
+def forecast_metric(series, limit, now=None):
+    """
+    Estimate when a series will reach its limit.
+
+    Returns a dict with 'current', 'per_day', 'model' and 'eta' (datetime),
+    plus a 'status' of 'exceeded', 'eta', 'flat' or 'insufficient'.
+    """
+    now = now or datetime.now(timezone.utc)
+    current = series[-1][1] if series else None
+    result = {'current': current, 'per_day': None, 'model': None, 'eta': None}
+
+    if current is not None and limit and current >= limit:
+        return {**result, 'status': 'exceeded'}
+    if len(series) < MIN_POINTS:
+        return {**result, 'status': 'insufficient'}
+
+    xs = [ts / 86400 for ts, _ in series]
+    ys = [value for _, value in series]
+    models = fit_models(xs, ys)
+    if not models:
+        return {**result, 'status': 'insufficient'}
+
+    best = models[0]
+    now_day = now.timestamp() / 86400
+    result['model'] = best['model']
+    result['per_day'] = best['predict'](now_day + 1) - best['predict'](now_day)
+
+    crossing = best['solve'](limit) if limit else None
+    if crossing is None:
+        return {**result, 'status': 'flat'}
+    eta = datetime.fromtimestamp(max(crossing, now_day) * 86400, tz=timezone.utc)
+    return {**result, 'eta': eta, 'status': 'eta'}
+
+
+# ── Output ─────────────────────────────────────────────────────────
+
+def format_value(metric, value):
+    """Format a metric value for display."""
+    if value is None:
+        return '-'
+    if metric.endswith('_bytes') or 'bytes' in metric:
+        for unit, size in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024)):
+            if abs(value) >= size:
+                return f"{value / size:.1f} {unit}"
+        return f"{value:.0f} B"
+    return f"{value:,.0f}"
+
+
+def month_start(now):
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month_start(now):
+    return (month_start(now) + timedelta(days=32)).replace(day=1)
+
+
+def cmd_forecast(args):
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=args.days) if args.days else None
+
+    with connect() as conn:
+        metrics = [row[0] for row in conn.execute(
+            'SELECT DISTINCT metric FROM samples WHERE lim IS NOT NULL ORDER BY metric'
+        )]
+
+        print()
+        print("=" * 70)
+        print("  FeedOwn - Free Tier Forecast")
+        print("=" * 70)
+        print(f"  History: {HISTORY_DB}")
+        if since:
+            print(f"  Fit window: last {args.days} days")
+        print()
+
+        if not metrics:
+            print("  No history yet. Run scripts/check_usage.py and scripts/check_cloudflare.py first.")
+            print()
+            return
+
+        print(f"  {'Metric':<36} {'Current':>10} {'Limit':>10} {'Trend/day':>10} {'Model':>6}  Limit reached")
+        print(f"  {'─'*36} {'─'*10} {'─'*10} {'─'*10} {'─'*6}  {'─'*22}")
+
+        for metric in metrics:
+            limit = latest_limit(conn, metric)
+            window = since
+            if '_per_month' in metric:
+                window = max(window, month_start(now)) if window else month_start(now)
+            series = load_series(conn, metric, window)
+            fc = forecast_metric(series, limit, now)
+
+            if fc['status'] == 'exceeded':
+                eta = 'EXCEEDED'
+            elif fc['status'] == 'insufficient':
+                eta = f"(need {MIN_POINTS}+ samples)"
+            elif fc['status'] == 'flat':
+                eta = 'not growing'
+            elif '_per_month' in metric and fc['eta'] >= next_month_start(now):
+                eta = 'not this month'
+            else:
+                days = (fc['eta'] - now).total_seconds() / 86400
+                eta = f"{fc['eta'].strftime('%Y-%m-%d')} ({days:.0f} days)"
+                if days > MAX_HORIZON_DAYS:
+                    eta = f"> {MAX_HORIZON_DAYS // 365} years"
+                elif days < 30:
+                    eta += ' !!!'
+                elif days < 90:
+                    eta += ' !'
+
+            trend = fc['per_day']
+            trend_str = '-' if trend is None else ('+' if trend >= 0 else '-') + format_value(metric, abs(trend))
+            print(f"  {metric:<36} {format_value(metric, fc['current']):>10} {format_value(metric, limit):>10} "
+                  f"{trend_str:>10} {fc['model'] or '-':>6}  {eta}")
+
+    print()
+    print("=" * 70)
+
+
+def cmd_list(args):
+    with connect() as conn:
+        rows = conn.execute(
+            'SELECT metric, source, COUNT(*), MIN(ts), MAX(ts) FROM samples GROUP BY metric, source ORDER BY metric'
+        ).fetchall()
+    print(f"  {'Metric':<36} {'Source':<12} {'Samples':>8}  Range")
+    print(f"  {'─'*36} {'─'*12} {'─'*8}  {'─'*33}")
+    for metric, source, count, first, last in rows:
+        first_str = datetime.fromtimestamp(first, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+        last_str = datetime.fromtimestamp(last, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+        print(f"  {metric:<36} {source:<12} {count:>8}  {first_str} .. {last_str}")
+
+
+def cmd_show(args):
+    with connect() as conn:
+        series = load_series(conn, args.metric)
+        limit = latest_limit(conn, args.metric)
+    print(f"  {args.metric} (limit: {format_value(args.metric, limit)})")
+    for ts, value in series:
+        stamp = datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+        print(f"  {stamp}  {format_value(args.metric, value):>12}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Usage History / Free Tier Forecast")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_forecast = sub.add_parser("forecast", help="Estimate when each free-tier limit will be reached")
+    p_forecast.add_argument("--days", type=int, help="Only fit samples from the last N days")
+    p_forecast.set_defaults(func=cmd_forecast)
+
+    p_list = sub.add_parser("list", help="List recorded metrics")
+    p_list.set_defaults(func=cmd_list)
+
+    p_show = sub.add_parser("show", help="Show samples for one metric")
+    p_show.add_argument("metric")
+    p_show.set_defaults(func=cmd_show)
+
+    for p in (p_forecast, p_list, p_show):
+        profiling.add_arguments(p)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
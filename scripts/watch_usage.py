@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Usage Watcher / Prometheus Exporter
+
+Long-running companion to check_usage.py and check_cloudflare.py. Each
+metric family is polled on its own schedule (with exponential backoff on
+errors) and the latest values are kept in memory, then served in the
+Prometheus text format. Scrapes only read that snapshot and never call
+Supabase or Cloudflare.
+
+Usage:
+  python scripts/watch_usage.py                        # Serve on 127.0.0.1:9464
+  python scripts/watch_usage.py --port 9100
+  python scripts/watch_usage.py --families supabase_auth,cloudflare_analytics
+  python scripts/watch_usage.py --list                 # Show families and intervals
+
+  curl http://127.0.0.1:9464/metrics
+
+Families whose credentials are missing (SUPABASE_* or CLOUDFLARE_API_TOKEN)
+are skipped with a warning.
+"""
+
+import sys
+import time
+import random
+import argparse
+import importlib
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import profiling
+
+# Fix Windows console encoding
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+
+DEFAULT_PORT = 9464
+BACKOFF_BASE = 30          # seconds before the first retry after an error
+BACKOFF_MAX = 30 * 60      # retry delay never grows beyond this
+
+METRIC_HELP = {
+    'feedown_free_tier_usage_percent': ('gauge', 'Current usage as a percentage of the free-tier limit.'),
+    'feedown_free_tier_limit': ('gauge', 'Free-tier limit the usage percentage is computed against.'),
+    'feedown_supabase_auth_users': ('gauge', 'Registered auth users.'),
+    'feedown_supabase_auth_mau': ('gauge', 'Users who signed in within the last 30 days.'),
+    'feedown_supabase_table_rows': ('gauge', 'Rows per application table.'),
+    'feedown_supabase_table_bytes': ('gauge', 'Measured size per table, including indexes and TOAST.'),
+    'feedown_supabase_db_size_bytes': ('gauge', 'Database size.'),
+    'feedown_cloudflare_requests_today': ('gauge', 'Requests so far today (UTC) per dataset.'),
+    'feedown_cloudflare_errors_today': ('gauge', 'Errors so far today (UTC) per dataset.'),
+    'feedown_cloudflare_kv_operations_today': ('gauge', 'KV operations so far today (UTC), all namespaces.'),
+    'feedown_cloudflare_cpu_time_p99_ms': ('gauge', "Today's p99 CPU time per script."),
+    'feedown_cloudflare_dataset_up': ('gauge', 'Whether the last poll returned the GraphQL analytics dataset.'),
+    'feedown_cloudflare_pages_deployments_month': ('gauge', 'Pages deployments this billing month.'),
+    'feedown_watch_up': ('gauge', 'Whether the last poll of a family succeeded.'),
+    'feedown_watch_last_success_timestamp_seconds': ('gauge', 'Unix time of the last successful poll.'),
+    'feedown_watch_poll_duration_seconds': ('gauge', 'Duration of the last poll.'),
+    'feedown_watch_errors_total': ('counter', 'Failed polls since the watcher started.'),
+    'feedown_http_requests_total': ('counter', 'Upstream HTTP attempts per endpoint (api_client.py).'),
+    'feedown_http_retries_total': ('counter', 'Upstream HTTP retries per endpoint.'),
+    'feedown_http_failures_total': ('counter', 'Upstream HTTP calls that failed after all retries.'),
+    'feedown_http_latency_p95_seconds': ('gauge', 'p95 upstream HTTP latency per endpoint.'),
+}
+
+
+# ── Checker Modules ────────────────────────────────────────────────
+
+_checkers = {}
+
+
+def load_checker(name):
+    """
+    Import check_usage / check_cloudflare once, or return None if its
+    credentials are missing (require_credentials() exits in that case).
+    """
+    if name not in _checkers:
+        module = importlib.import_module(name)
+        try:
+            module.require_credentials()
+            _checkers[name] = module
+        except SystemExit:
+            _checkers[name] = None
+    return _checkers[name]
+
+
+def percent(value, limit):
+    return value / limit * 100 if limit else 0
+
+
+# ── Collectors ─────────────────────────────────────────────────────
+# Each returns a list of (metric, labels, value) samples.
+
+@profiling.timed
+def collect_supabase_auth():
+    cu = load_checker('check_usage')
+    total, mau = cu.get_auth_stats()
+    limit = cu.FREE_TIER['auth_mau']
+    return [
+        ('feedown_supabase_auth_users', {}, total),
+        ('feedown_supabase_auth_mau', {}, mau),
+        ('feedown_free_tier_usage_percent', {'limit': 'auth_mau'}, percent(mau, limit)),
+        ('feedown_free_tier_limit', {'limit': 'auth_mau'}, limit),
+    ]
+
+
+@profiling.timed
+def collect_supabase_rows():
+    cu = load_checker('check_usage')
+    counts, _ = cu.get_table_row_counts()
+    return [
+        ('feedown_supabase_table_rows', {'table': table}, count)
+        for table, count in counts.items() if isinstance(count, int)
+    ]
+
+
+@profiling.timed
+def collect_supabase_size():
+    cu = load_checker('check_usage')
+    sizes = cu.get_table_sizes(use_cache=False) or {}
+    samples = [
+        ('feedown_supabase_table_bytes', {'table': table}, row['total_bytes'])
+        for table, row in sizes.items()
+    ]
+    db_size = cu.get_db_size_via_rpc(use_cache=False)
+    if db_size is None and sizes:
+        db_size = sum(row['total_bytes'] for row in sizes.values())
+    if db_size is None:
+        raise RuntimeError('database size unavailable (run scripts/sql/table_sizes.sql)')
+
+    limit = cu.FREE_TIER['db_size_mb'] * 1024 * 1024
+    samples += [
+        ('feedown_supabase_db_size_bytes', {}, db_size),
+        ('feedown_free_tier_usage_percent', {'limit': 'db_size_mb'}, percent(db_size, limit)),
+        ('feedown_free_tier_limit', {'limit': 'db_size_mb'}, cu.FREE_TIER['db_size_mb']),
+    ]
+    return samples
+
+
+@profiling.timed
+def collect_cloudflare_analytics():
+    cf = load_checker('check_cloudflare')
+    analytics = cf.get_analytics(days=1)
+    if analytics is None:
+        raise RuntimeError('GraphQL analytics request failed')
+    rows = analytics['rows']
+    if not rows and analytics['errors']:
+        raise RuntimeError(analytics['errors'][0].get('message', 'GraphQL error'))
+
+    # A dataset the query failed on has no rows, not zero usage: skip its gauges
+    failed = cf.failed_aliases(analytics['errors'], cf.DEFAULT_ANALYTICS)
+    available = {alias for alias in cf.DEFAULT_ANALYTICS if alias in rows and alias not in failed}
+
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    samples = [('feedown_cloudflare_dataset_up', {'dataset': alias}, int(alias in available))
+               for alias in cf.DEFAULT_ANALYTICS]
+    for alias, limit_key in (('workers', 'workers_requests_per_day'),
+                             ('pagesFunctions', 'pages_functions_per_day')):
+        if alias not in available:
+            continue
+        daily, _ = cf.aggregate_daily(rows[alias])
+        d = daily.get(today, {'requests': 0, 'errors': 0})
+        limit = cf.FREE_TIER[limit_key]
+        samples += [
+            ('feedown_cloudflare_requests_today', {'dataset': alias}, d['requests']),
+            ('feedown_cloudflare_errors_today', {'dataset': alias}, d['errors']),
+            ('feedown_free_tier_usage_percent', {'limit': limit_key}, percent(d['requests'], limit)),
+            ('feedown_free_tier_limit', {'limit': limit_key}, limit),
+        ]
+
+    if 'kvOperations' in available:
+        kv_today = cf.kv_daily_totals(cf.kv_usage(rows['kvOperations'], [])).get(today, {})
+        for action in cf.KV_ACTIONS:
+            limit_key = f'kv_{action}s_per_day'
+            value = kv_today.get(action, 0)
+            samples += [
+                ('feedown_cloudflare_kv_operations_today', {'action': action}, value),
+                ('feedown_free_tier_usage_percent', {'limit': limit_key}, percent(value, cf.FREE_TIER[limit_key])),
+                ('feedown_free_tier_limit', {'limit': limit_key}, cf.FREE_TIER[limit_key]),
+            ]
+
+    cpu_limit = cf.FREE_TIER['workers_cpu_ms_per_invocation']
+    for alias in ('workersCpu', 'pagesFunctionsCpu'):
+        if alias not in available:
+            continue
+        for script, days in cf.cpu_time_by_script(rows.get(alias) or []).items():
+            if today in days:
+                p99 = days[today]['cpu'][2]
+                samples += [
+                    ('feedown_cloudflare_cpu_time_p99_ms', {'dataset': alias, 'script': script}, p99),
+                    ('feedown_free_tier_usage_percent',
+                     {'limit': 'workers_cpu_ms_per_invocation', 'dataset': alias, 'script': script}, percent(p99, cpu_limit)),
+                ]
+    return samples
+
+
+@profiling.timed
+def collect_cloudflare_deployments():
+    cf = load_checker('check_cloudflare')
+    projects = cf.get_pages_projects()
+    if projects is None:
+        raise RuntimeError('could not list Pages projects')
+
+    month_start = cf.billing_month_start()
+    limit = cf.FREE_TIER['pages_deployments_per_month']
+    samples = []
+    for proj in projects:
+        name = proj.get('name')
+        deployments = cf.get_pages_deployments(name)
+        if deployments is None:
+            continue
+        times = [cf.parse_cf_time(dep.get('created_on')) for dep in deployments]
+        this_month = sum(1 for t in times if t and t >= month_start)
+        samples += [
+            ('feedown_cloudflare_pages_deployments_month', {'project': name}, this_month),
+            ('feedown_free_tier_usage_percent',
+             {'limit': 'pages_deployments_per_month', 'project': name}, percent(this_month, limit)),
+        ]
+    return samples
+
+
+# family -> (checker module, poll interval in seconds, collector)
+FAMILIES = {
+    'supabase_auth': ('check_usage', 10 * 60, collect_supabase_auth),
+    'supabase_rows': ('check_usage', 5 * 60, collect_supabase_rows),
+    'supabase_size': ('check_usage', 15 * 60, collect_supabase_size),
+    'cloudflare_analytics': ('check_cloudflare', 5 * 60, collect_cloudflare_analytics),
+    'cloudflare_deployments': ('check_cloudflare', 30 * 60, collect_cloudflare_deployments),
+}
+
+
+# ── State ──────────────────────────────────────────────────────────
+
+def escape_label(value):
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricStore:
+    """Latest samples per family, guarded by a lock for the HTTP handler."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = {}
+
+    def update(self, family, samples=None, error=None, duration=0.0):
+        with self.lock:
+            state = self.families.setdefault(family, {
+                'samples': [], 'last_success': None, 'errors': 0, 'up': 0, 'duration': 0.0,
+            })
+            state['duration'] = duration
+            if error is None:
+                state.update(samples=samples, last_success=time.time(), up=1)
+            else:
+                state['errors'] += 1
+                state['up'] = 0
+
+    def render(self):
+        """Prometheus text exposition of the current snapshot."""
+        import api_client
+
+        by_metric = {}
+        with self.lock:
+            for family, state in self.families.items():
+                for metric, labels, value in state['samples']:
+                    by_metric.setdefault(metric, []).append((labels, value))
+                watch = {'family': family}
+                by_metric.setdefault('feedown_watch_up', []).append((watch, state['up']))
+                by_metric.setdefault('feedown_watch_errors_total', []).append((watch, state['errors']))
+                by_metric.setdefault('feedown_watch_poll_duration_seconds', []).append((watch, state['duration']))
+                if state['last_success']:
+                    by_metric.setdefault('feedown_watch_last_success_timestamp_seconds', []).append(
+                        (watch, state['last_success']))
+
+        for api, endpoints in api_client.all_stats().items():
+            for endpoint, st in endpoints.items():
+                labels = {'api': api, 'endpoint': endpoint}
+                by_metric.setdefault('feedown_http_requests_total', []).append((labels, st['calls']))
+                by_metric.setdefault('feedown_http_retries_total', []).append((labels, st['retries']))
+                by_metric.setdefault('feedown_http_failures_total', []).append((labels, st['failures']))
+                by_metric.setdefault('feedown_http_latency_p95_seconds', []).append((labels, st['p95_ms'] / 1000))
+
+        lines = []
+        for metric in sorted(by_metric):
+            kind, help_text = METRIC_HELP.get(metric, ('gauge', metric))
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {kind}')
+            for labels, value in by_metric[metric]:
+                label_str = ','.join(f'{k}="{escape_label(v)}"' for k, v in sorted(labels.items()))
+                sample = f'{metric}{{{label_str}}}' if label_str else metric
+                lines.append(f'{sample} {float(value)!r}')
+        return '\n'.join(lines) + '\n'
+
+
+store = MetricStore()
+
+
+def poll_loop(family, interval, collector, stop):
+    """Poll one family forever: every `interval` seconds, backing off after errors."""
+    failures = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            samples = collector()
+        except Exception as e:
+            failures += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+            delay *= random.uniform(0.8, 1.2)
+            store.update(family, error=e, duration=time.perf_counter() - start)
+            print(f"  [{datetime.now().strftime('%H:%M:%S')}] {family}: {str(e).splitlines()[0] if str(e) else type(e).__name__} "
+                  f"(retry in {delay:.0f}s)")
+        else:
+            failures = 0
+            delay = interval
+            store.update(family, samples, duration=time.perf_counter() - start)
+            print(f"  [{datetime.now().strftime('%H:%M:%S')}] {family}: {len(samples)} samples "
+                  f"in {time.perf_counter() - start:.2f}s")
+        stop.wait(delay)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = store.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="FeedOwn Usage Watcher / Prometheus Exporter")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--families", help="Comma-separated families to poll (default: all)")
+    parser.add_argument("--list", action="store_true", help="List metric families and exit")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start(args, prog)
+
+    if args.list:
+        print(f"  {'Family':<26} {'Source':<18} {'Interval':>9}")
+        print(f"  {'─'*26} {'─'*18} {'─'*9}")
+        for family, (module, interval, _) in FAMILIES.items():
+            print(f"  {family:<26} {module:<18} {interval // 60:>7}m")
+        return
+
+    selected = args.families.split(',') if args.families else list(FAMILIES)
+    unknown = [f for f in selected if f not in FAMILIES]
+    if unknown:
+        parser.error(f"unknown families: {', '.join(unknown)}")
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Usage Watcher")
+    print("=" * 70)
+
+    families = []
+    for family in selected:
+        module = FAMILIES[family][0]
+        if load_checker(module) is None:
+            print(f"  Skipping {family}: {module}.py credentials are not configured")
+            continue
+        families.append(family)
+    if not families:
+        print("  Nothing to watch.")
+        sys.exit(1)
+
+    server = ThreadingHTTPServer((args.host, args.port), MetricsHandler)
+    print(f"  Serving metrics on http://{args.host}:{args.port}/metrics ({len(families)} families)")
+    print("  Press Ctrl+C to stop.")
+    print()
+
+    stop = threading.Event()
+    for family in families:
+        _, interval, collector = FAMILIES[family]
+        threading.Thread(
+            target=poll_loop, args=(family, interval, collector, stop), name=family, daemon=True,
+        ).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for GET /api/articles.
+
+functions/api/articles/index.ts loads every unexpired article of the user
+and every read_articles id (in pages of 1000) before it filters and slices
+offset..offset+limit, so each page costs O(total articles). This seeds one
+user per size with that many articles and read states, then measures:
+
+  first    offset=0
+  deep     offset at 90% of the list
+  unread   unreadOnly=true, offset=0
+  feed     feedId=<one of the user's feeds>, offset=0
+
+for each size: latency (p50/p95), response bytes and articles returned,
+and in `simulate` the PostgREST requests and bytes behind one page. The
+report ends with a scaling curve (ms per 1k articles and the growth
+exponent between the smallest and largest size).
+
+  api        measure a deployment or `wrangler pages dev` whose SUPABASE_URL
+             is --supabase-url (the seed goes straight to PostgREST)
+  simulate   replay index.ts in Python against fake_supabase.py
+
+Usage:
+  python tests/articles_bench.py simulate
+  python tests/articles_bench.py simulate --sizes 1000,10000 --json bench.json
+  python tests/articles_bench.py simulate --baseline bench.json --tolerance 0.25
+  python tests/articles_bench.py api --sizes 1000,5000,10000
+
+--baseline compares p50 latency with an earlier --json run and exits 1 if
+any (size, scenario) is slower by more than --tolerance, so the benchmark
+can track the endpoint as it is improved.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+from datetime import datetime, timezone, timedelta
+
+from load_test import httpx, percentile, DEFAULT_BASE_URL, TEST_PASSWORD
+from refresh_driver import CountingClient, parse_list
+
+SCENARIOS = ['first', 'deep', 'unread', 'feed']
+PAGE_SIZE = 1000
+SEED_CHUNK = 1000
+ARTICLE_COLUMNS = ('id, feed_id, feed_title, title, url, description, published_at, fetched_at, '
+                   'expires_at, author, image_url')
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+# ── Seeding ────────────────────────────────────────────────────────
+
+class BenchUser:
+    """A user with `size` articles over --feeds feeds and --read-ratio of them read."""
+
+    def __init__(self, args, size):
+        self.args = args
+        self.size = size
+        self.email = f'articles-bench-{uuid.uuid4().hex[:8]}-{size}@example.com'
+        self.http = CountingClient(timeout=args.timeout)
+        self.uid = None
+        self.token = None
+        self.feed_ids = []
+
+    def rest(self, method, path, params=None, json_body=None, prefer=None):
+        headers = {'apikey': 'anon', 'Authorization': f'Bearer {self.token}'}
+        if prefer:
+            headers['Prefer'] = prefer
+        resp = self.http.request(method, f'{self.args.supabase_url}/rest/v1/{path}',
+                                 params=params, json=json_body, headers=headers)
+        resp.raise_for_status()
+        return resp.json() if resp.content else None
+
+    def sign_up(self):
+        if self.args.driver == 'api':
+            resp = self.http.request('POST', f'{self.args.base_url}/api/auth/register',
+                                     json={'email': self.email, 'password': TEST_PASSWORD})
+            resp.raise_for_status()
+            data = resp.json()
+            self.uid, self.token = data['user']['uid'], data['token']
+        else:
+            resp = self.http.request('POST', f'{self.args.supabase_url}/auth/v1/signup',
+                                     json={'email': self.email, 'password': TEST_PASSWORD},
+                                     headers={'apikey': 'anon'})
+            resp.raise_for_status()
+            session = resp.json()
+            self.uid, self.token = session['user']['id'], session['access_token']
+
+    def seed(self):
+        rng = random.Random(f'{self.args.seed}:{self.size}')
+        now = datetime.now(timezone.utc)
+        feeds = [{'id': str(uuid.uuid4()), 'user_id': self.uid, 'url': f'https://bench.example.com/{n}.xml',
+                  'title': f'Bench Feed {n}', 'last_fetched_at': now.isoformat(), 'order': n}
+                 for n in range(self.args.feeds)]
+        self.rest('POST', 'feeds', json_body=feeds)
+        self.feed_ids = [f['id'] for f in feeds]
+
+        description = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit. '
+                       * (self.args.description_bytes // 57 + 1))[:self.args.description_bytes]
+        # Spread over the 7-day retention window, newest first
+        step = timedelta(days=7) / max(self.size, 1)
+        articles, read = [], []
+        for k in range(self.size):
+            feed = feeds[k % len(feeds)]
+            guid = f"https://bench.example.com/{feed['id']}/{k}"
+            article_id = hashlib.sha256(f"{feed['id']}:{guid}".encode()).hexdigest()[:32]
+            published = now - step * k
+            articles.append({
+                'id': article_id, 'user_id': self.uid, 'feed_id': feed['id'], 'feed_title': feed['title'],
+                'title': f'Bench article {k}', 'url': guid, 'description': description,
+                'published_at': published.isoformat(), 'fetched_at': published.isoformat(),
+                'expires_at': (published + timedelta(days=7, hours=1)).isoformat(),
+                'author': f'author{k % 7}@example.com', 'image_url': f'https://bench.example.com/img/{k}.jpg',
+            })
+            if rng.random() < self.args.read_ratio:
+                read.append({'user_id': self.uid, 'article_id': article_id})
+        for table, rows in (('articles', articles), ('read_articles', read)):
+            for i in range(0, len(rows), SEED_CHUNK):
+                self.rest('POST', table, json_body=rows[i:i + SEED_CHUNK], prefer='return=minimal')
+        return len(read)
+
+    def cleanup(self):
+        if self.uid is None or self.args.keep:
+            return
+        if self.args.driver == 'api':
+            self.http.request('DELETE', f'{self.args.base_url}/api/user/account',
+                              headers={'Authorization': f'Bearer {self.token}'})
+            return
+        for table in ('read_articles', 'articles', 'feeds'):
+            self.rest('DELETE', table, {'user_id': f'eq.{self.uid}'})
+
+    # ── Requests ───────────────────────────────────────────────────
+
+    def get_articles_api(self, params):
+        resp = self.http.request('GET', f'{self.args.base_url}/api/articles', params=params,
+                                 headers={'Authorization': f'Bearer {self.token}'})
+        resp.raise_for_status()
+        return resp.content
+
+    def get_articles_simulated(self, params):
+        """functions/api/articles/index.ts, same PostgREST calls in the same order."""
+        limit = min(int(params.get('limit', 50)), 100)
+        offset = int(params.get('offset', 0))
+        feed_id = params.get('feedId')
+        unread_only = params.get('unreadOnly') == 'true'
+
+        feeds = self.rest('GET', 'feeds', {'select': 'id, last_fetched_at', 'user_id': f'eq.{self.uid}'})
+        valid_feed_ids = {f['id'] for f in feeds}
+
+        all_articles, page_offset = [], 0
+        now = datetime.now(timezone.utc).isoformat()
+        while True:
+            query = {'select': ARTICLE_COLUMNS, 'user_id': f'eq.{self.uid}', 'expires_at': f'gt.{now}',
+                     'order': 'published_at.desc.nullslast', 'offset': page_offset, 'limit': PAGE_SIZE}
+            if feed_id:
+                query['feed_id'] = f'eq.{feed_id}'
+            page = self.rest('GET', 'articles', query)
+            if not page:
+                break
+            all_articles.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            page_offset += PAGE_SIZE
+        filtered = [a for a in all_articles if a['feed_id'] in valid_feed_ids]
+
+        read_ids, page_offset = set(), 0
+        while True:
+            page = self.rest('GET', 'read_articles', {'select': 'article_id', 'user_id': f'eq.{self.uid}',
+                                                      'offset': page_offset, 'limit': PAGE_SIZE})
+            if not page:
+                break
+            read_ids.update(r['article_id'] for r in page)
+            if len(page) < PAGE_SIZE:
+                break
+            page_offset += PAGE_SIZE
+
+        articles = [{
+            'id': a['id'], 'feedId': a['feed_id'], 'feedTitle': a['feed_title'], 'title': a['title'],
+            'url': a['url'], 'description': a['description'], 'publishedAt': a['published_at'],
+            'fetchedAt': a['fetched_at'], 'expiresAt': a['expires_at'], 'author': a['author'],
+            'imageUrl': a['image_url'], 'isRead': a['id'] in read_ids,
+        } for a in filtered[offset:offset + limit]]
+        if unread_only:
+            articles = [a for a in articles if not a['isRead']]
+        return json.dumps({'articles': articles, 'shouldRefresh': False,
+                           'hasMore': offset + limit < len(filtered)}).encode()
+
+    def measure(self, scenario):
+        limit = self.args.limit
+        params = {'limit': limit, 'offset': 0}
+        if scenario == 'deep':
+            params['offset'] = int(self.size * 0.9) // limit * limit
+        elif scenario == 'unread':
+            params['unreadOnly'] = 'true'
+        elif scenario == 'feed':
+            params['feedId'] = self.feed_ids[0]
+        get = self.get_articles_api if self.args.driver == 'api' else self.get_articles_simulated
+
+        latencies = []
+        for i in range(self.args.warmup + self.args.repeat):
+            self.http.reset()
+            start = time.perf_counter()
+            body = get(params)
+            if i >= self.args.warmup:
+                latencies.append(time.perf_counter() - start)
+        # Counters are from the last request; the client's own request is not upstream
+        upstream = (self.http.calls, self.http.bytes) if self.args.driver == 'simulate' else (None, None)
+        return {
+            'size': self.size,
+            'scenario': scenario,
+            'offset': params['offset'],
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'response_bytes': len(body),
+            'returned': len(json.loads(body)['articles']),
+            'upstream_requests': upstream[0],
+            'upstream_bytes': upstream[1],
+        }
+
+
+# ── Report ─────────────────────────────────────────────────────────
+
+def growth_exponent(rows):
+    """k in latency ~ size^k between the smallest and largest size (1.0 = linear)."""
+    rows = sorted(rows, key=lambda r: r['size'])
+    if len(rows) < 2 or rows[0]['size'] == rows[-1]['size'] or rows[0]['p50_ms'] <= 0:
+        return None
+    return math.log(rows[-1]['p50_ms'] / rows[0]['p50_ms']) / math.log(rows[-1]['size'] / rows[0]['size'])
+
+
+def compare_baseline(results, path, tolerance):
+    with open(path, encoding='utf-8') as f:
+        baseline = {(r['size'], r['scenario']): r for r in json.load(f)['results']}
+    regressions = []
+    print()
+    print("-" * 70)
+    print(f"  Baseline: {path} (tolerance {tolerance:.0%})")
+    print("-" * 70)
+    for r in results:
+        before = baseline.get((r['size'], r['scenario']))
+        if not before:
+            continue
+        change = r['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0
+        flag = '  REGRESSION' if change > tolerance else ''
+        if flag:
+            regressions.append(r)
+        print(f"  {r['size']:>7,} {r['scenario']:<7} {before['p50_ms']:>9.1f} -> {r['p50_ms']:>9.1f}ms "
+              f"{change:>+7.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GET /api/articles against the number of articles")
+    parser.add_argument("driver", choices=["api", "simulate"],
+                        help="api: a running deployment; simulate: index.ts replayed against fake_supabase.py")
+    parser.add_argument("--sizes", default="1000,5000,10000,25000,50000",
+                        help="Articles per user (default: 1000,5000,10000,25000,50000)")
+    parser.add_argument("--scenarios", default=','.join(SCENARIOS), help=f"Default: {','.join(SCENARIOS)}")
+    parser.add_argument("--feeds", type=int, default=20, help="Feeds per user (default: 20)")
+    parser.add_argument("--read-ratio", type=float, default=0.5, help="Share of articles read (default: 0.5)")
+    parser.add_argument("--description-bytes", type=int, default=300, help="Description length (default: 300)")
+    parser.add_argument("--limit", type=int, default=50, help="Page size, as the clients use (default: 50)")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured requests per scenario (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured requests first (default: 1)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"api: API origin (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--supabase-url", default=os.getenv('SUPABASE_URL', 'http://127.0.0.1:54321'),
+                        help="Supabase URL to seed (default: $SUPABASE_URL or fake_supabase.py)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for read states (default: 1)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout (default: 300)")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded users and their data")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed p50 slowdown against --baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+    args.base_url = args.base_url.rstrip('/')
+    args.supabase_url = args.supabase_url.rstrip('/')
+
+    sizes = parse_list(args.sizes)
+    scenarios = parse_list(args.scenarios, str)
+    if any(s not in SCENARIOS for s in scenarios):
+        parser.error(f"--scenarios takes {', '.join(SCENARIOS)}")
+
+    print()
+    print("=" * 70)
+    print(f"  FeedOwn - Articles Listing Benchmark ({args.driver})")
+    print("=" * 70)
+    print(f"  Target:    {args.base_url if args.driver == 'api' else args.supabase_url}")
+    print(f"  Users:     {args.feeds} feeds, {args.read_ratio:.0%} read, "
+          f"{args.description_bytes}B descriptions, limit={args.limit}")
+    print(f"  Requests:  {args.warmup} warm-up + {args.repeat} measured per scenario")
+    print()
+    print("-" * 70)
+    print(f"  {'Articles':>8} {'Scenario':<8} {'Offset':>7} {'p50 ms':>9} {'p95 ms':>9} {'Response':>9} "
+          f"{'Rows':>5} {'Upstream':>14}")
+    print(f"  {'─'*8} {'─'*8} {'─'*7} {'─'*9} {'─'*9} {'─'*9} {'─'*5} {'─'*14}")
+
+    results = []
+    for size in sizes:
+        user = BenchUser(args, size)
+        try:
+            user.sign_up()
+            start = time.perf_counter()
+            read = user.seed()
+            print(f"  {size:>8,} seeded {size:,} articles, {read:,} read ({time.perf_counter() - start:.1f}s)")
+            for scenario in scenarios:
+                r = user.measure(scenario)
+                results.append(r)
+                upstream = (f"{r['upstream_requests']:>3} / {format_bytes(r['upstream_bytes']):>8}"
+                            if r['upstream_requests'] is not None else '-')
+                print(f"  {'':>8} {scenario:<8} {r['offset']:>7,} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                      f"{format_bytes(r['response_bytes']):>9} {r['returned']:>5} {upstream:>14}")
+        except httpx.HTTPError as e:
+            print(f"  {size:>8,} failed: {e}")
+        finally:
+            user.cleanup()
+
+    print()
+    print("-" * 70)
+    print("  Scaling (p50)")
+    print("-" * 70)
+    for scenario in scenarios:
+        rows = [r for r in results if r['scenario'] == scenario]
+        if not rows:
+            continue
+        per_1k = '  '.join(f"{r['size'] // 1000}k: {r['p50_ms'] / r['size'] * 1000:.1f}" for r in rows)
+        k = growth_exponent(rows)
+        print(f"  {scenario:<7} ms per 1k articles  {per_1k}")
+        if len(rows) > 1 and rows[-1]['size'] != rows[0]['size']:
+            marginal = (rows[-1]['p50_ms'] - rows[0]['p50_ms']) / (rows[-1]['size'] - rows[0]['size']) * 1000
+            print(f"  {'':<7} each extra 1k        +{marginal:.1f}ms")
+        print(f"  {'':<7} growth exponent     {k:.2f}" if k is not None else f"  {'':<7} growth exponent     -")
+    print()
+    print("  Growth exponent: latency ~ articles^k. 1.0 = every page costs O(total articles);")
+    print("  a paginated query would stay near 0.")
+    print("  Rows: articles returned. unreadOnly filters after the page is sliced, so it returns")
+    print(f"  fewer than limit={args.limit} once articles are read.")
+
+    regressions = compare_baseline(results, args.baseline, args.tolerance) if args.baseline else []
+    print()
+    print("=" * 70)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'driver': args.driver, 'limit': args.limit, 'results': results}, f, indent=2)
+        print(f"  Results written to {args.json}")
+
+    sys.exit(1 if regressions or len(results) < len(sizes) * len(scenarios) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for POST /api/articles/batch-read and GET /api/article-content.
+
+  batch-read       sweeps the number of IDs per request (default 10 to 1000).
+                   The endpoint selects the existing read_articles with
+                   article_id=in.(...) - every ID goes into the PostgREST URL -
+                   then inserts the rest. Each size is measured for new IDs
+                   and for the same IDs again (all already read), with the
+                   filter URL length and a check that the marks were stored.
+  article-content  requests each page of a local article corpus (fake_feeds.py
+                   /articles/<n>/<k>) several times and reports latency,
+                   payload size and whether the repeats were served from a
+                   cache: cache headers, and how many times the origin was
+                   actually fetched (fake_feeds.py /_stats).
+
+batch-read runs against the API (--driver api) or replays the endpoint
+against fake_supabase.py (--driver simulate). article-content needs the
+API (Readability runs in the Function), e.g. `wrangler pages dev` with
+fake_feeds.py as the origin.
+
+Usage:
+  python tests/endpoint_bench.py batch-read --driver simulate
+  python tests/endpoint_bench.py batch-read --sizes 10,100,500 --base-url https://xxxx.feedown.pages.dev
+  python tests/endpoint_bench.py article-content --pages 10 --repeat 3
+  python tests/endpoint_bench.py article-content --article-url 'https://example.com/post/{n}' --no-origin-stats
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from load_test import httpx, percentile, DEFAULT_BASE_URL, TEST_PASSWORD
+from refresh_driver import CountingClient, parse_list
+from articles_bench import format_bytes
+
+DEFAULT_ARTICLE_URL = 'http://127.0.0.1:8791/articles/{n}/1'   # tests/fake_feeds.py
+URL_WARN_BYTES = 8192   # common request-line limit of proxies in front of PostgREST
+
+
+# ── batch-read ─────────────────────────────────────────────────────
+
+class ReadUser:
+    """A fresh user who marks synthetic article IDs as read."""
+
+    def __init__(self, args):
+        self.args = args
+        self.http = CountingClient(timeout=args.timeout)
+        self.email = f'batch-read-{uuid.uuid4().hex[:8]}@example.com'
+        self.uid = None
+        self.token = None
+        self.next_id = 0
+
+    def sign_up(self):
+        if self.args.driver == 'api':
+            resp = self.http.request('POST', f'{self.args.base_url}/api/auth/register',
+                                     json={'email': self.email, 'password': TEST_PASSWORD})
+            resp.raise_for_status()
+            data = resp.json()
+            self.uid, self.token = data['user']['uid'], data['token']
+        else:
+            resp = self.http.request('POST', f'{self.args.supabase_url}/auth/v1/signup',
+                                     json={'email': self.email, 'password': TEST_PASSWORD},
+                                     headers={'apikey': 'anon'})
+            resp.raise_for_status()
+            session = resp.json()
+            self.uid, self.token = session['user']['id'], session['access_token']
+
+    def new_ids(self, count):
+        ids = [uuid.uuid5(uuid.NAMESPACE_URL, f'{self.uid}/{self.next_id + i}').hex for i in range(count)]
+        self.next_id += count
+        return ids
+
+    def filter_url(self, ids):
+        """The URL supabase-js builds for .select('article_id').eq('user_id').in('article_id', ids)."""
+        query = urlencode({'select': 'article_id', 'user_id': f'eq.{self.uid}',
+                           'article_id': f"in.({','.join(ids)})"})
+        return f'{self.args.supabase_url}/rest/v1/read_articles?{query}'
+
+    def rest_headers(self, prefer=None):
+        headers = {'apikey': 'anon', 'Authorization': f'Bearer {self.token}'}
+        if prefer:
+            headers['Prefer'] = prefer
+        return headers
+
+    def batch_read_api(self, ids):
+        resp = self.http.request('POST', f'{self.args.base_url}/api/articles/batch-read',
+                                 json={'articleIds': ids}, headers={'Authorization': f'Bearer {self.token}'})
+        resp.raise_for_status()
+        return resp.json()
+
+    def batch_read_simulated(self, ids):
+        """functions/api/articles/batch-read.ts; errors are logged and ignored there too."""
+        resp = self.http.request('GET', self.filter_url(ids), headers=self.rest_headers())
+        existing = {r['article_id'] for r in resp.json()} if resp.status_code == 200 else set()
+        new = [i for i in ids if i not in existing]
+        if not new:
+            return {'success': True, 'added': 0, 'total': len(existing)}
+        now = datetime.now(timezone.utc).isoformat()
+        self.http.request('POST', f'{self.args.supabase_url}/rest/v1/read_articles',
+                          json=[{'user_id': self.uid, 'article_id': i, 'read_at': now} for i in new],
+                          headers=self.rest_headers('return=minimal'))
+        return {'success': True, 'added': len(new), 'total': len(existing) + len(new)}
+
+    def stored(self):
+        """read_articles rows for this user, from Content-Range."""
+        resp = self.http.request('GET', f'{self.args.supabase_url}/rest/v1/read_articles',
+                                 params={'select': 'article_id', 'user_id': f'eq.{self.uid}', 'limit': 1},
+                                 headers=self.rest_headers('count=exact'))
+        total = resp.headers.get('Content-Range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+
+    def cleanup(self):
+        if self.uid is None or self.args.keep:
+            return
+        if self.args.driver == 'api':
+            self.http.request('DELETE', f'{self.args.base_url}/api/user/account',
+                              headers={'Authorization': f'Bearer {self.token}'})
+        else:
+            self.http.request('DELETE', f'{self.args.supabase_url}/rest/v1/read_articles',
+                              params={'user_id': f'eq.{self.uid}'}, headers=self.rest_headers())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run_batch_read(args):
+    sizes = parse_list(args.sizes)
+    print()
+    print("=" * 70)
+    print(f"  FeedOwn - batch-read Benchmark ({args.driver})")
+    print("=" * 70)
+    print(f"  Target:    {args.base_url if args.driver == 'api' else args.supabase_url}")
+    print(f"  Requests:  {args.repeat} per size with new IDs, then the same IDs again")
+    print(f"  Workload:  marking {args.total:,} articles read, in batches of each size")
+    print()
+    print("-" * 70)
+    print(f"  {'IDs':>5} {'new p50':>8} {'p95':>8} {'again':>8} {'Body':>8} {'Filter URL':>10} "
+          f"{'IDs/s':>7} {'Reqs':>5} {'Total s':>8} {'Stored':>7}")
+    print(f"  {'─'*5} {'─'*8} {'─'*8} {'─'*8} {'─'*8} {'─'*10} {'─'*7} {'─'*5} {'─'*8} {'─'*7}")
+
+    results = []
+    for size in sizes:
+        user = ReadUser(args)
+        try:
+            user.sign_up()
+            call = user.batch_read_api if args.driver == 'api' else user.batch_read_simulated
+            new_times, again_times, added = [], [], 0
+            for _ in range(args.repeat):
+                ids = user.new_ids(size)
+                elapsed, data = timed(call, ids)
+                new_times.append(elapsed)
+                added += data.get('added', 0)
+                elapsed, _ = timed(call, ids)
+                again_times.append(elapsed)
+            stored = user.stored()
+            p50 = percentile(new_times, 50)
+            requests_needed = math.ceil(args.total / size)
+            url_bytes = len(user.filter_url(ids))
+            r = {
+                'size': size,
+                'new_p50_ms': p50 * 1000,
+                'new_p95_ms': percentile(new_times, 95) * 1000,
+                'again_p50_ms': percentile(again_times, 50) * 1000,
+                'body_bytes': len(json.dumps({'articleIds': ids})),
+                'filter_url_bytes': url_bytes,
+                'ids_per_s': size / p50 if p50 else 0,
+                'requests_for_total': requests_needed,
+                'total_s': requests_needed * p50,
+                'expected': size * args.repeat,
+                'reported_added': added,
+                'stored': stored,
+            }
+            results.append(r)
+            stored_text = '-' if stored is None else f"{stored / r['expected']:.0%}"
+            print(f"  {size:>5} {r['new_p50_ms']:>8.1f} {r['new_p95_ms']:>8.1f} {r['again_p50_ms']:>8.1f} "
+                  f"{format_bytes(r['body_bytes']):>8} {format_bytes(url_bytes):>9}{'!' if url_bytes > URL_WARN_BYTES else ' '} "
+                  f"{r['ids_per_s']:>7,.0f} {requests_needed:>5} {r['total_s']:>8.2f} {stored_text:>7}")
+        except httpx.HTTPError as e:
+            print(f"  {size:>5} failed: {e}")
+        finally:
+            user.cleanup()
+
+    print()
+    print("  again: the same IDs a second time (all already read, select only).")
+    print(f"  Filter URL: the article_id=in.(...) query; '!' = over {URL_WARN_BYTES // 1024}KB, which proxies")
+    print("  may reject. The endpoint ignores a failed select and still reports success.")
+    print("  Stored: read marks in read_articles / marks sent.")
+    if results:
+        best = min(results, key=lambda r: r['total_s'])
+        safe = [r for r in results if r['filter_url_bytes'] <= URL_WARN_BYTES and r['stored'] != 0]
+        print()
+        print(f"  Fastest for {args.total:,} reads: {best['size']} IDs per request ({best['total_s']:.2f}s)")
+        if safe:
+            pick = min(safe, key=lambda r: r['total_s'])
+            print(f"  Fastest with the filter URL under {URL_WARN_BYTES // 1024}KB: {pick['size']} IDs "
+                  f"({pick['total_s']:.2f}s)")
+    print()
+    print("=" * 70)
+    return {'benchmark': 'batch-read', 'driver': args.driver, 'results': results}
+
+
+# ── article-content ────────────────────────────────────────────────
+
+def origin_hits(args):
+    if args.no_origin_stats:
+        return None
+    try:
+        resp = httpx.get(f'{args.origin_url}/_stats', timeout=5)
+        return resp.json().get('articles', 0) if resp.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+def run_article_content(args):
+    print()
+    print("=" * 70)
+    print("  FeedOwn - article-content Benchmark")
+    print("=" * 70)
+    print(f"  Target:    {args.base_url}")
+    print(f"  Pages:     {args.pages} x {args.repeat} requests, from {args.article_url}")
+    print()
+    print("-" * 70)
+    print(f"  {'Page':>4} {'Req':>3} {'Status':>6} {'ms':>8} {'Payload':>9} {'Text':>7} {'Origin':>6} "
+          f"{'CF-Cache':>9} {'Age':>5}  Cache-Control")
+    print(f"  {'─'*4} {'─'*3} {'─'*6} {'─'*8} {'─'*9} {'─'*7} {'─'*6} {'─'*9} {'─'*5}  {'─'*20}")
+
+    results = []
+    client = httpx.Client(base_url=args.base_url, timeout=args.timeout)
+    for n in range(args.pages):
+        url = args.article_url.format(n=n)
+        for attempt in range(1, args.repeat + 1):
+            before = origin_hits(args)
+            start = time.perf_counter()
+            try:
+                resp = client.get('/api/article-content', params={'url': url})
+            except httpx.HTTPError as e:
+                print(f"  {n:>4} {attempt:>3} failed: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            after = origin_hits(args)
+            try:
+                article = resp.json().get('article') or {}
+            except ValueError:
+                article = {}
+            r = {
+                'page': n,
+                'attempt': attempt,
+                'status': resp.status_code,
+                'ms': elapsed * 1000,
+                'payload_bytes': len(resp.content),
+                'text_length': article.get('length'),
+                'origin_fetches': after - before if before is not None and after is not None else None,
+                'cf_cache_status': resp.headers.get('CF-Cache-Status'),
+                'age': resp.headers.get('Age'),
+                'cache_control': resp.headers.get('Cache-Control'),
+            }
+            results.append(r)
+            origin = '-' if r['origin_fetches'] is None else r['origin_fetches']
+            print(f"  {n:>4} {attempt:>3} {r['status']:>6} {r['ms']:>8.1f} {format_bytes(r['payload_bytes']):>9} "
+                  f"{r['text_length'] or '-':>7} {origin:>6} {r['cf_cache_status'] or '-':>9} "
+                  f"{r['age'] or '-':>5}  {r['cache_control'] or '-'}")
+
+    first = [r for r in results if r['attempt'] == 1 and r['status'] == 200]
+    repeats = [r for r in results if r['attempt'] > 1 and r['status'] == 200]
+    print()
+    print("-" * 70)
+    print("  Summary")
+    print("-" * 70)
+    for label, rows in (('First request', first), ('Repeats', repeats)):
+        if not rows:
+            continue
+        ms = [r['ms'] for r in rows]
+        print(f"  {label:<14} p50 {percentile(ms, 50):>8.1f}ms   p95 {percentile(ms, 95):>8.1f}ms   "
+              f"payload {format_bytes(sum(r['payload_bytes'] for r in rows) / len(rows))} avg")
+    counted = [r for r in repeats if r['origin_fetches'] is not None]
+    hits = [r for r in repeats if r['cf_cache_status'] == 'HIT']
+    if counted:
+        fetched = sum(1 for r in counted if r['origin_fetches'] > 0)
+        print(f"  Repeats that fetched the origin again: {fetched} / {len(counted)}"
+              f"{'  (no cache in front of the extraction)' if fetched == len(counted) else ''}")
+    print(f"  Repeats with CF-Cache-Status: HIT:     {len(hits)} / {len(repeats)}")
+    print()
+    print("=" * 70)
+    return {'benchmark': 'article-content', 'results': results}
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"API origin (default: {DEFAULT_BASE_URL})")
+    common.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (default: 60)")
+    common.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+
+    parser = argparse.ArgumentParser(description="Benchmark batch-read and article-content")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_read = sub.add_parser("batch-read", parents=[common], help="Sweep IDs per POST /api/articles/batch-read")
+    p_read.add_argument("--driver", choices=["api", "simulate"], default="api",
+                        help="api: a running deployment; simulate: replay against fake_supabase.py (default: api)")
+    p_read.add_argument("--sizes", default="10,50,100,250,500,1000",
+                        help="IDs per request (default: 10,50,100,250,500,1000)")
+    p_read.add_argument("--repeat", type=int, default=5, help="Requests per size (default: 5)")
+    p_read.add_argument("--total", type=int, default=1000,
+                        help="Reads to mark for the 'Total s' estimate (default: 1000)")
+    p_read.add_argument("--supabase-url", default=os.getenv('SUPABASE_URL', 'http://127.0.0.1:54321'),
+                        help="Supabase URL for simulate and the stored check (default: $SUPABASE_URL or fake_supabase.py)")
+    p_read.add_argument("--keep", action="store_true", help="Keep the test users and their read marks")
+
+    p_content = sub.add_parser("article-content", parents=[common], help="Repeat GET /api/article-content over an article corpus")
+    p_content.add_argument("--article-url", default=DEFAULT_ARTICLE_URL,
+                           help=f"Article URL template, {{n}} = 0..pages-1 (default: {DEFAULT_ARTICLE_URL})")
+    p_content.add_argument("--pages", type=int, default=10, help="Distinct article pages (default: 10)")
+    p_content.add_argument("--repeat", type=int, default=3, help="Requests per page (default: 3)")
+    p_content.add_argument("--origin-url", default='http://127.0.0.1:8791',
+                           help="fake_feeds.py, for origin fetch counts (default: http://127.0.0.1:8791)")
+    p_content.add_argument("--no-origin-stats", action="store_true",
+                           help="The origin is not fake_feeds.py; rely on cache headers only")
+    args = parser.parse_args(argv)
+    args.base_url = args.base_url.rstrip('/')
+
+    if args.command == 'batch-read':
+        args.supabase_url = args.supabase_url.rstrip('/')
+        report = run_batch_read(args)
+    else:
+        args.origin_url = args.origin_url.rstrip('/')
+        report = run_article_content(args)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"  Results written to {args.json}")
+
+    sys.exit(0 if report['results'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Local Cloudflare API stand-in for offline benchmarks of check_cloudflare.py.
+
+Implements the endpoints the admin scripts call, with synthetic data:
+
+  REST     GET /user/tokens/verify
+           GET /accounts/{id}/workers/scripts
+           GET /accounts/{id}/storage/kv/namespaces
+           GET /accounts/{id}/pages/projects
+           GET /accounts/{id}/pages/projects/{name}/deployments?page=&per_page=
+  GraphQL  POST /graphql for the aliased analytics query built by
+           check_cloudflare.build_analytics_query(): workersInvocationsAdaptive,
+           pagesFunctionsInvocationsAdaptiveGroups, kvOperationsAdaptiveGroups
+           and kvStorageAdaptiveGroups, by date or datetimeHour
+
+Analytics rows are generated from (seed, dataset, bucket, key), so a bucket
+returns the same numbers on every run and the incremental analytics cache
+behaves as it does against the real API. Only today's (and this hour's)
+bucket grows while the server runs.
+
+Usage:
+  python tests/fake_cloudflare.py
+  python tests/fake_cloudflare.py --requests-per-day 90000 --deployments 600
+  python tests/fake_cloudflare.py --latency 150 --jitter 100 --rate-limit 240
+
+Then point the scripts at it:
+  export CLOUDFLARE_API_URL=http://127.0.0.1:8790
+  export CLOUDFLARE_API_TOKEN=fake
+  python scripts/feedown_admin.py cloudflare --hourly --http-stats
+"""
+
+import os
+import re
+import math
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime, timezone, timedelta
+
+from fake_server import FakeHandler, parser_with_server_arguments, serve
+
+DEFAULT_PORT = 8790  # next to `wrangler dev` (8787)
+
+PROXY_WORKER = 'feedown-worker'
+PAGES_PROJECT = 'feedown'
+CACHE_NAMESPACE_ID = os.getenv('CLOUDFLARE_KV_CACHE_ID', '76c3c4142838463b8a3b1656e750aa1c')
+
+CACHE_HIT_RATIO = 0.7   # share of proxy reads served from KV without a write
+HISTORY_DAYS = 90       # how far back deployments go
+
+# GraphQL dataset -> the dimension that keys its rows (besides the time bucket)
+DATASETS = {
+    'workersInvocationsAdaptive': 'scriptName',
+    'pagesFunctionsInvocationsAdaptiveGroups': 'scriptName',
+    'kvOperationsAdaptiveGroups': 'namespaceId',
+    'kvStorageAdaptiveGroups': 'namespaceId',
+}
+KV_ACTIONS = ('read', 'write', 'list', 'delete')
+
+# alias: dataset(filter: {...} limit: N ...) { selection }
+_FIELD = re.compile(r'(\w+):\s*(\w+)\(\s*filter:\s*\{([^}]*)\}\s*limit:\s*(\d+)[^)]*\)\s*\{')
+_FILTER = re.compile(r'(\w+)_(geq|leq|gt|lt):\s*\$(\w+)')
+_BLOCK = re.compile(r'(sum|max|quantiles|dimensions)\s*\{([^}]*)\}')
+
+
+def now_utc():
+    return datetime.now(timezone.utc)
+
+
+def format_time(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def synthetic_id(*parts, length=32):
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()[:length]
+
+
+def synthetic_uuid(*parts):
+    h = synthetic_id(*parts)
+    return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}'
+
+
+def envelope(result, result_info=None):
+    body = {'success': True, 'errors': [], 'messages': [], 'result': result}
+    if result_info is not None:
+        body['result_info'] = result_info
+    return body
+
+
+def cf_error(code, message):
+    return {'success': False, 'errors': [{'code': code, 'message': message}], 'messages': [], 'result': None}
+
+
+# ── Synthetic Account ──────────────────────────────────────────────
+
+class Account:
+    """The scripts, namespaces, projects and deployments the fake serves."""
+
+    def __init__(self, args):
+        self.seed = args.seed
+        self.requests_per_day = args.requests_per_day
+        self.pages_functions = not args.no_pages_functions
+        start = now_utc() - timedelta(days=HISTORY_DAYS)
+
+        self.scripts = [PROXY_WORKER] + [f'worker-{i}' for i in range(1, args.scripts)]
+        self.namespaces = [(CACHE_NAMESPACE_ID, 'CACHE')] + [
+            (synthetic_id(self.seed, 'namespace', i), f'namespace-{i}') for i in range(1, args.namespaces)]
+        self.projects = [PAGES_PROJECT] + [f'project-{i}' for i in range(1, args.projects)]
+
+        # Deployments spread evenly over the history, newest first
+        self.deployments = {}
+        for p, name in enumerate(self.projects):
+            count = args.deployments if name == PAGES_PROJECT else max(1, args.deployments // 10)
+            step = timedelta(days=HISTORY_DAYS) / count
+            self.deployments[name] = [{
+                'id': synthetic_uuid(self.seed, name, i),
+                'short_id': synthetic_id(self.seed, name, i, length=8),
+                'project_name': name,
+                'environment': 'production' if i % 3 == 0 else 'preview',
+                'created_on': format_time(start + step * (i + 1) - timedelta(minutes=p)),
+                'url': f'https://{synthetic_id(self.seed, name, i, length=8)}.{name}.pages.dev',
+            } for i in reversed(range(count))]
+        self.created_on = format_time(start)
+
+    # ── Analytics ──────────────────────────────────────────────────
+
+    def keys(self, dataset):
+        if dataset in ('kvOperationsAdaptiveGroups', 'kvStorageAdaptiveGroups'):
+            return [ns for ns, _ in self.namespaces]
+        if dataset == 'pagesFunctionsInvocationsAdaptiveGroups':
+            return [f'pages-worker--{PAGES_PROJECT}-production']
+        return self.scripts
+
+    def daily_requests(self, dataset, key, date, rng):
+        """Requests for a whole day (before scaling partial buckets)."""
+        if dataset == 'pagesFunctionsInvocationsAdaptiveGroups':
+            base = self.requests_per_day
+        elif key == PROXY_WORKER:
+            # The proxy handles every feed fetch the Pages Functions trigger
+            base = self.requests_per_day * 0.6
+        else:
+            base = self.requests_per_day * 0.02
+        weekend = 0.8 if date.weekday() >= 5 else 1.0
+        return base * weekend * rng.uniform(0.8, 1.2)
+
+    def bucket_fraction(self, bucket, start):
+        """Share of a bucket that has elapsed (1 for past buckets)."""
+        length = timedelta(days=1) if bucket == 'date' else timedelta(hours=1)
+        elapsed = (now_utc() - start) / length
+        return min(1.0, max(0.0, elapsed))
+
+    def buckets(self, bucket, since, until):
+        """Bucket start times from since to until (inclusive), no later than now."""
+        now = now_utc()
+        if bucket == 'date':
+            step = timedelta(days=1)
+            current = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            step = timedelta(hours=1)
+            current = since.replace(minute=0, second=0, microsecond=0)
+        end = min(until, now)
+        while current <= end:
+            yield current
+            current += step
+
+    def row(self, dataset, bucket, start, key, blocks):
+        """Analytics groups for `key` in the bucket starting at `start`."""
+        bucket_value = start.strftime('%Y-%m-%d') if bucket == 'date' else start.strftime('%Y-%m-%dT%H:%M:%SZ')
+        rng = random.Random(f'{self.seed}:{dataset}:{start.date()}:{key}')
+        # Share of the day's volume that falls in this bucket so far
+        scale = self.bucket_fraction(bucket, start)
+        if bucket != 'date':
+            # Diurnal profile peaking mid-afternoon UTC, with hourly noise
+            hourly = random.Random(f'{self.seed}:{dataset}:{bucket_value}:{key}')
+            scale *= (1 + 0.6 * math.sin((start.hour - 9) / 24 * 2 * math.pi)) / 24 * hourly.uniform(0.85, 1.15)
+        requests = self.daily_requests(dataset, key, start, rng) * scale
+
+        dims = {bucket: bucket_value, DATASETS[dataset]: key}
+        out = []
+        if dataset == 'kvOperationsAdaptiveGroups':
+            # CACHE is read once per proxy request (same numbers as the proxy's Workers rows)
+            if key == CACHE_NAMESPACE_ID:
+                proxy_rng = random.Random(f'{self.seed}:workersInvocationsAdaptive:{start.date()}:{PROXY_WORKER}')
+                reads = self.daily_requests('workersInvocationsAdaptive', PROXY_WORKER, start, proxy_rng) * scale
+            else:
+                reads = requests * 0.05
+            ops = {'read': reads, 'write': reads * (1 - CACHE_HIT_RATIO),
+                   'list': reads * 0.001, 'delete': reads * 0.0005}
+            for action in KV_ACTIONS:
+                if ops[action] >= 1:
+                    out.append({'dimensions': {**dims, 'actionType': action},
+                                'sum': {'requests': int(ops[action])}})
+        elif dataset == 'kvStorageAdaptiveGroups':
+            # Cache entries expire, so the key count hovers around a day's writes
+            keys = int(self.requests_per_day * 0.6 * (1 - CACHE_HIT_RATIO) * rng.uniform(0.9, 1.1))
+            if key != CACHE_NAMESPACE_ID:
+                keys //= 50
+            out.append({'dimensions': dims, 'max': {'keyCount': keys, 'byteCount': keys * 48_000}})
+        else:
+            requests = int(requests)
+            errors = int(requests * rng.uniform(0.001, 0.02))
+            p50 = rng.uniform(0.6, 1.6) * (1.5 if dataset.startswith('pages') else 1)
+            out.append({
+                'dimensions': dims,
+                'sum': {'requests': requests, 'errors': errors,
+                        'subrequests': int(requests * (1.3 if key == PROXY_WORKER else 0.2))},
+                # Microseconds, like the real dataset
+                'quantiles': {
+                    'cpuTimeP50': p50 * 1000, 'cpuTimeP90': p50 * 2 * 1000, 'cpuTimeP99': p50 * 4 * 1000,
+                    'wallTimeP50': p50 * 100 * 1000, 'wallTimeP90': p50 * 400 * 1000,
+                    'wallTimeP99': p50 * 1500 * 1000,
+                },
+            })
+
+        # Keep only what the query selected
+        return [{name: {f: r[name].get(f) for f in fields} if name != 'dimensions'
+                 else {f: r['dimensions'].get(f) for f in fields}
+                 for name, fields in blocks.items() if name in r} for r in out]
+
+    def query(self, alias, dataset, bucket, since, until, limit, blocks):
+        rows = []
+        for start in self.buckets(bucket, since, until):
+            for key in self.keys(dataset):
+                rows.extend(self.row(dataset, bucket, start, key, blocks))
+        return rows[:limit]
+
+
+def parse_variable_time(value):
+    if len(value) == 10:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def parse_analytics_query(query, variables):
+    """[(alias, dataset, bucket, since, until, limit, {block: [fields]})] from the query text."""
+    fields = []
+    matches = list(_FIELD.finditer(query))
+    for i, m in enumerate(matches):
+        alias, dataset, filter_text, limit = m.group(1), m.group(2), m.group(3), int(m.group(4))
+        selection = query[m.end():matches[i + 1].start() if i + 1 < len(matches) else len(query)]
+        blocks = {name: body.split() for name, body in _BLOCK.findall(selection)}
+
+        bucket, since, until = 'date', None, None
+        for field, op, var in _FILTER.findall(filter_text):
+            bucket = field
+            value = parse_variable_time(variables[var])
+            if op in ('geq', 'gt'):
+                since = value
+            else:
+                # date_leq covers the whole day
+                until = value + timedelta(days=1) - timedelta(microseconds=1) if field == 'date' else value
+        fields.append((alias, dataset, bucket, since, until or now_utc(), limit, blocks))
+    return fields
+
+
+# ── Handler ────────────────────────────────────────────────────────
+
+class CloudflareHandler(FakeHandler):
+    account = None
+    rate_limit = 0          # requests per minute, 0 for none
+    _window = []
+    _window_lock = threading.Lock()
+
+    def rate_limited(self):
+        """True (and answers 429) when the last minute already used the rate limit."""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._window_lock:
+            while self._window and self._window[0] <= now - 60:
+                self._window.pop(0)
+            if len(self._window) >= self.rate_limit:
+                retry = max(1, math.ceil(self._window[0] + 60 - now))
+                self.send_json(429, cf_error(10000, 'Rate limited'), {'Retry-After': str(retry)})
+                return True
+            self._window.append(now)
+        return False
+
+    def dispatch(self, method):
+        if self.rate_limited():
+            return
+        if not (self.headers.get('Authorization') or '').startswith('Bearer '):
+            return self.send_json(400, cf_error(6003, 'Invalid request headers'))
+
+        route = self.route.rstrip('/')
+        if method == 'POST' and route == '/graphql':
+            return self.graphql()
+        if method != 'GET':
+            return self.send_json(405, cf_error(10405, f'{method} not allowed'))
+        if route == '/user/tokens/verify':
+            return self.send_json(200, envelope({'id': synthetic_id('token'), 'status': 'active'}))
+
+        parts = route.split('/')
+        # /accounts/{id}/...
+        if len(parts) < 4 or parts[1] != 'accounts':
+            return self.send_json(404, cf_error(7003, f'No route for {route}'))
+        resource = '/'.join(parts[3:])
+        account = self.account
+        if resource == 'workers/scripts':
+            return self.send_json(200, envelope([
+                {'id': name, 'created_on': account.created_on, 'modified_on': account.created_on}
+                for name in account.scripts]))
+        if resource == 'storage/kv/namespaces':
+            return self.send_json(200, envelope([
+                {'id': ns, 'title': title, 'supports_url_encoding': True} for ns, title in account.namespaces]))
+        if resource == 'pages/projects':
+            return self.send_json(200, envelope([{
+                'name': name,
+                'subdomain': f'{name}.pages.dev',
+                'production_branch': 'main',
+                'created_on': account.created_on,
+                'latest_deployment': (account.deployments[name] or [None])[0],
+            } for name in account.projects]))
+        if len(parts) == 7 and parts[3:5] == ['pages', 'projects'] and parts[6] == 'deployments':
+            return self.deployments(parts[5])
+        return self.send_json(404, cf_error(7003, f'No route for {route}'))
+
+    def deployments(self, project):
+        if project not in self.account.deployments:
+            return self.send_json(404, cf_error(8000007, 'Project not found'))
+        args = dict(self.query)
+        page = max(1, int(args.get('page') or 1))
+        per_page = min(25, max(1, int(args.get('per_page') or 25)))
+        deployments = self.account.deployments[project]
+        chunk = deployments[(page - 1) * per_page:page * per_page]
+        self.send_json(200, envelope(chunk, {
+            'page': page,
+            'per_page': per_page,
+            'count': len(chunk),
+            'total_count': len(deployments),
+            'total_pages': math.ceil(len(deployments) / per_page),
+        }))
+
+    def graphql(self):
+        body = self.read_json() or {}
+        try:
+            fields = parse_analytics_query(body.get('query') or '', body.get('variables') or {})
+        except (KeyError, ValueError) as e:
+            return self.send_json(200, {'data': None, 'errors': [{'message': f'bad variables: {e}'}]})
+
+        # An unavailable dataset fails the whole query, as it does on Cloudflare
+        errors = []
+        for alias, dataset, *_ in fields:
+            if dataset not in DATASETS or (dataset.startswith('pages') and not self.account.pages_functions):
+                errors.append({
+                    'message': f'{dataset}: access to this dataset is not allowed for this account',
+                    'path': ['viewer', 'accounts', 0, alias],
+                })
+        if errors:
+            return self.send_json(200, {'data': None, 'errors': errors})
+
+        result = {alias: self.account.query(alias, dataset, bucket, since, until, limit, blocks)
+                  for alias, dataset, bucket, since, until, limit, blocks in fields}
+        self.send_json(200, {'data': {'viewer': {'accounts': [result]}}, 'errors': None})
+
+
+def main():
+    parser = parser_with_server_arguments("FeedOwn local Cloudflare API stand-in", DEFAULT_PORT)
+    parser.add_argument("--requests-per-day", type=int, default=3_000,
+                        help="Pages Functions invocations per day; Workers and KV scale with it (default: 3000)")
+    parser.add_argument("--scripts", type=int, default=2, help="Workers scripts, including feedown-worker (default: 2)")
+    parser.add_argument("--namespaces", type=int, default=2, help="KV namespaces, including CACHE (default: 2)")
+    parser.add_argument("--projects", type=int, default=1, help="Pages projects, including feedown (default: 1)")
+    parser.add_argument("--deployments", type=int, default=120,
+                        help=f"Deployments of the feedown project over {HISTORY_DAYS} days (default: 120)")
+    parser.add_argument("--rate-limit", type=int, default=0, metavar="N",
+                        help="Answer 429 with Retry-After beyond N requests per minute (default: off)")
+    parser.add_argument("--no-pages-functions", action="store_true",
+                        help="Fail queries on pagesFunctionsInvocationsAdaptiveGroups (analytics not enabled)")
+    args = parser.parse_args()
+
+    CloudflareHandler.account = Account(args)
+    CloudflareHandler.rate_limit = args.rate_limit
+    serve(CloudflareHandler, args, "Fake Cloudflare API")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Local RSS origin for load tests of the Pages Functions.
+
+POST /api/feeds and POST /api/refresh fetch each feed URL directly, so a
+load test against `wrangler pages dev` needs feed hosts that answer fast
+and predictably. This server serves synthetic RSS 2.0 feeds:
+
+  GET /feeds/<n>.xml    feed n with --items items; a new item is published
+                        every --interval seconds, so refreshes find new articles
+  GET /articles/<n>/<k> the HTML page of item k (what /api/article-content
+                        extracts), --paragraphs paragraphs with relative images
+  GET /_stats           requests served per route, to tell whether a
+                        repeated request reached the origin
+
+With --html-ratio, that share of feeds answers with an HTML page instead
+(the "feed returned HTML" case the refresh rate limit was added for).
+
+Usage:
+  python tests/fake_feeds.py
+  python tests/fake_feeds.py --items 50 --interval 60 --latency 200 --jitter 300
+  python tests/fake_feeds.py --paragraphs 40
+"""
+
+import time
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from fake_server import FakeHandler, parser_with_server_arguments, serve
+
+DEFAULT_PORT = 8791
+
+LOREM = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt '
+         'ut labore et dolore magna aliqua. ')
+
+
+def render_feed(base_url, n, items, interval, description_bytes, now=None):
+    """RSS 2.0 for feed n: the latest `items` items, one published every `interval` seconds."""
+    now = now or time.time()
+    latest = int(now // interval)
+    body = (LOREM * (description_bytes // len(LOREM) + 1))[:description_bytes]
+    entries = []
+    for k in range(latest, latest - items, -1):
+        published = datetime.fromtimestamp(k * interval, timezone.utc)
+        link = f'{base_url}/articles/{n}/{k}'
+        entries.append(f"""    <item>
+      <title>Feed {n} item {k}</title>
+      <link>{escape(link)}</link>
+      <guid>{escape(link)}</guid>
+      <pubDate>{format_datetime(published)}</pubDate>
+      <author>author{k % 7}@example.com</author>
+      <description>{escape(body)}</description>
+      <enclosure url="{escape(base_url)}/img/{n}/{k}.jpg" type="image/jpeg" length="0"/>
+    </item>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>Fake Feed {n}</title>
+    <link>{escape(base_url)}/feeds/{n}</link>
+    <description>Synthetic feed {n} for FeedOwn load tests</description>
+    <lastBuildDate>{format_datetime(datetime.fromtimestamp(latest * interval, timezone.utc))}</lastBuildDate>
+{chr(10).join(entries)}
+  </channel>
+</rss>
+"""
+
+
+def render_article(n, k, paragraphs):
+    """A news-site article page: navigation, the article itself, related links and a footer."""
+    body = '\n'.join(
+        f'      <p>Paragraph {p} of item {k}. {LOREM * 3}<a href="/articles/{n}/{k - p - 1}">Related</a></p>'
+        + (f'\n      <figure><img src="/img/{n}/{k}-{p}.jpg" alt=""><figcaption>Figure {p}</figcaption></figure>'
+           if p % 4 == 0 else '')
+        for p in range(paragraphs))
+    nav = ''.join(f'<li><a href="/section/{s}">Section {s}</a></li>' for s in range(12))
+    related = ''.join(f'<li><a href="/articles/{n}/{k - r}">Feed {n} item {k - r}</a></li>' for r in range(1, 9))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Feed {n} item {k} | Fake Feed {n}</title>
+  <meta property="og:site_name" content="Fake Feed {n}">
+  <link rel="stylesheet" href="/static/site.css">
+  <script src="/static/analytics.js"></script>
+</head>
+<body>
+  <header><a href="/">Fake Feed {n}</a><nav><ul>{nav}</ul></nav></header>
+  <main>
+    <article>
+      <h1>Feed {n} item {k}</h1>
+      <p class="byline">By author{k % 7}</p>
+{body}
+    </article>
+    <aside><h2>Related</h2><ul>{related}</ul></aside>
+  </main>
+  <footer><p>&copy; Fake Feed {n}</p><a href="/privacy">Privacy</a></footer>
+</body>
+</html>
+"""
+
+
+class FeedsHandler(FakeHandler):
+    items = 20
+    interval = 600
+    description_bytes = 300
+    html_ratio = 0.0
+    paragraphs = 12
+    seed = 1
+
+    hits = Counter()
+    _hits_lock = threading.Lock()
+
+    def send_text(self, status, text, content_type, head=False):
+        payload = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def dispatch(self, method):
+        if method not in ('GET', 'HEAD'):
+            return self.send_json(405, {'message': f'{method} not allowed'})
+        route = self.route
+        head = method == 'HEAD'
+        if route == '/_stats':
+            with self._hits_lock:
+                return self.send_json(200, dict(self.hits), head=head)
+        if route.startswith('/articles/'):
+            with self._hits_lock:
+                self.hits['articles'] += 1
+            try:
+                n, k = (int(part) for part in route[len('/articles/'):].split('/'))
+            except ValueError:
+                return self.send_json(404, {'message': f'no article at {route}'})
+            return self.send_text(200, render_article(n, k, self.paragraphs), 'text/html; charset=utf-8', head)
+        if not (route.startswith('/feeds/') and route.endswith('.xml')):
+            return self.send_json(404, {'message': f'no feed at {route}'})
+        with self._hits_lock:
+            self.hits['feeds'] += 1
+        try:
+            n = int(route[len('/feeds/'):-len('.xml')])
+        except ValueError:
+            return self.send_json(404, {'message': f'no feed at {route}'})
+
+        # The same feeds are HTML on every request, like a misconfigured site
+        if random.Random(f'{self.seed}:{n}').random() < self.html_ratio:
+            return self.send_text(200, f'<!DOCTYPE html><html><body>Feed {n} moved</body></html>',
+                                  'text/html; charset=utf-8', head)
+        base_url = f"http://{self.headers.get('Host') or 'localhost'}"
+        self.send_text(200, render_feed(base_url, n, self.items, self.interval, self.description_bytes),
+                       'application/rss+xml; charset=utf-8', head)
+
+
+def main():
+    parser = parser_with_server_arguments("FeedOwn local RSS origin", DEFAULT_PORT)
+    parser.add_argument("--items", type=int, default=20, help="Items per feed (default: 20)")
+    parser.add_argument("--interval", type=int, default=600,
+                        help="Seconds between new items in each feed (default: 600)")
+    parser.add_argument("--description-bytes", type=int, default=300,
+                        help="Length of each item description (default: 300)")
+    parser.add_argument("--html-ratio", type=float, default=0.0,
+                        help="Share of feeds that answer with HTML instead of RSS (default: 0)")
+    parser.add_argument("--paragraphs", type=int, default=12,
+                        help="Paragraphs in each article page (default: 12)")
+    args = parser.parse_args()
+
+    FeedsHandler.items = args.items
+    FeedsHandler.interval = args.interval
+    FeedsHandler.description_bytes = args.description_bytes
+    FeedsHandler.html_ratio = args.html_ratio
+    FeedsHandler.paragraphs = args.paragraphs
+    FeedsHandler.seed = args.seed
+    serve(FeedsHandler, args, "Fake RSS origin")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Shared plumbing for the local API stand-ins (fake_supabase.py, fake_cloudflare.py).
+
+Each fake is a stdlib ThreadingHTTPServer whose handler subclasses
+FakeHandler. FakeHandler adds JSON helpers and fault injection that every
+fake supports through the same command-line flags:
+
+  --latency MS     fixed delay added to every response
+  --jitter MS      extra uniformly random delay (0..MS)
+  --error-rate P   fraction of requests answered with 503 (retry testing)
+  --cold-start MS  extra delay for the first request after --idle-timeout
+                   seconds without traffic (a Workers isolate spinning up)
+  --quiet          don't log requests
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def add_server_arguments(parser, default_port):
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=default_port, help=f"Port to listen on (default: {default_port})")
+    parser.add_argument("--latency", type=float, default=0, metavar="MS", help="Delay added to every response")
+    parser.add_argument("--jitter", type=float, default=0, metavar="MS", help="Extra random delay, 0..MS")
+    parser.add_argument("--error-rate", type=float, default=0, metavar="P",
+                        help="Fraction of requests answered with 503 (default: 0)")
+    parser.add_argument("--cold-start", type=float, default=0, metavar="MS",
+                        help="Extra delay for the first request after an idle period (default: 0)")
+    parser.add_argument("--idle-timeout", type=float, default=30, metavar="S",
+                        help="Seconds without requests before the next one is cold (default: 30)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic data (default: 1)")
+    parser.add_argument("--quiet", action="store_true", help="Don't log requests")
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real APIs
+    # Headers and body are separate writes; with Nagle on, keep-alive responses
+    # wait ~40ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    server_version = 'FeedOwnFake/1.0'
+
+    # Set by serve() from the command-line flags
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    cold_start = 0.0
+    idle_timeout = 30.0
+    quiet = False
+
+    _fault_rng = random.Random(0)
+    _fault_lock = threading.Lock()
+    _last_request = None    # monotonic time of the previous request, for --cold-start
+
+    # ── Request helpers ────────────────────────────────────────────
+
+    @property
+    def route(self):
+        return urlsplit(self.path).path
+
+    @property
+    def query(self):
+        """Query parameters as a list of (key, value) pairs (keys may repeat)."""
+        return parse_qsl(urlsplit(self.path).query, keep_blank_values=True)
+
+    def read_json(self):
+        return json.loads(self.body) if self.body else None
+
+    # ── Response helpers ───────────────────────────────────────────
+
+    def send_json(self, status, body, headers=None, head=False):
+        payload = b'' if body is None else json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)) if not head else '0')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload and not head:
+            self.wfile.write(payload)
+
+    def send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+    # ── Fault injection ────────────────────────────────────────────
+
+    def inject_faults(self):
+        """Sleep for the configured latency; True if this request should fail with 503."""
+        with self._fault_lock:
+            delay = self.latency + self._fault_rng.uniform(0, self.jitter)
+            fail = self._fault_rng.random() < self.error_rate
+            now = time.monotonic()
+            last, type(self)._last_request = self._last_request, now
+            if self.cold_start and (last is None or now - last >= self.idle_timeout):
+                delay += self.cold_start
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.send_json(503, {'message': 'injected failure'})
+        return fail
+
+    def dispatch(self, method):
+        """Override in subclasses: handle `method` for self.path."""
+        self.send_json(404, {'message': 'not found'})
+
+    def handle_method(self, method):
+        # Read the whole body up front so early error responses keep the connection usable
+        self.body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.inject_faults():
+            return
+        try:
+            self.dispatch(method)
+        except Exception as e:
+            self.send_json(500, {'message': f'{type(e).__name__}: {e}'})
+            raise
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_HEAD(self):
+        self.handle_method('HEAD')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_PATCH(self):
+        self.handle_method('PATCH')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            sys.stderr.write(f"  [{self.log_date_time_string()}] {format % args}\n")
+
+
+def serve(handler_class, args, banner):
+    """Configure fault injection from args and serve until Ctrl+C."""
+    handler_class.latency = args.latency / 1000
+    handler_class.jitter = args.jitter / 1000
+    handler_class.error_rate = args.error_rate
+    handler_class.cold_start = args.cold_start / 1000
+    handler_class.idle_timeout = args.idle_timeout
+    handler_class.quiet = args.quiet
+    handler_class._fault_rng = random.Random(args.seed)
+
+    server = ThreadingHTTPServer((args.host, args.port), handler_class)
+    server.daemon_threads = True
+    print(f"  {banner} listening on http://{args.host}:{args.port}")
+    if args.latency or args.jitter or args.error_rate:
+        print(f"  Latency {args.latency:g}ms + 0..{args.jitter:g}ms, error rate {args.error_rate:g}")
+    if args.cold_start:
+        print(f"  Cold start +{args.cold_start:g}ms after {args.idle_timeout:g}s idle")
+    print("  Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parser_with_server_arguments(description, default_port):
+    parser = argparse.ArgumentParser(description=description)
+    add_server_arguments(parser, default_port)
+    return parser
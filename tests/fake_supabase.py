@@ -0,0 +1,1208 @@
+#!/usr/bin/env python3
+"""
+Local Supabase stand-in for offline benchmarks of the admin scripts.
+
+Implements the subset of Supabase the scripts in scripts/ use, on top of a
+SQLite database seeded with synthetic FeedOwn data:
+
+  PostgREST  GET/HEAD/POST/PATCH/DELETE /rest/v1/<table>
+             select, eq/neq/gt/gte/lt/lte/like/ilike/in/is (and not.<op>),
+             order, limit/offset (and Range), count=exact|planned|estimated,
+             upsert with on_conflict and merge/ignore-duplicates,
+             return=minimal|representation, single-object responses,
+             db-max-rows (--max-rows, 1000 like Supabase)
+  RPC        POST /rest/v1/rpc/<name> for the functions in scripts/sql/
+             (--no-rpc answers 404 as if they were not installed); set-returning
+             ones are paged and capped at db-max-rows like table reads
+  Auth       GET /auth/v1/admin/users?page=&per_page=, DELETE /auth/v1/admin/users/<id>
+             POST /auth/v1/signup, POST /auth/v1/token?grant_type=password|refresh_token,
+             GET /auth/v1/user, POST /auth/v1/logout (what the Pages Functions call)
+  Management GET /v1/projects/{ref}/usage and /v1/projects/{ref}
+
+The tables match docs/SUPABASE_SETUP.md, including its indexes, so query
+costs scale the way they do in Postgres. Requests carrying an access token
+issued by /auth/v1 are limited to the user's own rows, like the RLS policies
+there; any other bearer token is treated as the service role. Seeded users
+sign in as user<N>@example.com with the password "password123". The database file is kept between
+runs and only re-seeded when the seed parameters change (or with --reseed).
+
+Usage:
+  python tests/fake_supabase.py                                  # 1k users, 100k articles
+  python tests/fake_supabase.py --users 100000 --articles 10000000 --db /tmp/fake-10m.db
+  python tests/fake_supabase.py --latency 40 --jitter 20 --error-rate 0.01
+
+Then point the scripts at it:
+  export SUPABASE_URL=http://127.0.0.1:54321
+  export SUPABASE_SERVICE_ROLE_KEY=fake
+  export SUPABASE_MANAGEMENT_API_URL=http://127.0.0.1:54321
+  export SUPABASE_ACCESS_TOKEN=fake                            # optional
+  python scripts/feedown_admin.py usage
+"""
+
+import os
+import csv
+import hmac
+import json
+import time
+import uuid
+import base64
+import hashlib
+import secrets
+import queue
+import re
+import random
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone, timedelta
+
+from fake_server import FakeHandler, parser_with_server_arguments, serve
+
+DEFAULT_PORT = 54321  # same as `supabase start`
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), 'feedown-fake-supabase.db')
+SCHEMA_VERSION = 2
+SEED_BATCH = 50_000
+
+# `supabase start`'s default JWT secret; tokens are HS256 like GoTrue's
+JWT_SECRET = b'super-secret-jwt-token-with-at-least-32-characters-long'
+ACCESS_TOKEN_TTL = 3600
+SEED_PASSWORD = 'password123'
+
+# ── Schema ─────────────────────────────────────────────────────────
+# (column, type, default). Types: uuid, text, ts, bool, int.
+# Defaults: 'uuid' / 'now' / 'epoch_ms' are generated per row, anything else is literal.
+
+TABLES = {
+    'user_profiles': {
+        'columns': [
+            ('id', 'uuid', None), ('email', 'text', None),
+            ('is_test_account', 'bool', False), ('created_at', 'ts', 'now'),
+        ],
+        'primary_key': ('id',),
+    },
+    'feeds': {
+        'columns': [
+            ('id', 'uuid', 'uuid'), ('user_id', 'uuid', None), ('url', 'text', None),
+            ('title', 'text', ''), ('description', 'text', ''), ('favicon_url', 'text', None),
+            ('added_at', 'ts', 'now'), ('last_fetched_at', 'ts', None), ('last_success_at', 'ts', None),
+            ('error_count', 'int', 0), ('order', 'int', 'epoch_ms'),
+        ],
+        'primary_key': ('id',),
+        'unique': [('user_id', 'url')],
+    },
+    'articles': {
+        'columns': [
+            ('id', 'text', None), ('user_id', 'uuid', None), ('feed_id', 'uuid', None),
+            ('feed_title', 'text', None), ('title', 'text', None), ('url', 'text', None),
+            ('description', 'text', None), ('published_at', 'ts', None), ('fetched_at', 'ts', 'now'),
+            ('expires_at', 'ts', None), ('author', 'text', None), ('image_url', 'text', None),
+        ],
+        'primary_key': ('id',),
+    },
+    'read_articles': {
+        'columns': [('user_id', 'uuid', None), ('article_id', 'text', None), ('read_at', 'ts', 'now')],
+        'primary_key': ('user_id', 'article_id'),
+    },
+    'favorites': {
+        'columns': [
+            ('id', 'text', None), ('user_id', 'uuid', None), ('title', 'text', None), ('url', 'text', None),
+            ('description', 'text', None), ('feed_title', 'text', None), ('image_url', 'text', None),
+            ('saved_at', 'ts', 'now'),
+        ],
+        'primary_key': ('id',),
+        'unique': [('user_id', 'id')],
+    },
+    'recommended_feeds': {
+        'columns': [
+            ('id', 'uuid', 'uuid'), ('name', 'text', None), ('url', 'text', None),
+            ('sort_order', 'int', 0), ('is_active', 'bool', True),
+            ('created_at', 'ts', 'now'), ('updated_at', 'ts', 'now'),
+        ],
+        'primary_key': ('id',),
+        'unique': [('url',)],
+    },
+}
+
+# docs/SUPABASE_SETUP.md
+INDEXES = [
+    ('idx_feeds_user_id', 'feeds', ('user_id',)),
+    ('idx_feeds_order', 'feeds', ('user_id', 'order')),
+    ('idx_articles_user_id', 'articles', ('user_id',)),
+    ('idx_articles_feed_id', 'articles', ('feed_id',)),
+    ('idx_articles_expires_at', 'articles', ('expires_at',)),
+    ('idx_articles_published_at', 'articles', ('user_id', 'published_at DESC')),
+    ('idx_read_articles_user_id', 'read_articles', ('user_id',)),
+    ('idx_favorites_user_id', 'favorites', ('user_id',)),
+]
+
+AUTH_USERS_DDL = """
+CREATE TABLE auth_users (
+  id TEXT PRIMARY KEY,
+  email TEXT NOT NULL UNIQUE,
+  created_at TEXT NOT NULL,
+  last_sign_in_at TEXT,
+  encrypted_password TEXT
+)"""
+
+# Column each RLS policy compares with auth.uid(); recommended_feeds is read-only for users
+RLS_OWNER = {
+    'user_profiles': 'id',
+    'feeds': 'user_id',
+    'articles': 'user_id',
+    'read_articles': 'user_id',
+    'favorites': 'user_id',
+}
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_types(table):
+    return {name: kind for name, kind, _ in TABLES[table]['columns']}
+
+
+def create_schema(conn):
+    conn.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(AUTH_USERS_DDL)
+    for table, spec in TABLES.items():
+        affinity = {'int': 'INTEGER', 'bool': 'INTEGER'}
+        cols = [f"{quote(name)} {affinity.get(kind, 'TEXT')}" for name, kind, _ in spec['columns']]
+        cols.append(f"PRIMARY KEY ({', '.join(quote(c) for c in spec['primary_key'])})")
+        for unique in spec.get('unique', []):
+            cols.append(f"UNIQUE ({', '.join(quote(c) for c in unique)})")
+        conn.execute(f"CREATE TABLE {quote(table)} ({', '.join(cols)})")
+
+
+def create_indexes(conn):
+    for name, table, cols in INDEXES:
+        parts = [quote(c.split()[0]) + (' DESC' if c.endswith(' DESC') else '') for c in cols]
+        conn.execute(f"CREATE INDEX {name} ON {quote(table)} ({', '.join(parts)})")
+
+
+# ── Values ─────────────────────────────────────────────────────────
+
+def format_ts(dt):
+    """Timestamps are stored the way PostgREST returns timestamptz, so they sort as text."""
+    return dt.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def parse_ts(value):
+    dt = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00').replace(' ', 'T', 1))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def to_db(kind, value):
+    """JSON / query-string value -> SQLite value for a column of `kind`."""
+    if value is None:
+        return None
+    if kind == 'bool':
+        if isinstance(value, str):
+            return 1 if value.lower() in ('true', 't', '1') else 0
+        return 1 if value else 0
+    if kind == 'int':
+        return int(value)
+    if kind == 'ts':
+        return format_ts(parse_ts(value))
+    return str(value)
+
+
+def from_db(kind, value):
+    if kind == 'bool' and value is not None:
+        return bool(value)
+    return value
+
+
+def default_value(default):
+    if default == 'uuid':
+        return str(uuid.uuid4())
+    if default == 'now':
+        return format_ts(datetime.now(timezone.utc))
+    if default == 'epoch_ms':
+        return int(time.time() * 1000)
+    return default
+
+
+# ── Auth Tokens ────────────────────────────────────────────────────
+
+def hash_password(password):
+    # Unsalted so the whole seed shares one hash; this is a fake, not a credential store
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def issue_access_token(uid, email, session_id):
+    now = int(time.time())
+    header = b64url(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())
+    payload = b64url(json.dumps({
+        'sub': uid, 'email': email, 'aud': 'authenticated', 'role': 'authenticated',
+        'iat': now, 'exp': now + ACCESS_TOKEN_TTL, 'session_id': session_id,
+    }).encode())
+    signature = hmac.new(JWT_SECRET, f'{header}.{payload}'.encode(), hashlib.sha256).digest()
+    return f'{header}.{payload}.{b64url(signature)}'
+
+
+def verify_access_token(token):
+    """Claims of an access token issued by this server, or None."""
+    try:
+        header, payload, signature = token.split('.')
+        expected = hmac.new(JWT_SECRET, f'{header}.{payload}'.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(b64url(expected), signature):
+            return None
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if claims.get('role') != 'authenticated' or claims.get('exp', 0) < time.time():
+        return None
+    return claims
+
+
+def user_json(uid, email, created, last):
+    """A user as GoTrue returns it."""
+    return {
+        'id': uid, 'aud': 'authenticated', 'role': 'authenticated', 'email': email,
+        'created_at': created, 'updated_at': last or created, 'confirmed_at': created,
+        'email_confirmed_at': created, 'last_sign_in_at': last,
+        'app_metadata': {'provider': 'email', 'providers': ['email']}, 'user_metadata': {},
+        'identities': [], 'is_anonymous': False,
+    }
+
+
+# ── Errors ─────────────────────────────────────────────────────────
+
+class PostgrestError(Exception):
+    def __init__(self, status, code, message, details=None, hint=None):
+        super().__init__(message)
+        self.status = status
+        self.body = {'code': code, 'details': details, 'hint': hint, 'message': message}
+
+
+class AuthError(PostgrestError):
+    """GoTrue's error shape: {code, error_code, msg}."""
+
+    def __init__(self, status, error_code, message):
+        Exception.__init__(self, message)
+        self.status = status
+        self.body = {'code': status, 'error_code': error_code, 'msg': message}
+
+
+# ── Connections ────────────────────────────────────────────────────
+
+class Database:
+    """SQLite file shared by the handler threads: a small connection pool plus one writer lock."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pool = queue.SimpleQueue()
+        self.write_lock = threading.Lock()
+        self.estimates = {}
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA cache_size=-200000')
+        return conn
+
+    def acquire(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn):
+        self.pool.put(conn)
+
+    def refresh_estimates(self):
+        """Like ANALYZE: snapshot row counts that count=planned reports until the next refresh."""
+        conn = self.acquire()
+        try:
+            self.estimates = {
+                table: conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+                for table in TABLES
+            }
+        finally:
+            self.release(conn)
+
+
+# ── Seeding ────────────────────────────────────────────────────────
+
+def seed_params(args):
+    return {
+        'version': SCHEMA_VERSION, 'users': args.users, 'articles': args.articles,
+        'feeds_per_user': args.feeds_per_user, 'read_ratio': args.read_ratio,
+        'orphan_ratio': args.orphan_ratio, 'favorite_ratio': args.favorite_ratio, 'seed': args.seed,
+    }
+
+
+def stored_params(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(path)
+        row = conn.execute("SELECT value FROM _meta WHERE key = 'params'").fetchone()
+        conn.close()
+    except sqlite3.DatabaseError:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def synthetic_uuid(kind, i):
+    """Deterministic UUID for the i-th user (kind=1) or feed (kind=2), so nothing is kept in memory."""
+    return str(uuid.UUID(int=(0x5EED << 100) | (kind << 64) | i, version=4))
+
+
+def seed(path, params, progress=print):
+    """Create the database at `path` and fill it with synthetic data for `params`."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(params['seed'])
+    now = datetime.now(timezone.utc)
+    n_users = params['users']
+    n_feeds = n_users * params['feeds_per_user']
+    n_articles = params['articles']
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    create_schema(conn)
+
+    def bulk(table, columns, rows, total):
+        sql = (f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        done = 0
+        start = time.perf_counter()
+        batch = []
+        conn.execute('BEGIN')
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= SEED_BATCH:
+                conn.executemany(sql, batch)
+                done += len(batch)
+                batch = []
+                if done % 1_000_000 == 0:
+                    progress(f"    {table}: {done:,} / {total:,}")
+        conn.executemany(sql, batch)
+        conn.execute('COMMIT')
+        done += len(batch)
+        progress(f"  {table:<16} {done:>12,} rows  ({time.perf_counter() - start:.1f}s)")
+
+    def ts(days_ago):
+        return format_ts(now - timedelta(days=days_ago))
+
+    seed_hash = hash_password(SEED_PASSWORD)
+
+    def users():
+        for i in range(n_users):
+            created = rng.uniform(0, 365)
+            # ~60% signed in within the last 30 days (MAU), the rest earlier or never
+            r = rng.random()
+            last = rng.uniform(0, 30) if r < 0.6 else (rng.uniform(30, created + 30) if r < 0.9 else None)
+            yield (synthetic_uuid(1, i), f'user{i}@example.com', ts(created),
+                   ts(min(last, created)) if last is not None else None, seed_hash)
+
+    def profiles():
+        for i in range(n_users):
+            if rng.random() < 0.9:
+                yield synthetic_uuid(1, i), f'user{i}@example.com', int(rng.random() < 0.02), ts(rng.uniform(0, 365))
+
+    def feeds():
+        for j in range(n_feeds):
+            user = j // params['feeds_per_user']
+            fetched = rng.uniform(0, 2)
+            yield (synthetic_uuid(2, j), synthetic_uuid(1, user), f'https://feed{j % 5000}.example.com/rss',
+                   f'Feed {j % 5000}', '', None, ts(rng.uniform(2, 365)), ts(fetched), ts(fetched),
+                   0 if rng.random() < 0.95 else rng.randint(1, 10), j)
+
+    read_ids = []
+
+    def articles():
+        for k in range(n_articles):
+            feed = rng.randrange(n_feeds) if n_feeds else 0
+            user = feed // params['feeds_per_user']
+            # Fetched over the last 14 days with a 7-day TTL: about half are past expires_at,
+            # which is the backlog purge_expired_articles.py cleans up
+            fetched = rng.uniform(0, 14)
+            aid = f'{rng.getrandbits(128):032x}'
+            if rng.random() < params['read_ratio']:
+                read_ids.append((synthetic_uuid(1, user), aid))
+            yield (aid, synthetic_uuid(1, user), synthetic_uuid(2, feed), f'Feed {feed % 5000}',
+                   f'Article {k}', f'https://feed{feed % 5000}.example.com/articles/{k}',
+                   'Lorem ipsum dolor sit amet, consectetur adipiscing elit.',
+                   ts(fetched + rng.uniform(0, 1)), ts(fetched), ts(fetched - 7), None,
+                   f'https://feed{feed % 5000}.example.com/img/{k}.jpg' if k % 2 else None)
+
+    def reads():
+        for uid, aid in read_ids:
+            yield uid, aid, ts(rng.uniform(0, 7))
+        # Read marks whose article is already gone (what compact_read_state.py removes)
+        n_orphans = int(len(read_ids) * params['orphan_ratio'])
+        for o in range(n_orphans):
+            yield synthetic_uuid(1, rng.randrange(n_users)), f'gone{o:028x}', ts(rng.uniform(7, 60))
+
+    progress(f"  Seeding {path}")
+    bulk('auth_users', ('id', 'email', 'created_at', 'last_sign_in_at', 'encrypted_password'), users(), n_users)
+    bulk('user_profiles', ('id', 'email', 'is_test_account', 'created_at'), profiles(), n_users)
+    bulk('feeds', [c for c, _, _ in TABLES['feeds']['columns']], feeds(), n_feeds)
+    bulk('articles', [c for c, _, _ in TABLES['articles']['columns']], articles(), n_articles)
+    bulk('read_articles', ('user_id', 'article_id', 'read_at'), reads(), len(read_ids))
+    read_ids.clear()
+
+    favorites = conn.execute(
+        "SELECT id, user_id, title, url, description, feed_title, image_url, fetched_at FROM articles "
+        "WHERE abs(random()) % 1000000 < ?", (int(params['favorite_ratio'] * 1_000_000),)
+    )
+    bulk('favorites', [c for c, _, _ in TABLES['favorites']['columns']], favorites, 0)
+    bulk('recommended_feeds', ('id', 'name', 'url', 'sort_order', 'is_active', 'created_at', 'updated_at'),
+         ((str(uuid.UUID(int=rng.getrandbits(128), version=4)), f'Recommended {i}',
+           f'https://recommended{i}.example.com/rss', i, 1, ts(30), ts(30)) for i in range(40)), 40)
+
+    start = time.perf_counter()
+    create_indexes(conn)
+    conn.execute('ANALYZE')
+    progress(f"  Indexes + ANALYZE ({time.perf_counter() - start:.1f}s)")
+    conn.execute("INSERT INTO _meta VALUES ('params', ?)", (json.dumps(params),))
+    conn.close()
+
+
+# ── PostgREST Query Translation ────────────────────────────────────
+
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+OPERATORS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=', 'like': 'LIKE', 'ilike': 'LIKE'}
+
+
+def parse_list(value):
+    """PostgREST list literal: (a,b,"c,d")"""
+    inner = value.strip()
+    if not (inner.startswith('(') and inner.endswith(')')):
+        raise PostgrestError(400, 'PGRST100', f'failed to parse list "{value}"')
+    return next(csv.reader([inner[1:-1]], skipinitialspace=True), [])
+
+
+def build_where(table, params):
+    """WHERE clause and bindings for the horizontal filters in `params`."""
+    types = column_types(table)
+    clauses, bindings = [], []
+    for column, expr in params:
+        if column in RESERVED_PARAMS:
+            continue
+        if column not in types:
+            raise PostgrestError(400, '42703', f'column {table}.{column} does not exist')
+        negate = expr.startswith('not.')
+        if negate:
+            expr = expr[4:]
+        op, _, value = expr.partition('.')
+        col = quote(column)
+        if op in OPERATORS:
+            if op in ('like', 'ilike'):
+                value = value.replace('*', '%')
+            clause = f"{col} {OPERATORS[op]} ?"
+            bindings.append(to_db(types[column], value) if op not in ('like', 'ilike') else value)
+        elif op == 'in':
+            values = parse_list(value)
+            clause = f"{col} IN ({', '.join('?' * len(values))})" if values else '0'
+            bindings.extend(to_db(types[column], v) for v in values)
+        elif op == 'is':
+            literal = {'null': 'NULL', 'true': '1', 'false': '0'}.get(value.lower())
+            if literal is None:
+                raise PostgrestError(400, 'PGRST100', f'failed to parse filter ({expr})')
+            clause = f"{col} IS {literal}"
+        else:
+            raise PostgrestError(400, 'PGRST100', f'failed to parse filter ({expr})')
+        clauses.append(f"NOT ({clause})" if negate else clause)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', bindings
+
+
+def build_order(table, value):
+    types = column_types(table)
+    terms = []
+    for term in filter(None, (t.strip() for t in value.split(','))):
+        column, *modifiers = term.split('.')
+        if column not in types:
+            raise PostgrestError(400, '42703', f'column {table}.{column} does not exist')
+        direction = 'DESC' if 'desc' in modifiers else 'ASC'
+        # Postgres defaults: ASC NULLS LAST, DESC NULLS FIRST
+        nulls = 'FIRST' if 'nullsfirst' in modifiers or (direction == 'DESC' and 'nullslast' not in modifiers) \
+            else 'LAST'
+        terms.append(f"{quote(column)} {direction} NULLS {nulls}")
+    return (' ORDER BY ' + ', '.join(terms)) if terms else ''
+
+
+def select_columns(table, value):
+    types = column_types(table)
+    columns = []
+    for item in (value or '*').replace('\n', ' ').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if item == '*':
+            columns.extend(types)
+        elif item in types:
+            columns.append(item)
+        elif '(' in item:
+            raise PostgrestError(400, 'PGRST200', f'embedded resources are not supported by the fake: {item}')
+        else:
+            raise PostgrestError(400, '42703', f'column {table}.{item} does not exist')
+    return columns
+
+
+def parse_prefer(header):
+    prefs = {}
+    for part in (header or '').split(','):
+        key, _, value = part.strip().partition('=')
+        if key:
+            prefs[key] = value
+    return prefs
+
+
+# ── Request Handler ────────────────────────────────────────────────
+
+class SupabaseHandler(FakeHandler):
+    db = None
+    max_rows = 1000
+    rpc_enabled = True
+
+    # refresh token -> (user id, session id); sessions don't survive a restart
+    refresh_tokens = {}
+    _tokens_lock = threading.Lock()
+
+    def dispatch(self, method):
+        route = self.route
+        try:
+            if route.startswith('/rest/v1/rpc/'):
+                if method != 'POST':
+                    raise PostgrestError(405, 'PGRST101', 'RPCs are called with POST')
+                return self.rpc(route[len('/rest/v1/rpc/'):])
+            if route.startswith('/rest/v1/'):
+                return self.table(method, route[len('/rest/v1/'):])
+            if route == '/auth/v1/admin/users' and method == 'GET':
+                return self.list_users()
+            if route.startswith('/auth/v1/admin/users/') and method == 'DELETE':
+                return self.delete_user(route.rsplit('/', 1)[1])
+            if route.startswith('/auth/v1/'):
+                return self.auth(method, route[len('/auth/v1/'):])
+            if route.startswith('/v1/projects/') and method == 'GET':
+                return self.management(route)
+            self.send_json(404, {'message': f'no route for {method} {route}'})
+        except PostgrestError as e:
+            self.send_json(e.status, e.body)
+
+    # ── Tables ─────────────────────────────────────────────────────
+
+    def bearer_claims(self):
+        """Claims of the user access token in Authorization, or None (service role)."""
+        auth = self.headers.get('Authorization') or ''
+        return verify_access_token(auth[7:]) if auth.startswith('Bearer ') else None
+
+    def apply_rls(self, method, table, params):
+        """Restrict a user's request to their own rows; returns (params, owner check for inserts)."""
+        claims = self.bearer_claims()
+        if claims is None:
+            return params, None
+        owner = RLS_OWNER.get(table)
+        if owner is None:
+            if method not in ('GET', 'HEAD'):
+                raise PostgrestError(403, '42501', f'new row violates row-level security policy for table "{table}"')
+            return params + [('is_active', 'eq.true')], None
+        return params + [(owner, f"eq.{claims['sub']}")], (owner, claims['sub'])
+
+    def table(self, method, table):
+        if table not in TABLES:
+            raise PostgrestError(404, '42P01', f'relation "public.{table}" does not exist')
+        params, owner = self.apply_rls(method, table, self.query)
+        single = 'vnd.pgrst.object' in (self.headers.get('Accept') or '')
+        prefer = parse_prefer(self.headers.get('Prefer'))
+        conn = self.db.acquire()
+        try:
+            if method in ('GET', 'HEAD'):
+                self.read(conn, table, params, prefer, single, head=method == 'HEAD')
+            elif method == 'POST':
+                self.insert(conn, table, params, prefer, single, owner)
+            elif method == 'PATCH':
+                self.update(conn, table, params, prefer, single)
+            elif method == 'DELETE':
+                self.delete(conn, table, params, prefer, single)
+            else:
+                raise PostgrestError(405, 'PGRST101', f'{method} is not supported')
+        except sqlite3.IntegrityError as e:
+            raise PostgrestError(409, '23505', f'duplicate key value violates unique constraint ({e})')
+        finally:
+            self.db.release(conn)
+
+    def rows_out(self, table, columns, rows):
+        types = column_types(table)
+        return [{c: from_db(types[c], v) for c, v in zip(columns, row)} for row in rows]
+
+    def respond_rows(self, status, table, columns, rows, single, headers=None, head=False):
+        body = self.rows_out(table, columns, rows)
+        if single:
+            if len(body) != 1:
+                raise PostgrestError(406, 'PGRST116', 'JSON object requested, multiple (or no) rows returned',
+                                     details=f'The result contains {len(body)} rows')
+            body = body[0]
+        self.send_json(status, body, headers, head=head)
+
+    def count_rows(self, conn, table, where, bindings, method):
+        def exact():
+            return conn.execute(f"SELECT COUNT(*) FROM {quote(table)}{where}", bindings).fetchone()[0]
+
+        if method == 'exact':
+            return exact()
+        # planned: the table-level estimate from the last ANALYZE (filters make it exact here)
+        planned = self.db.estimates.get(table, 0) if not where else exact()
+        if method == 'estimated' and planned <= self.max_rows:
+            return exact()
+        return planned
+
+    def requested_range(self, args):
+        """(offset, limit) from offset/limit or the Range header, capped at db-max-rows."""
+        offset = int(args.get('offset') or 0)
+        limit = int(args['limit']) if 'limit' in args else None
+        range_header = self.headers.get('Range')
+        if range_header and '-' in range_header:
+            first, _, last = range_header.partition('-')
+            offset = int(first or 0)
+            if last:
+                limit = int(last) - offset + 1
+        if self.max_rows:
+            limit = self.max_rows if limit is None else min(limit, self.max_rows)
+        return offset, limit
+
+    def read(self, conn, table, params, prefer, single, head=False):
+        args = dict(params)
+        columns = select_columns(table, args.get('select'))
+        where, bindings = build_where(table, params)
+        order = build_order(table, args.get('order', ''))
+        offset, limit = self.requested_range(args)
+
+        total = '*'
+        if prefer.get('count') in ('exact', 'planned', 'estimated'):
+            total = self.count_rows(conn, table, where, bindings, prefer['count'])
+
+        rows = []
+        if not head and limit != 0:
+            sql = (f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(table)}{where}{order}"
+                   f" LIMIT ? OFFSET ?")
+            rows = conn.execute(sql, bindings + [-1 if limit is None else limit, offset]).fetchall()
+
+        content_range = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+        self.respond_rows(200, table, columns, rows, single, {'Content-Range': content_range}, head=head)
+
+    def write_rows(self, table, body, params):
+        """Normalize an insert body into (columns, rows of SQLite values), filling defaults."""
+        types = column_types(table)
+        records = body if isinstance(body, list) else [body]
+        args = dict(params)
+        if 'columns' in args:
+            columns = [c.strip().strip('"') for c in args['columns'].split(',')]
+        else:
+            columns = list(dict.fromkeys(k for record in records for k in record))
+        unknown = [c for c in columns if c not in types]
+        if unknown:
+            raise PostgrestError(400, 'PGRST204', f"Could not find the '{unknown[0]}' column of '{table}'")
+        defaults = {name: default for name, _, default in TABLES[table]['columns'] if default is not None}
+        all_columns = columns + [c for c in defaults if c not in columns]
+        rows = []
+        for record in records:
+            row = []
+            for c in all_columns:
+                if c in record:
+                    row.append(to_db(types[c], record[c]))
+                else:
+                    row.append(to_db(types[c], default_value(defaults[c])) if c in defaults else None)
+            rows.append(row)
+        return columns, all_columns, rows
+
+    def finish_write(self, status, table, cursor_rows, prefer, single, count=None):
+        headers = {}
+        if count is not None:
+            headers['Content-Range'] = f"*/{count}"
+        if prefer.get('return') == 'representation':
+            columns = list(column_types(table))
+            self.respond_rows(200 if status == 204 else status, table, columns, cursor_rows, single, headers)
+        else:
+            self.send_empty(204 if status == 204 else status, headers)
+
+    def insert(self, conn, table, params, prefer, single, owner=None):
+        body = self.read_json()
+        if body is None or body == []:
+            return self.finish_write(201, table, [], prefer, single)
+        columns, all_columns, rows = self.write_rows(table, body, params)
+        if owner is not None:
+            column, uid = owner
+            i = all_columns.index(column) if column in all_columns else None
+            if i is None or any(row[i] != uid for row in rows):
+                raise PostgrestError(403, '42501', f'new row violates row-level security policy for table "{table}"')
+
+        sql = (f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in all_columns)}) "
+               f"VALUES ({', '.join('?' * len(all_columns))})")
+        resolution = prefer.get('resolution')
+        if resolution:
+            target = [c.strip() for c in dict(params).get('on_conflict', '').split(',') if c.strip()] \
+                or list(TABLES[table]['primary_key'])
+            if resolution == 'ignore-duplicates':
+                sql += f" ON CONFLICT ({', '.join(quote(c) for c in target)}) DO NOTHING"
+            else:
+                updates = [c for c in columns if c not in target]
+                sets = ', '.join(f"{quote(c)} = excluded.{quote(c)}" for c in updates) or \
+                    f"{quote(target[0])} = excluded.{quote(target[0])}"
+                sql += f" ON CONFLICT ({', '.join(quote(c) for c in target)}) DO UPDATE SET {sets}"
+
+        returning = prefer.get('return') == 'representation'
+        out = []
+        with self.db.write_lock:
+            conn.execute('BEGIN')
+            try:
+                if returning:
+                    for row in rows:
+                        out.extend(conn.execute(sql + ' RETURNING *', row).fetchall())
+                else:
+                    conn.executemany(sql, rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        count = len(out) if returning else len(rows)
+        self.finish_write(201, table, out, prefer, single, count if prefer.get('count') else None)
+
+    def update(self, conn, table, params, prefer, single):
+        types = column_types(table)
+        body = self.read_json() or {}
+        unknown = [c for c in body if c not in types]
+        if unknown:
+            raise PostgrestError(400, 'PGRST204', f"Could not find the '{unknown[0]}' column of '{table}'")
+        where, bindings = build_where(table, params)
+        sets = ', '.join(f"{quote(c)} = ?" for c in body)
+        values = [to_db(types[c], v) for c, v in body.items()]
+        sql = f"UPDATE {quote(table)} SET {sets}{where}"
+        self.mutate(conn, table, sql, values + bindings, prefer, single)
+
+    def delete(self, conn, table, params, prefer, single):
+        where, bindings = build_where(table, params)
+        self.mutate(conn, table, f"DELETE FROM {quote(table)}{where}", bindings, prefer, single)
+
+    def mutate(self, conn, table, sql, bindings, prefer, single):
+        returning = prefer.get('return') == 'representation'
+        with self.db.write_lock:
+            if returning:
+                rows = conn.execute(sql + ' RETURNING *', bindings).fetchall()
+                count = len(rows)
+            else:
+                rows = []
+                count = conn.execute(sql, bindings).rowcount
+        self.finish_write(204, table, rows, prefer, single, count if prefer.get('count') else None)
+
+    # ── RPC (scripts/sql/) ─────────────────────────────────────────
+
+    def rpc(self, name):
+        handler = RPCS.get(name) if self.rpc_enabled else None
+        if handler is None:
+            raise PostgrestError(404, 'PGRST202',
+                                 f'Could not find the function public.{name} without parameters in the schema cache')
+        args = self.read_json() or {}
+        conn = self.db.acquire()
+        try:
+            if name in WRITING_RPCS:
+                with self.db.write_lock:
+                    result = handler(self.db, conn, **args)
+            else:
+                result = handler(self.db, conn, **args)
+        finally:
+            self.db.release(conn)
+        if not isinstance(result, list):
+            self.send_json(200, result)
+            return
+        # Set-returning functions are paged and capped like table reads
+        offset, limit = self.requested_range(dict(self.query))
+        rows = result[offset:] if limit is None else result[offset:offset + limit]
+        content_range = f"{offset}-{offset + len(rows) - 1}/*" if rows else "*/*"
+        self.send_json(200, rows, {'Content-Range': content_range})
+
+    # ── Auth Admin ─────────────────────────────────────────────────
+
+    def list_users(self):
+        args = dict(self.query)
+        page = max(1, int(args.get('page') or 1))
+        per_page = min(1000, int(args.get('per_page') or 50))
+        conn = self.db.acquire()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM auth_users").fetchone()[0]
+            rows = conn.execute(
+                "SELECT id, email, created_at, last_sign_in_at FROM auth_users ORDER BY rowid LIMIT ? OFFSET ?",
+                (per_page, (page - 1) * per_page),
+            ).fetchall()
+        finally:
+            self.db.release(conn)
+        users = [user_json(*row) for row in rows]
+        self.send_json(200, {'users': users, 'aud': 'authenticated'}, {'X-Total-Count': str(total)})
+
+    def delete_user(self, uid):
+        if self.bearer_claims() is not None:
+            raise AuthError(403, 'not_admin', 'User not allowed')
+        conn = self.db.acquire()
+        try:
+            with self.db.write_lock:
+                deleted = conn.execute("DELETE FROM auth_users WHERE id = ?", (uid,)).rowcount
+        finally:
+            self.db.release(conn)
+        if not deleted:
+            raise AuthError(404, 'user_not_found', 'User not found')
+        self.send_json(200, {})
+
+    # ── Auth (GoTrue) ──────────────────────────────────────────────
+
+    def auth(self, method, path):
+        if method == 'POST' and path == 'signup':
+            return self.signup()
+        if method == 'POST' and path == 'token':
+            grant = dict(self.query).get('grant_type')
+            if grant == 'password':
+                return self.sign_in_with_password()
+            if grant == 'refresh_token':
+                return self.refresh_session()
+            raise AuthError(400, 'validation_failed', f'unsupported grant_type: {grant}')
+        if method == 'GET' and path == 'user':
+            claims = self.bearer_claims()
+            if claims is None:
+                raise AuthError(401, 'bad_jwt', 'invalid JWT: unable to parse or verify signature')
+            return self.send_json(200, self.load_user('id', claims['sub']))
+        if method == 'POST' and path == 'logout':
+            return self.send_empty(204)
+        raise AuthError(404, 'not_found', f'no route for {method} /auth/v1/{path}')
+
+    def load_user(self, column, value, with_password=False):
+        conn = self.db.acquire()
+        try:
+            row = conn.execute(
+                f"SELECT id, email, created_at, last_sign_in_at, encrypted_password FROM auth_users "
+                f"WHERE {column} = ?", (value,)).fetchone()
+        finally:
+            self.db.release(conn)
+        if row is None:
+            return (None, None) if with_password else None
+        return (user_json(*row[:4]), row[4]) if with_password else user_json(*row[:4])
+
+    def start_session(self, user):
+        """Record the sign-in and return a GoTrue session for `user`."""
+        now = format_ts(datetime.now(timezone.utc))
+        conn = self.db.acquire()
+        try:
+            with self.db.write_lock:
+                conn.execute("UPDATE auth_users SET last_sign_in_at = ? WHERE id = ?", (now, user['id']))
+        finally:
+            self.db.release(conn)
+        user = {**user, 'last_sign_in_at': now}
+        session_id = str(uuid.uuid4())
+        refresh_token = secrets.token_urlsafe(16)
+        with self._tokens_lock:
+            self.refresh_tokens[refresh_token] = (user['id'], session_id)
+        return {
+            'access_token': issue_access_token(user['id'], user['email'], session_id),
+            'token_type': 'bearer',
+            'expires_in': ACCESS_TOKEN_TTL,
+            'expires_at': int(time.time()) + ACCESS_TOKEN_TTL,
+            'refresh_token': refresh_token,
+            'user': user,
+        }
+
+    def signup(self):
+        body = self.read_json() or {}
+        email = (body.get('email') or '').strip().lower()
+        password = body.get('password') or ''
+        if not email or not password:
+            raise AuthError(422, 'validation_failed', 'Signup requires a valid password')
+        if len(password) < 6:
+            raise AuthError(422, 'weak_password', 'Password should be at least 6 characters.')
+        uid = str(uuid.uuid4())
+        conn = self.db.acquire()
+        try:
+            with self.db.write_lock:
+                conn.execute(
+                    "INSERT INTO auth_users (id, email, created_at, encrypted_password) VALUES (?, ?, ?, ?)",
+                    (uid, email, format_ts(datetime.now(timezone.utc)), hash_password(password)))
+        except sqlite3.IntegrityError:
+            raise AuthError(422, 'user_already_exists', 'User already registered')
+        finally:
+            self.db.release(conn)
+        # Email confirmation is off, so signup signs the user in
+        self.send_json(200, self.start_session(self.load_user('id', uid)))
+
+    def sign_in_with_password(self):
+        body = self.read_json() or {}
+        user, password_hash = self.load_user('email', (body.get('email') or '').strip().lower(),
+                                             with_password=True)
+        if user is None or password_hash != hash_password(body.get('password') or ''):
+            raise AuthError(400, 'invalid_credentials', 'Invalid login credentials')
+        self.send_json(200, self.start_session(user))
+
+    def refresh_session(self):
+        token = (self.read_json() or {}).get('refresh_token')
+        with self._tokens_lock:
+            entry = self.refresh_tokens.pop(token, None)
+        user = self.load_user('id', entry[0]) if entry else None
+        if user is None:
+            raise AuthError(400, 'refresh_token_not_found', 'Invalid Refresh Token: Refresh Token Not Found')
+        self.send_json(200, self.start_session(user))
+
+    # ── Management API ─────────────────────────────────────────────
+
+    def management(self, route):
+        if not (self.headers.get('Authorization') or '').startswith('Bearer '):
+            return self.send_json(401, {'message': 'Unauthorized'})
+        parts = route.strip('/').split('/')   # v1 projects {ref} ...
+        ref = parts[2] if len(parts) > 2 else ''
+        if parts[3:] == ['usage']:
+            return self.send_json(200, [
+                {'metric': 'db_size', 'usage': database_size(self.db)},
+                {'metric': 'monthly_active_users', 'usage': 0},
+            ])
+        if parts[3:] == []:
+            return self.send_json(200, {
+                'id': ref, 'name': 'feedown (fake)', 'region': 'local', 'status': 'ACTIVE_HEALTHY',
+                'database': {'host': '127.0.0.1', 'version': 'sqlite ' + sqlite3.sqlite_version},
+            })
+        self.send_json(404, {'message': 'Not found'})
+
+
+# ── RPC Implementations ────────────────────────────────────────────
+
+_sizes_cache = {'at': 0, 'value': None}
+
+
+def database_size(db):
+    conn = db.acquire()
+    try:
+        pages = conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        db.release(conn)
+    return pages * page_size
+
+
+def rpc_database_size(db, conn):
+    return database_size(db)
+
+
+def rpc_table_sizes(db, conn):
+    """feedown_table_sizes(): per-table heap / index bytes from SQLite's dbstat (cached 60s)."""
+    if _sizes_cache['value'] is not None and time.time() - _sizes_cache['at'] < 60:
+        return _sizes_cache['value']
+    owners = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"))
+    try:
+        sizes = dict(conn.execute("SELECT name, pgsize FROM dbstat WHERE aggregate = TRUE"))
+    except sqlite3.OperationalError:
+        # SQLite built without dbstat: split the file size by row share
+        total = database_size(db)
+        rows = {t: conn.execute(f"SELECT COUNT(*) FROM {quote(t)}").fetchone()[0] for t in TABLES}
+        all_rows = sum(rows.values()) or 1
+        sizes = {t: total * n // all_rows for t, n in rows.items()}
+    result = []
+    for table in TABLES:
+        heap = sizes.get(table, 0)
+        index = sum(size for name, size in sizes.items() if name != table and owners.get(name) == table)
+        live = conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+        result.append({
+            'table_name': table, 'total_bytes': heap + index, 'table_bytes': heap, 'toast_bytes': 0,
+            'index_bytes': index, 'live_tuples': live, 'dead_tuples': 0, 'dead_bytes_est': 0,
+        })
+    result.sort(key=lambda r: r['total_bytes'], reverse=True)
+    _sizes_cache.update(at=time.time(), value=result)
+    return result
+
+
+def rpc_expiry_histogram(db, conn):
+    rows = conn.execute("""
+        SELECT substr(a.expires_at, 1, 10), a.user_id, COUNT(*), COUNT(ra.article_id)
+        FROM articles a
+        LEFT JOIN read_articles ra ON ra.user_id = a.user_id AND ra.article_id = a.id
+        GROUP BY 1, 2 ORDER BY 1, 2
+    """).fetchall()
+    return [{'day': d, 'user_id': u, 'articles': n, 'read_rows': r} for d, u, n, r in rows]
+
+
+def rpc_read_state_summary(db, conn):
+    live, orphaned = conn.execute("""
+        SELECT COUNT(a.id), COUNT(*) - COUNT(a.id)
+        FROM read_articles ra LEFT JOIN articles a ON a.id = ra.article_id
+    """).fetchone()
+    return [{'read_live': live, 'read_orphaned': orphaned}]
+
+
+def rpc_read_state_by_user(db, conn):
+    by_user = {}
+    for uid, live, orphaned in conn.execute("""
+        SELECT ra.user_id, COUNT(a.id), COUNT(*) - COUNT(a.id)
+        FROM read_articles ra LEFT JOIN articles a ON a.id = ra.article_id
+        GROUP BY ra.user_id
+    """):
+        by_user[uid] = {'user_id': uid, 'read_live': live, 'read_orphaned': orphaned,
+                        'favorites': 0, 'favorites_detached': 0}
+    for uid, favorites, detached in conn.execute("""
+        SELECT f.user_id, COUNT(*), COUNT(*) - COUNT(a.id)
+        FROM favorites f LEFT JOIN articles a ON a.id = f.id
+        GROUP BY f.user_id
+    """):
+        row = by_user.setdefault(uid, {'user_id': uid, 'read_live': 0, 'read_orphaned': 0})
+        row.update(favorites=favorites, favorites_detached=detached)
+    return sorted(by_user.values(), key=lambda r: (-r['read_orphaned'], r['user_id']))
+
+
+def rpc_delete_orphaned_read_articles(db, conn, batch_size=1000):
+    return conn.execute("""
+        DELETE FROM read_articles WHERE rowid IN (
+          SELECT ra.rowid FROM read_articles ra
+          WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = ra.article_id)
+          LIMIT ?
+        )
+    """, (int(batch_size),)).rowcount
+
+
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|DELETE|UPDATE)\s', re.I)
+QUERY_PLAN_SCAN = re.compile(r'^(SCAN|SEARCH) (\w+)(?: AS \w+)?'
+                             r'(?: USING (COVERING )?INDEX (\S+)| USING (?:INTEGER )?PRIMARY KEY)?(?: \((.*)\))?')
+
+
+def explain_node(detail, table_rows, matched):
+    """One EXPLAIN QUERY PLAN line as a Postgres-style plan node (row counts are approximate)."""
+    m = QUERY_PLAN_SCAN.match(detail)
+    if not m:
+        return {'Node Type': 'Sort' if 'TEMP B-TREE' in detail else detail, 'Actual Rows': matched,
+                'Actual Loops': 1}
+    verb, table, covering, index, cond = m.groups()
+    if verb == 'SCAN' and not index:
+        return {'Node Type': 'Seq Scan', 'Relation Name': table, 'Actual Rows': matched, 'Actual Loops': 1,
+                'Rows Removed by Filter': max(table_rows(table) - matched, 0)}
+    node = {'Node Type': 'Index Only Scan' if covering else 'Index Scan', 'Relation Name': table,
+            'Index Name': index or f'{table}_pkey', 'Actual Rows': matched, 'Actual Loops': 1}
+    if cond:
+        node['Index Cond'] = cond
+    return node
+
+
+def rpc_explain(db, conn, query, setup=None, runs=1):
+    """
+    feedown_explain(): EXPLAIN QUERY PLAN mapped onto the shape of Postgres'
+    EXPLAIN (ANALYZE, FORMAT JSON). Timings are real; per-node row counts are
+    the statement's matching rows, there are no buffer counts. Everything the
+    runs and the setup index change is rolled back.
+    """
+    if not EXPLAINABLE.match(query) or ';' in query.rstrip('; \n\t'):
+        raise PostgrestError(400, 'P0001',
+                             'feedown_explain: query must be a single SELECT, WITH, DELETE or UPDATE statement')
+    if setup is not None and (not re.match(r'^\s*CREATE\s+INDEX\s', setup, re.I) or ';' in setup.rstrip('; \n\t')):
+        raise PostgrestError(400, 'P0001', 'feedown_explain: setup must be a single CREATE INDEX statement')
+    counts = {}
+
+    def table_rows(table):
+        if table not in counts:
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+        return counts[table]
+
+    is_select = not re.match(r'^\s*(DELETE|UPDATE)\s', query, re.I)
+    unlimited = re.sub(r'\s+LIMIT\s+\d+(\s+OFFSET\s+\d+)?\s*$', '', query, flags=re.I)
+    plans = []
+    conn.execute('SAVEPOINT feedown_explain')
+    try:
+        if setup:
+            # SQLite indexes have no NULLS FIRST / LAST
+            conn.execute(re.sub(r'\s+NULLS\s+(FIRST|LAST)', '', setup, flags=re.I))
+        for _ in range(max(int(runs), 1)):
+            conn.execute('SAVEPOINT feedown_explain_run')
+            try:
+                steps = conn.execute(f'EXPLAIN QUERY PLAN {query}').fetchall()
+                start = time.perf_counter()
+                cursor = conn.execute(query)
+                returned = len(cursor.fetchall()) if is_select else 0
+                elapsed = (time.perf_counter() - start) * 1000
+                if is_select:
+                    matched = conn.execute(f'SELECT COUNT(*) FROM ({unlimited})').fetchone()[0]
+                else:
+                    matched = cursor.rowcount
+            finally:
+                conn.execute('ROLLBACK TO feedown_explain_run')
+                conn.execute('RELEASE feedown_explain_run')
+
+            nodes = {0: {'Plans': []}}
+            for node_id, parent, _, detail in steps:
+                node = explain_node(detail, table_rows, matched)
+                node['Plans'] = []
+                nodes[node_id] = node
+                nodes.get(parent, nodes[0])['Plans'].append(node)
+            # SQLite lists the sort after the scan it orders; Postgres nests the scan under it
+            top = nodes[0]['Plans']
+            for i, node in enumerate(top):
+                if node['Node Type'] == 'Sort' and i > 0:
+                    node['Plans'] = top[:i] + node['Plans']
+                    top = [node] + top[i + 1:]
+                    break
+            root = top[0] if len(top) == 1 else {'Node Type': 'Result', 'Actual Rows': matched,
+                                                 'Actual Loops': 1, 'Plans': top}
+            if is_select and unlimited != query:
+                root = {'Node Type': 'Limit', 'Actual Rows': returned, 'Actual Loops': 1, 'Plans': [root]}
+            elif not is_select:
+                root = {'Node Type': 'ModifyTable', 'Operation': query.split()[0].title(),
+                        'Actual Rows': 0, 'Actual Loops': 1, 'Plans': [root]}
+            plans.append({'Plan': root, 'Planning Time': 0.0, 'Execution Time': elapsed})
+    finally:
+        conn.execute('ROLLBACK TO feedown_explain')
+        conn.execute('RELEASE feedown_explain')
+    return plans
+
+
+RPCS = {
+    'feedown_database_size': rpc_database_size,
+    'feedown_table_sizes': rpc_table_sizes,
+    'feedown_expiry_histogram': rpc_expiry_histogram,
+    'feedown_read_state_summary': rpc_read_state_summary,
+    'feedown_read_state_by_user': rpc_read_state_by_user,
+    'feedown_delete_orphaned_read_articles': rpc_delete_orphaned_read_articles,
+    'feedown_explain': rpc_explain,
+}
+WRITING_RPCS = {'feedown_delete_orphaned_read_articles', 'feedown_explain'}
+
+
+def main():
+    parser = parser_with_server_arguments("FeedOwn local Supabase stand-in", DEFAULT_PORT)
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite file (default: {DEFAULT_DB})")
+    parser.add_argument("--users", type=int, default=1_000, help="Auth users to seed (default: 1000)")
+    parser.add_argument("--articles", type=int, default=100_000, help="Articles to seed (default: 100000)")
+    parser.add_argument("--feeds-per-user", type=int, default=10, help="Feeds per user (default: 10)")
+    parser.add_argument("--read-ratio", type=float, default=0.3, help="Share of articles marked read (default: 0.3)")
+    parser.add_argument("--orphan-ratio", type=float, default=0.05,
+                        help="Orphaned read marks, as a share of read marks (default: 0.05)")
+    parser.add_argument("--favorite-ratio", type=float, default=0.01,
+                        help="Share of articles saved as favorites (default: 0.01)")
+    parser.add_argument("--max-rows", type=int, default=1000,
+                        help="PostgREST db-max-rows, 0 for unlimited (default: 1000, as on Supabase)")
+    parser.add_argument("--no-rpc", action="store_true", help="Answer scripts/sql/ RPCs with 404 (not installed)")
+    parser.add_argument("--reseed", action="store_true", help="Rebuild the database even if the parameters match")
+    parser.add_argument("--seed-only", action="store_true", help="Seed the database and exit")
+    args = parser.parse_args()
+
+    params = seed_params(args)
+    if args.reseed or stored_params(args.db) != params:
+        start = time.perf_counter()
+        seed(args.db, params)
+        print(f"  Seeded in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(args.db) / 1024 / 1024:.1f} MB)")
+    else:
+        print(f"  Reusing {args.db}")
+    if args.seed_only:
+        return
+
+    SupabaseHandler.db = Database(args.db)
+    SupabaseHandler.db.refresh_estimates()
+    SupabaseHandler.max_rows = args.max_rows
+    SupabaseHandler.rpc_enabled = not args.no_rpc
+    serve(SupabaseHandler, args, "Fake Supabase")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Synthetic latency prober for the FeedOwn API.
+
+Runs the read-only part of the api_test.py flow at a low, fixed rate:
+
+  login -> GET /api/feeds -> GET /api/articles?limit=50 -> GET /api/recommended-feeds
+
+and stores every request (time, status, latency, bytes) in a local SQLite
+file, so latency can be followed over days instead of one load test.
+
+Each round opens fresh connections, like a client coming back after a
+while, and starts with a different endpoint than the last one. The first
+request of a round that comes after --idle-gap seconds without traffic is
+a cold-start candidate: if it is also an outlier for its endpoint (above
+median + --k x MAD of the requests that did not follow an idle gap), it
+is counted as a cold start and left out of the warm percentiles. Slow
+requests that did not follow an idle gap stay in the warm numbers.
+
+  run      probe every --interval until Ctrl+C (or --rounds), then report
+  report   rolling warm p95 per endpoint and the cold starts from the file
+
+  --driver api        a deployment or `wrangler pages dev` (--base-url)
+  --driver simulate   the same Supabase calls the Pages Functions make,
+                      against fake_supabase.py (--supabase-url)
+
+Usage:
+  python tests/latency_probe.py run --base-url https://xxxx.feedown.pages.dev --interval 5m
+  python tests/latency_probe.py run --rounds 1                 # one round, e.g. from cron
+  python tests/latency_probe.py report --since 7d --window 1h --every 6h
+
+Offline, with a simulated isolate start after 20s without traffic:
+  python tests/fake_supabase.py --latency 20 --jitter 10 --cold-start 400 --idle-timeout 20 &
+  python tests/latency_probe.py run --driver simulate --interval 30s --rounds 20
+
+The probe account comes from --email / --password (or FEEDOWN_PROBE_EMAIL
+and FEEDOWN_PROBE_PASSWORD); the default is a user fake_supabase.py seeds.
+Samples are kept per target, so local and deployed runs don't mix.
+"""
+
+import os
+import time
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+
+from load_test import httpx, percentile, DEFAULT_BASE_URL, TEST_PASSWORD
+from articles_bench import format_bytes
+
+ENDPOINTS = ['login', 'feeds', 'articles', 'recommended']
+ENDPOINT_PATHS = {
+    'login': 'POST /api/auth/login',
+    'feeds': 'GET /api/feeds',
+    'articles': 'GET /api/articles?limit=50',
+    'recommended': 'GET /api/recommended-feeds',
+}
+ARTICLES_LIMIT = 50
+PAGE_SIZE = 1000
+TOKEN_MAX_AGE = 50 * 60     # Supabase access tokens expire after an hour
+
+MIN_SAMPLES = 5             # per endpoint, before outliers are classified at all
+MIN_SPREAD_MS = 5.0         # floor for the MAD so a very steady endpoint isn't all outliers
+MIN_SPREAD_RATIO = 0.1      # ... and at least 10% of the median
+MAD_SCALE = 1.4826          # MAD -> standard deviation for normal data
+
+DEFAULT_DB = os.getenv('FEEDOWN_PROBE_DB') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.data', 'latency_probe.db'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+  ts REAL NOT NULL,
+  target TEXT NOT NULL,
+  endpoint TEXT NOT NULL,
+  status INTEGER NOT NULL,
+  ms REAL NOT NULL,
+  bytes INTEGER NOT NULL,
+  gap_s REAL,
+  error TEXT,
+  PRIMARY KEY (target, endpoint, ts)
+);
+CREATE INDEX IF NOT EXISTS idx_probes_target_ts ON probes(target, ts);
+"""
+
+
+# ── Storage ────────────────────────────────────────────────────────
+
+def connect(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def last_request_end(conn, target):
+    """Unix time the previous probe request to target finished, or None."""
+    row = conn.execute('SELECT MAX(ts + ms / 1000.0) FROM probes WHERE target = ?', (target,)).fetchone()
+    return row[0]
+
+
+def load_samples(conn, target, since):
+    rows = conn.execute('SELECT ts, endpoint, status, ms, bytes, gap_s, error FROM probes '
+                        'WHERE target = ? AND ts >= ? ORDER BY ts', (target, since))
+    return [dict(zip(('ts', 'endpoint', 'status', 'ms', 'bytes', 'gap_s', 'error'), r)) for r in rows]
+
+
+def parse_duration(text):
+    """'90', '90s', '15m', '1h', '7d' -> seconds."""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def duration_arg(text):
+    try:
+        seconds = parse_duration(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a duration: {text!r} (e.g. 90s, 15m, 1h, 7d)")
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("duration must be positive")
+    return seconds
+
+
+def format_duration(seconds):
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{seconds / size:g}{unit}"
+    return f"{seconds:g}s"
+
+
+# ── Probing ────────────────────────────────────────────────────────
+
+class Prober:
+    """
+    One round = the four endpoints on a fresh connection pool.
+
+    The order rotates by one endpoint per round, so each endpoint is
+    sometimes first (after the idle gap) and sometimes not; the latter give
+    the warm baseline. Endpoints before login reuse the previous round's
+    token while it is younger than TOKEN_MAX_AGE.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.target = args.base_url if args.driver == 'api' else f'simulate:{args.supabase_url}'
+        self.previous_end = None
+        self.rounds = 0
+        self.token = None
+        self.token_time = 0.0
+
+    def order(self):
+        shift = self.rounds % len(ENDPOINTS)
+        order = ENDPOINTS[shift:] + ENDPOINTS[:shift]
+        if self.token is None or time.time() - self.token_time > TOKEN_MAX_AGE:
+            self.token = None
+            order.remove('login')
+            order.insert(0, 'login')
+        return order
+
+    def run_round(self):
+        results = []
+        with httpx.Client(timeout=self.args.timeout) as http:
+            for endpoint in self.order():
+                token = self.token
+                if token is None and endpoint in ('feeds', 'articles'):
+                    results.append(self.skipped(endpoint))
+                    continue
+                step = getattr(self, f'{self.args.driver}_{endpoint}')
+                started = time.time()
+                gap = started - self.previous_end if self.previous_end is not None else None
+                t0 = time.perf_counter()
+                try:
+                    status, size, value = step(http, token)
+                    error = None if 200 <= status < 300 else f'HTTP {status}'
+                except httpx.HTTPStatusError as e:
+                    status, size, value, error = e.response.status_code, 0, None, f'HTTP {e.response.status_code}'
+                except (httpx.HTTPError, ValueError, KeyError) as e:
+                    status, size, value, error = 0, 0, None, f'{type(e).__name__}: {e}'
+                ms = (time.perf_counter() - t0) * 1000
+                self.previous_end = time.time()
+                if endpoint == 'login':
+                    self.token, self.token_time = (value, time.time()) if error is None else (None, 0.0)
+                results.append({'ts': started, 'endpoint': endpoint, 'status': status, 'ms': ms,
+                                'bytes': size, 'gap_s': gap, 'error': error})
+        self.rounds += 1
+        return results
+
+    @staticmethod
+    def skipped(endpoint):
+        return {'ts': time.time(), 'endpoint': endpoint, 'status': 0, 'ms': 0.0, 'bytes': 0,
+                'gap_s': None, 'error': 'skipped (login failed)'}
+
+    # ── api: the deployment ────────────────────────────────────────
+
+    def api_login(self, http, token):
+        resp = http.post(f'{self.args.base_url}/api/auth/login',
+                         json={'email': self.args.email, 'password': self.args.password})
+        return resp.status_code, len(resp.content), resp.json().get('token') if resp.is_success else None
+
+    def api_get(self, http, token, path, params=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        resp = http.get(f'{self.args.base_url}{path}', params=params, headers=headers)
+        return resp.status_code, len(resp.content), None
+
+    def api_feeds(self, http, token):
+        return self.api_get(http, token, '/api/feeds')
+
+    def api_articles(self, http, token):
+        return self.api_get(http, token, '/api/articles', {'limit': ARTICLES_LIMIT})
+
+    def api_recommended(self, http, token):
+        return self.api_get(http, None, '/api/recommended-feeds')
+
+    # ── simulate: the Functions' Supabase calls, in order ─────────
+
+    def rest(self, http, token, table, params):
+        resp = http.get(f'{self.args.supabase_url}/rest/v1/{table}', params=params,
+                        headers={'apikey': 'anon', **({'Authorization': f'Bearer {token}'} if token else {})})
+        resp.raise_for_status()
+        return resp.json(), len(resp.content)
+
+    def require_auth(self, http, token):
+        """lib/auth.ts requireAuth: GET /auth/v1/user on every authenticated request."""
+        resp = http.get(f'{self.args.supabase_url}/auth/v1/user',
+                        headers={'apikey': 'anon', 'Authorization': f'Bearer {token}'})
+        resp.raise_for_status()
+        return resp.json()['id']
+
+    def simulate_login(self, http, token):
+        resp = http.post(f'{self.args.supabase_url}/auth/v1/token', params={'grant_type': 'password'},
+                         json={'email': self.args.email, 'password': self.args.password},
+                         headers={'apikey': 'anon'})
+        return resp.status_code, len(resp.content), resp.json().get('access_token') if resp.is_success else None
+
+    def simulate_feeds(self, http, token):
+        uid = self.require_auth(http, token)
+        _, size = self.rest(http, token, 'feeds', {'select': '*', 'user_id': f'eq.{uid}',
+                                                   'order': 'order.asc', 'limit': 100})
+        return 200, size, None
+
+    def simulate_articles(self, http, token):
+        """articles/index.ts: feeds, every unexpired article, every read id (pages of 1000)."""
+        uid = self.require_auth(http, token)
+        _, total = self.rest(http, token, 'feeds', {'select': 'id, last_fetched_at', 'user_id': f'eq.{uid}'})
+        now = datetime.now(timezone.utc).isoformat()
+        for table, params in (
+            ('articles', {'select': '*', 'user_id': f'eq.{uid}', 'expires_at': f'gt.{now}',
+                          'order': 'published_at.desc.nullslast'}),
+            ('read_articles', {'select': 'article_id', 'user_id': f'eq.{uid}'}),
+        ):
+            offset = 0
+            while True:
+                page, size = self.rest(http, token, table, {**params, 'offset': offset, 'limit': PAGE_SIZE})
+                total += size
+                if len(page) < PAGE_SIZE:
+                    break
+                offset += PAGE_SIZE
+        return 200, total, None
+
+    def simulate_recommended(self, http, token):
+        _, size = self.rest(http, None, 'recommended_feeds', {'select': 'id, name, url, sort_order',
+                                                              'is_active': 'eq.true', 'order': 'sort_order.asc'})
+        return 200, size, None
+
+
+# ── Classification ─────────────────────────────────────────────────
+
+def median(values):
+    return percentile(values, 50)
+
+
+def classify(samples, k, idle_gap):
+    """
+    Mark each successful sample 'cold', 'slow' or 'warm', per endpoint.
+
+    Outliers are above median + k * MAD (scaled, with a floor). Those that
+    followed an idle gap are cold starts; the rest are just slow. Returns
+    {endpoint: threshold ms}.
+    """
+    thresholds = {}
+    for endpoint in ENDPOINTS:
+        ok = [s for s in samples if s['endpoint'] == endpoint and not s['error']]
+        for s in ok:
+            s['class'] = 'warm'
+        if len(ok) < MIN_SAMPLES:
+            continue
+        # Warm-position samples make the better baseline when there are enough of them
+        after_work = [s['ms'] for s in ok if s['gap_s'] is not None and s['gap_s'] < idle_gap]
+        baseline = after_work if len(after_work) >= MIN_SAMPLES else [s['ms'] for s in ok]
+        mid = median(baseline)
+        mad = median([abs(v - mid) for v in baseline]) * MAD_SCALE
+        threshold = mid + k * max(mad, MIN_SPREAD_MS, mid * MIN_SPREAD_RATIO)
+        thresholds[endpoint] = threshold
+        for s in ok:
+            if s['ms'] > threshold:
+                s['class'] = 'cold' if s['gap_s'] is None or s['gap_s'] >= idle_gap else 'slow'
+    return thresholds
+
+
+def rolling_p95(samples, endpoint, start, end, window, every):
+    """[(t, n, p95 ms)] of the warm samples in (t - window, t], for t = start + every ... end."""
+    warm = [(s['ts'], s['ms']) for s in samples
+            if s['endpoint'] == endpoint and s.get('class') in ('warm', 'slow')]
+    points, t = [], start + every
+    while t <= end + every - 1e-6:
+        values = [ms for ts, ms in warm if t - window < ts <= t]
+        points.append((min(t, end), len(values), percentile(values, 95) if values else None))
+        t += every
+    return points
+
+
+# ── Output ─────────────────────────────────────────────────────────
+
+def local_time(ts, fmt='%m-%d %H:%M'):
+    return datetime.fromtimestamp(ts).strftime(fmt)
+
+
+def print_round(results):
+    cells = []
+    for r in results:
+        if r['error']:
+            cells.append(f"{r['endpoint']} {'skip' if r['status'] == 0 and r['ms'] == 0 else 'ERR'}")
+        else:
+            mark = {'cold': '*', 'slow': '!'}.get(r.get('class'), '')
+            cells.append(f"{r['endpoint']} {r['ms']:.0f}ms{mark}")
+    print(f"  {local_time(results[0]['ts'], '%H:%M:%S')}  " + '  '.join(cells), flush=True)
+    for r in results:
+        if r['error'] and r['ms']:
+            print(f"      {r['endpoint']}: {r['error'][:100]}")
+
+
+def print_report(samples, args, target):
+    now = time.time()
+    start = max(now - args.since, min((s['ts'] for s in samples), default=now))
+    thresholds = classify(samples, args.k, args.idle_gap)
+
+    print()
+    print("-" * 70)
+    print(f"  Per endpoint - {target}, last {format_duration(args.since)}")
+    print("-" * 70)
+    if not samples:
+        print("  No samples stored for this target yet.")
+        return
+    print(f"  {'Endpoint':<28} {'OK':>5} {'Err':>4} {'Cold':>5} {'Slow':>5} {'Warm p50':>9} {'Warm p95':>9} "
+          f"{'Cold p50':>9}")
+    print(f"  {'─'*28} {'─'*5} {'─'*4} {'─'*5} {'─'*5} {'─'*9} {'─'*9} {'─'*9}")
+    for endpoint in ENDPOINTS:
+        rows = [s for s in samples if s['endpoint'] == endpoint]
+        ok = [s for s in rows if not s['error']]
+        warm = [s['ms'] for s in ok if s['class'] != 'cold']
+        cold = [s['ms'] for s in ok if s['class'] == 'cold']
+        slow = sum(s['class'] == 'slow' for s in ok)
+        fmt = lambda v: f"{v:.0f}ms" if v is not None else '-'
+        print(f"  {ENDPOINT_PATHS[endpoint]:<28} {len(ok):>5} {len(rows) - len(ok):>4} {len(cold):>5} {slow:>5} "
+              f"{fmt(percentile(warm, 50) if warm else None):>9} {fmt(percentile(warm, 95) if warm else None):>9} "
+              f"{fmt(median(cold) if cold else None):>9}")
+    print()
+    ok_bytes = [s['bytes'] for s in samples if not s['error']]
+    print(f"  {len(samples):,} requests, {format_bytes(sum(ok_bytes))} received. "
+          f"Cold: an outlier after >= {format_duration(args.idle_gap)} idle.")
+    if thresholds:
+        print(f"  Outlier above median + {args.k:g} x MAD: "
+              + ', '.join(f"{e} {t:.0f}ms" for e, t in thresholds.items()))
+    else:
+        print(f"  Outliers are classified once an endpoint has {MIN_SAMPLES} samples.")
+
+    print()
+    print("-" * 70)
+    print(f"  Rolling warm p95 (ms) - {format_duration(args.window)} window, every {format_duration(args.every)}")
+    print("-" * 70)
+    series = {e: rolling_p95(samples, e, start, now, args.window, args.every) for e in ENDPOINTS}
+    print(f"  {'Until':<12} " + ' '.join(f"{e:>13}" for e in ENDPOINTS))
+    print(f"  {'─'*12} " + ' '.join('─' * 13 for _ in ENDPOINTS))
+    points = series[ENDPOINTS[0]][-args.limit:]
+    offset = len(series[ENDPOINTS[0]]) - len(points)
+    for i, (t, _, _) in enumerate(points, offset):
+        cells = []
+        for e in ENDPOINTS:
+            _, n, p95 = series[e][i]
+            cells.append(f"{p95:.0f} ({n})" if p95 is not None else '-')
+        print(f"  {local_time(t, '%m-%d %H:%M' if args.every >= 60 else '%H:%M:%S'):<12} "
+              + ' '.join(f"{c:>13}" for c in cells))
+    print()
+    print("  Each cell: p95 of the warm requests in the window (request count). Cold")
+    print("  starts are left out; slow warm requests stay in.")
+
+    errors = [s for s in samples if s['error']]
+    if errors:
+        print()
+        print(f"  Last errors ({len(errors)} total):")
+        for s in errors[-5:]:
+            print(f"    {local_time(s['ts'])}  {s['endpoint']:<12} {s['error'][:80]}")
+
+
+def print_header(args, target, title):
+    print()
+    print("=" * 70)
+    print(f"  FeedOwn - Latency Probe ({title})")
+    print("=" * 70)
+    print(f"  Target: {target}")
+    print(f"  Store:  {args.db}")
+
+
+def run(args):
+    prober = Prober(args)
+    conn = connect(args.db)
+    prober.previous_end = last_request_end(conn, prober.target)
+    print_header(args, prober.target, 'run')
+    print(f"  Every {format_duration(args.interval)} as {args.email}"
+          + (f", {args.rounds} rounds" if args.rounds else ", Ctrl+C to stop"))
+    print()
+    print("  * cold start   ! slow (outlier without an idle gap)")
+    print()
+
+    first = time.monotonic()
+    done = 0
+    try:
+        while not args.rounds or done < args.rounds:
+            results = prober.run_round()
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                 [(r['ts'], prober.target, r['endpoint'], r['status'], r['ms'], r['bytes'],
+                                   r['gap_s'], r['error']) for r in results if r['ms']])
+            history = load_samples(conn, prober.target, time.time() - args.since)
+            classify(history, args.k, args.idle_gap)
+            classes = {(s['endpoint'], s['ts']): s.get('class') for s in history}
+            for r in results:
+                r['class'] = classes.get((r['endpoint'], r['ts']))
+            print_round(results)
+            done += 1
+            if args.rounds and done >= args.rounds:
+                break
+            # Fixed rate: a slow round doesn't push the schedule back, it skips a slot
+            elapsed = time.monotonic() - first
+            time.sleep(args.interval - elapsed % args.interval)
+    except KeyboardInterrupt:
+        print()
+
+    print_report(load_samples(conn, prober.target, time.time() - args.since), args, prober.target)
+    print()
+    print("=" * 70)
+
+
+def report(args):
+    conn = connect(args.db)
+    target = args.target or (args.base_url if args.driver == 'api' else f'simulate:{args.supabase_url}')
+    print_header(args, target, 'report')
+    if not args.target:
+        known = [r[0] for r in conn.execute('SELECT DISTINCT target FROM probes ORDER BY target')]
+        others = [t for t in known if t != target]
+        if others:
+            print(f"  Other targets in the store: {', '.join(others)} (--target)")
+    print_report(load_samples(conn, target, time.time() - args.since), args, target)
+    print()
+    print("=" * 70)
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--driver", choices=["api", "simulate"], default="api",
+                        help="Probe the API (default) or replay its Supabase calls against fake_supabase.py")
+    common.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"API origin (default: {DEFAULT_BASE_URL})")
+    common.add_argument("--supabase-url", default=os.getenv('SUPABASE_URL', 'http://127.0.0.1:54321'),
+                        help="Supabase URL for simulate (default: $SUPABASE_URL or fake_supabase.py)")
+    common.add_argument("--db", default=DEFAULT_DB, help=f"SQLite file for the samples (default: {DEFAULT_DB})")
+    common.add_argument("--since", type=duration_arg, default=86400, metavar="DURATION",
+                        help="History used for the report and the cold-start baseline (default: 1d)")
+    common.add_argument("--window", type=duration_arg, default=3600, metavar="DURATION",
+                        help="Rolling p95 window (default: 1h)")
+    common.add_argument("--every", type=duration_arg, default=3600, metavar="DURATION",
+                        help="Step between rolling p95 rows (default: 1h)")
+    common.add_argument("--limit", type=int, default=24, help="Rolling p95 rows to print (default: 24)")
+    common.add_argument("--idle-gap", type=duration_arg, default=30, metavar="DURATION",
+                        help="Idle time before a request is a cold-start candidate (default: 30s)")
+    common.add_argument("--k", type=float, default=5.0,
+                        help="Outlier threshold in scaled MADs above the median (default: 5)")
+
+    parser = argparse.ArgumentParser(description="FeedOwn synthetic latency prober")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", parents=[common], help="Probe on a schedule and store the latencies")
+    p_run.add_argument("--interval", type=duration_arg, default=60, metavar="DURATION",
+                       help="Time between rounds (default: 60s)")
+    p_run.add_argument("--rounds", type=int, default=0, help="Stop after N rounds (default: run until Ctrl+C)")
+    p_run.add_argument("--email", default=os.getenv('FEEDOWN_PROBE_EMAIL', 'user1@example.com'),
+                       help="Probe account (default: $FEEDOWN_PROBE_EMAIL or a fake_supabase.py user)")
+    p_run.add_argument("--password", default=os.getenv('FEEDOWN_PROBE_PASSWORD', TEST_PASSWORD),
+                       help="Probe account password (default: $FEEDOWN_PROBE_PASSWORD)")
+    p_run.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (default: 30)")
+    p_report = sub.add_parser("report", parents=[common], help="Report on the stored samples")
+    p_report.add_argument("--target", help="Stored target to report on (default: from --driver/--base-url)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        run(args)
+    else:
+        report(args)
+
+
+if __name__ == '__main__':
+    main()
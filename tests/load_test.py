@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+FeedOwn API load test.
+
+Runs virtual users through the api_test.py flow concurrently:
+
+  register -> add feed -> refresh -> list articles -> batch-read -> delete feed
+
+Users arrive at --rate per second (Poisson arrivals, or evenly spaced with
+--arrival constant) until --users have started, with at most --concurrency
+in flight. A step that fails ends that user's flow (the feed is still
+deleted if it was added). The report shows latency percentiles, a latency
+histogram and errors per endpoint, plus overall throughput.
+
+Usage:
+  python tests/load_test.py --users 100 --rate 5
+  python tests/load_test.py --base-url https://xxxx.feedown.pages.dev --users 10 --rate 0.5 \\
+      --feed-url https://www.theverge.com/rss/index.xml
+  python tests/load_test.py --login --users 1000 --rate 20 --json results.json
+
+Local stack (no Supabase project or feed hosts needed):
+  python tests/fake_supabase.py &          # Supabase Auth + PostgREST on :54321
+  python tests/fake_feeds.py &             # RSS origin on :8791
+  cd apps/web && npx wrangler pages dev dist --compatibility-flags=nodejs_compat \\
+      --binding SUPABASE_URL=http://127.0.0.1:54321 --binding SUPABASE_ANON_KEY=fake \\
+      --binding SUPABASE_SERVICE_ROLE_KEY=fake
+  python tests/load_test.py                # http://127.0.0.1:8788, feeds from fake_feeds.py
+
+--login signs in as the users fake_supabase.py seeds (user<N>@example.com)
+instead of registering new ones, so the flow runs against accounts that
+already have feeds and articles.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+
+try:
+    import httpx
+except ImportError:
+    print("Error: httpx library not installed")
+    print("Run: pip install httpx")
+    sys.exit(1)
+
+DEFAULT_BASE_URL = os.getenv('FEEDOWN_API_URL', 'http://127.0.0.1:8788')   # wrangler pages dev
+DEFAULT_FEED_URL = 'http://127.0.0.1:8791/feeds/{n}.xml'                   # tests/fake_feeds.py
+TEST_PASSWORD = "password123"
+
+STEPS = ['register', 'login', 'add_feed', 'refresh', 'articles', 'batch_read', 'delete_feed']
+HISTOGRAM_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+# ── Stats ──────────────────────────────────────────────────────────
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers: the smallest value with pct% at or below it."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = math.ceil(len(ordered) * pct / 100)
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class StepStats:
+    def __init__(self):
+        self.latencies = []     # seconds, successful and failed requests alike
+        self.statuses = {}      # status code (or exception name) -> count
+        self.errors = 0
+        self.samples = []       # first few error messages
+
+    def record(self, elapsed, status, ok, message=None):
+        self.latencies.append(elapsed)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+            if message and len(self.samples) < 3:
+                self.samples.append(f"{status}: {message[:120]}")
+
+    def histogram(self):
+        """Request counts per HISTOGRAM_MS bucket (last bucket is everything slower)."""
+        counts = [0] * (len(HISTOGRAM_MS) + 1)
+        for s in self.latencies:
+            ms = s * 1000
+            i = next((i for i, edge in enumerate(HISTOGRAM_MS) if ms <= edge), len(HISTOGRAM_MS))
+            counts[i] += 1
+        return counts
+
+    def summary(self):
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items(), key=lambda kv: str(kv[0]))},
+            'p50_ms': percentile(self.latencies, 50) * 1000,
+            'p95_ms': percentile(self.latencies, 95) * 1000,
+            'p99_ms': percentile(self.latencies, 99) * 1000,
+            'max_ms': max(self.latencies, default=0) * 1000,
+            'histogram': dict(zip([f'<={e}ms' for e in HISTOGRAM_MS] + [f'>{HISTOGRAM_MS[-1]}ms'],
+                                  self.histogram())),
+            'error_samples': self.samples,
+        }
+
+
+class Run:
+    """Shared state of one load test run."""
+
+    def __init__(self, args):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.steps = {step: StepStats() for step in STEPS}
+        self.started = 0
+        self.finished = 0
+        self.completed = 0      # users whose whole flow succeeded
+        self.in_flight = 0
+
+
+class StepFailed(Exception):
+    pass
+
+
+async def call(run, client, step, method, path, token=None, expect=(200, 201), **kwargs):
+    """Send one request, record it under `step`, and return the parsed JSON body."""
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, headers=headers, **kwargs)
+    except httpx.HTTPError as e:
+        run.steps[step].record(time.perf_counter() - start, type(e).__name__, False, str(e))
+        raise StepFailed(step)
+    elapsed = time.perf_counter() - start
+
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    ok = response.status_code in expect and data is not None
+    message = None
+    if not ok:
+        if isinstance(data, dict):
+            message = data.get('error') or data.get('message') or json.dumps(data)
+        elif data is None:
+            # e.g. the Pages SPA fallback answering with index.html
+            message = f'non-JSON response ({response.headers.get("Content-Type")}): {response.text[:60]}'
+        else:
+            message = json.dumps(data)
+    run.steps[step].record(elapsed, response.status_code, ok, message)
+    if not ok:
+        raise StepFailed(step)
+    return data
+
+
+# ── Virtual User ───────────────────────────────────────────────────
+
+async def user_flow(run, client, i):
+    """One virtual user: sign up (or in), add a feed, refresh, read, clean up."""
+    args = run.args
+    token = None
+    feed_id = None
+    try:
+        if args.login:
+            step, path, email = 'login', '/api/auth/login', f'user{i % args.login_pool}@example.com'
+        else:
+            step, path, email = 'register', '/api/auth/register', f'loadtest-{run.run_id}-{i}@example.com'
+        data = await call(run, client, step, 'POST', path, json={'email': email, 'password': TEST_PASSWORD})
+        token = data.get('token')
+        if not token:
+            raise StepFailed(step)
+
+        feed_url = args.feed_url.format(n=i % args.feeds)
+        # With --login, a user still subscribed from a --keep run gets 400 "already exists"
+        data = await call(run, client, 'add_feed', 'POST', '/api/feeds', token, json={'url': feed_url})
+        feed_id = (data.get('feed') or {}).get('id')
+
+        await call(run, client, 'refresh', 'POST', '/api/refresh', token)
+
+        data = await call(run, client, 'articles', 'GET', '/api/articles', token,
+                          params={'limit': args.page_size})
+        unread = [a['id'] for a in data.get('articles', []) if not a.get('isRead')]
+        if unread and args.read_count:
+            await call(run, client, 'batch_read', 'POST', '/api/articles/batch-read', token,
+                       json={'articleIds': unread[:args.read_count]})
+        run.completed += 1
+    except StepFailed:
+        pass
+    finally:
+        if feed_id and not args.keep:
+            try:
+                await call(run, client, 'delete_feed', 'DELETE', f'/api/feeds/{feed_id}', token)
+            except StepFailed:
+                pass
+
+
+async def run_user(run, client, semaphore, i):
+    async with semaphore:
+        run.in_flight += 1
+        try:
+            await user_flow(run, client, i)
+        finally:
+            run.in_flight -= 1
+            run.finished += 1
+
+
+async def report_progress(run, start, interval=5.0):
+    while True:
+        await asyncio.sleep(interval)
+        errors = sum(s.errors for s in run.steps.values())
+        print(f"  [{time.perf_counter() - start:6.1f}s] started {run.started:,}  finished {run.finished:,}  "
+              f"in flight {run.in_flight:,}  errors {errors:,}", flush=True)
+
+
+async def run_load(run):
+    args = run.args
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    tasks = []
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        progress = None if args.quiet else asyncio.create_task(report_progress(run, start))
+        for i in range(args.users):
+            if args.rate > 0 and i:
+                gap = rng.expovariate(args.rate) if args.arrival == 'poisson' else 1 / args.rate
+                await asyncio.sleep(gap)
+            run.started += 1
+            tasks.append(asyncio.create_task(run_user(run, client, semaphore, i)))
+        arrivals_done = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        if progress:
+            progress.cancel()
+    return time.perf_counter() - start, arrivals_done
+
+
+# ── Report ─────────────────────────────────────────────────────────
+
+def print_report(run, elapsed, arrivals):
+    args = run.args
+    used = [(step, run.steps[step]) for step in STEPS if run.steps[step].latencies]
+    total_requests = sum(len(s.latencies) for _, s in used)
+    total_errors = sum(s.errors for _, s in used)
+
+    print()
+    print("=" * 70)
+    print("  FeedOwn - Load Test Results")
+    print("=" * 70)
+    print(f"  Target:       {args.base_url}")
+    print(f"  Users:        {args.users:,} ({'login' if args.login else 'register'}), "
+          f"concurrency {args.concurrency}, "
+          + (f"{args.arrival} arrivals at {args.rate:g}/s" if args.rate > 0 else "all at once"))
+    print(f"  Duration:     {elapsed:.1f}s (arrivals over {arrivals:.1f}s)")
+    print(f"  Throughput:   {total_requests / elapsed:.1f} req/s, "
+          f"{run.completed / elapsed:.2f} completed flows/s")
+    print(f"  Flows:        {run.completed:,} / {args.users:,} completed")
+    print(f"  Requests:     {total_requests:,} ({total_errors:,} errors, "
+          f"{total_errors / total_requests * 100 if total_requests else 0:.1f}%)")
+
+    print()
+    print("-" * 70)
+    print("  Latency by endpoint (ms)")
+    print("-" * 70)
+    print(f"  {'Endpoint':<12} {'Reqs':>7} {'Errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    print(f"  {'─'*12} {'─'*7} {'─'*7} {'─'*8} {'─'*8} {'─'*8} {'─'*8}")
+    for step, s in used:
+        sm = s.summary()
+        print(f"  {step:<12} {sm['requests']:>7,} {sm['errors']:>7,} {sm['p50_ms']:>8.0f} "
+              f"{sm['p95_ms']:>8.0f} {sm['p99_ms']:>8.0f} {sm['max_ms']:>8.0f}")
+
+    print()
+    print("-" * 70)
+    print("  Latency histogram (requests per bucket)")
+    print("-" * 70)
+    labels = [f'<={e}' for e in HISTOGRAM_MS] + [f'>{HISTOGRAM_MS[-1]}']
+    for step, s in used:
+        counts = s.histogram()
+        peak = max(counts) or 1
+        print(f"  {step}:")
+        for label, count in zip(labels, counts):
+            if count:
+                print(f"    {label + 'ms':>9} {count:>7,} {'#' * max(1, round(count / peak * 40))}")
+
+    if total_errors:
+        print()
+        print("-" * 70)
+        print("  Errors by endpoint")
+        print("-" * 70)
+        for step, s in used:
+            if not s.errors:
+                continue
+            statuses = ', '.join(f"{k}: {v:,}" for k, v in s.summary()['statuses'].items())
+            print(f"  {step:<12} {statuses}")
+            for sample in s.samples:
+                print(f"    e.g. {sample}")
+
+    print()
+    print("=" * 70)
+
+
+def write_json(run, elapsed, arrivals, path):
+    args = run.args
+    total_requests = sum(len(s.latencies) for s in run.steps.values())
+    result = {
+        'target': args.base_url,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'arrival': args.arrival,
+        'mode': 'login' if args.login else 'register',
+        'duration_s': elapsed,
+        'arrivals_s': arrivals,
+        'completed_flows': run.completed,
+        'requests': total_requests,
+        'requests_per_s': total_requests / elapsed if elapsed else 0,
+        'endpoints': {step: s.summary() for step, s in run.steps.items() if s.latencies},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"  Results written to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FeedOwn API load test")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help=f"API origin (default: $FEEDOWN_API_URL or {DEFAULT_BASE_URL})")
+    parser.add_argument("--users", type=int, default=50, help="Virtual users to run (default: 50)")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="User arrivals per second, 0 to start all at once (default: 2)")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson",
+                        help="Arrival process (default: poisson)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Max users in flight (default: 50)")
+    parser.add_argument("--feed-url", default=DEFAULT_FEED_URL,
+                        help="Feed each user adds; {n} is replaced by the user number modulo --feeds "
+                             f"(default: {DEFAULT_FEED_URL})")
+    parser.add_argument("--feeds", type=int, default=100, help="Distinct feeds for {n} (default: 100)")
+    parser.add_argument("--page-size", type=int, default=50, help="Articles listed per user (default: 50)")
+    parser.add_argument("--read-count", type=int, default=20,
+                        help="Articles each user marks read in one batch-read (default: 20)")
+    parser.add_argument("--login", action="store_true",
+                        help="Sign in as fake_supabase.py's seeded users instead of registering")
+    parser.add_argument("--login-pool", type=int, default=1000,
+                        help="Seeded users to cycle through with --login (default: 1000)")
+    parser.add_argument("--keep", action="store_true", help="Don't delete the feeds afterwards")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds (default: 60)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the arrival times")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--quiet", action="store_true", help="No progress lines")
+    args = parser.parse_args(argv)
+    args.base_url = args.base_url.rstrip('/')
+
+    run = Run(args)
+    print(f"  Load test {run.run_id}: {args.users:,} users against {args.base_url}")
+    elapsed, arrivals = asyncio.run(run_load(run))
+    print_report(run, elapsed, arrivals)
+    if args.json:
+        write_json(run, elapsed, arrivals, args.json)
+
+    # Non-zero exit when no flow completed, so CI notices a dead target
+    sys.exit(0 if run.completed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Refresh batch driver for POST /api/refresh.
+
+/api/refresh refreshes BATCH_SIZE (5) feeds per call, and clients loop over
+?offset= until `remaining` is 0 (DashboardPage.jsx, FeedsContext.js). This
+runs complete multi-batch refreshes for a fresh user with N feeds and
+records each batch: latency, new articles and failed feeds from its
+RefreshStats, and which feeds it covered.
+
+  api        drive a deployment or `wrangler pages dev` (server batch size)
+  simulate   replay refresh.ts's batch in Python against fake_supabase.py and
+             fake_feeds.py, so any --batch-sizes can be swept
+
+Batches run sequentially, as the clients do, or overlapping (--overlap K
+batches in flight, offsets computed up front). Every run reports coverage:
+how many of the N feeds a batch actually refreshed. Batches are sliced from
+the feed list ordered by last_fetched_at, which each batch updates, so
+later offsets can skip or repeat feeds.
+
+Usage:
+  python tests/refresh_driver.py api --feeds 20,50,100
+  python tests/refresh_driver.py api --base-url https://xxxx.feedown.pages.dev --feeds 20 \\
+      --feed-url 'https://example.com/feeds/{n}.xml'
+  python tests/refresh_driver.py simulate --feeds 20,50,100 --batch-sizes 5,10,20 --modes sequential,overlap
+
+`api` creates one user per (feeds, mode) through /api/auth/register and
+deletes it with DELETE /api/user/account afterwards (--keep to skip). The
+middleware allows one POST /api/refresh per token every 30s, ?offset=
+batches included; a batch answered with 429 waits out Retry-After and is
+sent again (up to --max-wait seconds), and the wait is part of Total s.
+`simulate` talks to SUPABASE_URL (default: fake_supabase.py on :54321)
+directly with a user token, so RLS applies as it does for the Functions.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from email.utils import parsedate_to_datetime
+
+from load_test import httpx, percentile, DEFAULT_BASE_URL, DEFAULT_FEED_URL, TEST_PASSWORD
+
+SERVER_BATCH_SIZE = 5        # BATCH_SIZE in functions/api/refresh.ts
+REFRESH_LOCK_SECONDS = 30    # REFRESH_LOCK_TTL_SECONDS in functions/_middleware.ts
+SUBREQUEST_LIMIT = 50        # Workers free plan, per invocation
+ARTICLE_TTL = timedelta(days=7)
+PAGE_SIZE = 1000
+
+
+def parse_list(value, kind=int):
+    return [kind(v) for v in value.split(',') if v.strip()]
+
+
+def batch_result(offset, elapsed, status, data=None, calls=None, error=None, waited=0.0):
+    """One batch, in the same shape for both drivers."""
+    data = data if isinstance(data, dict) else {}
+    stats = data.get('stats') or {}
+    return {
+        'offset': offset,
+        'elapsed': elapsed,
+        'status': status,
+        'error': error or (data.get('error') if status != 200 else None),
+        'feed_ids': [f.get('id') for f in data.get('feeds') or []],
+        'successful': stats.get('successfulFeeds', 0),
+        'failed': stats.get('failedFeeds', 0),
+        'new_articles': stats.get('newArticles', 0),
+        'remaining': data.get('remaining', 0),
+        'next_offset': data.get('nextOffset'),
+        'calls': calls,
+        'waited': waited,
+    }
+
+
+def retry_after(resp, data):
+    """Seconds to wait after a 429: Retry-After, else the body's retryAfterSec, else the lock TTL."""
+    for value in (resp.headers.get('Retry-After'), data.get('retryAfterSec') if isinstance(data, dict) else None):
+        try:
+            return max(float(value), 0.0) + 0.5
+        except (TypeError, ValueError):
+            continue
+    return REFRESH_LOCK_SECONDS + 0.5
+
+
+# ── API Driver ─────────────────────────────────────────────────────
+
+class ApiUser:
+    """A throwaway user with N feeds on a running deployment."""
+
+    def __init__(self, args, client, label):
+        self.args = args
+        self.client = client
+        self.email = f'refresh-{uuid.uuid4().hex[:8]}-{label}@example.com'
+        self.token = None
+        self.last_start = 0.0
+
+    def request(self, method, path, **kwargs):
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        return self.client.request(method, path, headers=headers, **kwargs)
+
+    def setup(self, n_feeds):
+        resp = self.request('POST', '/api/auth/register', json={'email': self.email, 'password': TEST_PASSWORD})
+        resp.raise_for_status()
+        self.token = resp.json()['token']
+
+        def add(n):
+            resp = self.request('POST', '/api/feeds', json={'url': self.args.feed_url.format(n=n)})
+            return resp.status_code
+
+        with ThreadPoolExecutor(self.args.setup_concurrency) as pool:
+            statuses = list(pool.map(add, range(n_feeds)))
+        failed = [s for s in statuses if s != 201]
+        if failed:
+            print(f"  Warning: {len(failed)} of {n_feeds} feeds could not be added (HTTP {failed[0]})")
+        return n_feeds - len(failed)
+
+    def batch(self, offset):
+        """One batch; a 429 from the refresh limiter is waited out (Retry-After) and retried."""
+        waited = 0.0
+        while True:
+            start = time.perf_counter()
+            try:
+                resp = self.request('POST', '/api/refresh', params={'offset': offset} if offset else None)
+            except httpx.HTTPError as e:
+                return batch_result(offset, time.perf_counter() - start, type(e).__name__, error=str(e),
+                                    waited=waited)
+            elapsed = time.perf_counter() - start
+            try:
+                data = resp.json()
+            except ValueError:
+                data = {'error': f'non-JSON response ({resp.headers.get("Content-Type")})'}
+            wait = retry_after(resp, data)
+            if resp.status_code != 429 or waited + wait > self.args.max_wait:
+                return batch_result(offset, elapsed, resp.status_code, data, waited=waited)
+            time.sleep(wait)
+            waited += wait
+
+    def before_run(self):
+        """A new run starts at offset 0, which the middleware allows once per 30s per token."""
+        wait = self.last_start + REFRESH_LOCK_SECONDS + 0.5 - time.monotonic()
+        if self.last_start and wait > 0:
+            time.sleep(wait)
+        self.last_start = time.monotonic()
+
+    def cleanup(self):
+        if self.token and not self.args.keep:
+            self.request('DELETE', '/api/user/account')
+
+
+# ── Simulated Batch (refresh.ts in Python) ─────────────────────────
+
+class CountingClient:
+    """httpx.Client that counts requests (i.e. Workers subrequests) and response bytes, per thread."""
+
+    def __init__(self, **kwargs):
+        self.client = httpx.Client(**kwargs)
+        self.local = threading.local()
+
+    def reset(self):
+        self.local.calls = 0
+        self.local.bytes = 0
+
+    @property
+    def calls(self):
+        return getattr(self.local, 'calls', 0)
+
+    @property
+    def bytes(self):
+        return getattr(self.local, 'bytes', 0)
+
+    def request(self, method, url, **kwargs):
+        self.local.calls = self.calls + 1
+        resp = self.client.request(method, url, **kwargs)
+        self.local.bytes = self.bytes + len(resp.content)
+        return resp
+
+
+def parse_rss_items(xml_text):
+    """(guid, title, link, description, published_at) for each RSS 2.0 item."""
+    channel = ET.fromstring(xml_text).find('channel')
+    if channel is None:
+        raise ValueError('Invalid RSS feed: no channel element found')
+    items = []
+    for item in channel.iter('item'):
+        link = item.findtext('link') or ''
+        published = item.findtext('pubDate')
+        try:
+            published = parsedate_to_datetime(published).isoformat() if published else None
+        except (TypeError, ValueError):
+            published = None
+        items.append((item.findtext('guid') or link, item.findtext('title') or 'Untitled', link,
+                      re.sub(r'<[^>]+>', '', item.findtext('description') or '')[:10000], published))
+    return items
+
+
+class SimulatedUser:
+    """
+    A user on fake_supabase.py whose refresh batches are replayed here.
+
+    Each batch makes the same PostgREST calls and feed fetches, in the same
+    order, as functions/api/refresh.ts does for one Function invocation.
+    """
+
+    def __init__(self, args, batch_size, label):
+        self.args = args
+        self.batch_size = batch_size
+        self.email = f'refresh-{uuid.uuid4().hex[:8]}-{label}@example.com'
+        self.http = CountingClient(timeout=args.timeout, limits=httpx.Limits(max_connections=64))
+        self.uid = None
+        self.token = None
+        self.last_start = 0.0
+
+    def rest(self, method, path, params=None, json_body=None, prefer=None, single=False):
+        headers = {'apikey': 'anon', 'Authorization': f'Bearer {self.token}'}
+        if prefer:
+            headers['Prefer'] = prefer
+        if single:
+            headers['Accept'] = 'application/vnd.pgrst.object+json'
+        resp = self.http.request(method, f'{self.args.supabase_url}/rest/v1/{path}',
+                                 params=params, json=json_body, headers=headers)
+        return resp.json() if resp.content and resp.status_code < 300 else None
+
+    def setup(self, n_feeds):
+        resp = self.http.request('POST', f'{self.args.supabase_url}/auth/v1/signup',
+                                 json={'email': self.email, 'password': TEST_PASSWORD}, headers={'apikey': 'anon'})
+        resp.raise_for_status()
+        session = resp.json()
+        self.uid, self.token = session['user']['id'], session['access_token']
+        feeds = [{'user_id': self.uid, 'url': self.args.feed_url.format(n=n), 'title': '', 'order': n}
+                 for n in range(n_feeds)]
+        self.rest('POST', 'feeds', json_body=feeds)
+        return n_feeds
+
+    def delete_expired(self, now):
+        expired, offset = [], 0
+        while True:
+            page = self.rest('GET', 'articles', {'select': 'id', 'user_id': f'eq.{self.uid}',
+                                                 'expires_at': f'lt.{now}',
+                                                 'offset': offset, 'limit': PAGE_SIZE}) or []
+            expired.extend(a['id'] for a in page)
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        if not expired:
+            return
+        self.rest('DELETE', 'articles', {'user_id': f'eq.{self.uid}', 'expires_at': f'lt.{now}'})
+        for i in range(0, len(expired), 200):
+            chunk = ','.join(expired[i:i + 200])
+            self.rest('DELETE', 'read_articles', {'user_id': f'eq.{self.uid}', 'article_id': f'in.({chunk})'})
+
+    def refresh_feed(self, feed, existing, now):
+        """Fetch, parse and store one feed; returns new article count (raises on fetch failure)."""
+        resp = self.http.request('GET', feed['url'])
+        if resp.status_code != 200:
+            raise ValueError(f'HTTP {resp.status_code}')
+        new = []
+        for guid, title, link, description, published in parse_rss_items(resp.text):
+            article_id = hashlib.sha256(f"{feed['id']}:{guid}".encode()).hexdigest()[:32]
+            if article_id in existing:
+                continue
+            existing.add(article_id)
+            new.append({
+                'id': article_id, 'user_id': self.uid, 'feed_id': feed['id'], 'feed_title': feed['title'],
+                'title': title, 'url': link, 'description': description, 'published_at': published,
+                'fetched_at': now.isoformat(), 'expires_at': (now + ARTICLE_TTL).isoformat(),
+            })
+        if new:
+            self.rest('POST', 'articles', {'on_conflict': 'id'}, new, prefer='resolution=ignore-duplicates')
+        self.rest('PATCH', 'feeds', {'id': f"eq.{feed['id']}", 'user_id': f'eq.{self.uid}'},
+                  {'last_fetched_at': now.isoformat(), 'last_success_at': now.isoformat(), 'error_count': 0})
+        return len(new)
+
+    def batch(self, offset):
+        self.http.reset()
+        start = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        if offset == 0:
+            self.delete_expired(now.isoformat())
+
+        all_feeds = self.rest('GET', 'feeds', {'select': '*', 'user_id': f'eq.{self.uid}',
+                                               'order': 'last_fetched_at.asc.nullsfirst', 'limit': 100}) or []
+        feeds = all_feeds[offset:offset + self.batch_size]
+        remaining = max(0, len(all_feeds) - offset - self.batch_size)
+        stats = {'totalFeeds': len(all_feeds), 'successfulFeeds': 0, 'failedFeeds': 0, 'newArticles': 0}
+        if feeds:
+            existing, page_offset = set(), 0
+            while True:
+                page = self.rest('GET', 'articles', {'select': 'id', 'user_id': f'eq.{self.uid}',
+                                                     'offset': page_offset, 'limit': PAGE_SIZE}) or []
+                existing.update(a['id'] for a in page)
+                if len(page) < PAGE_SIZE:
+                    break
+                page_offset += PAGE_SIZE
+
+            for feed in feeds:
+                try:
+                    stats['newArticles'] += self.refresh_feed(feed, existing, now)
+                    stats['successfulFeeds'] += 1
+                except (httpx.HTTPError, ValueError, ET.ParseError):
+                    stats['failedFeeds'] += 1
+                    current = self.rest('GET', 'feeds', {'select': 'error_count', 'id': f"eq.{feed['id']}"},
+                                        single=True) or {}
+                    self.rest('PATCH', 'feeds', {'id': f"eq.{feed['id']}"},
+                              {'last_fetched_at': now.isoformat(),
+                               'error_count': (current.get('error_count') or 0) + 1})
+        else:
+            remaining = 0
+
+        data = {'stats': stats, 'feeds': feeds, 'remaining': remaining,
+                'nextOffset': offset + self.batch_size if remaining > 0 else None}
+        return batch_result(offset, time.perf_counter() - start, 200, data, calls=self.http.calls)
+
+    def before_run(self):
+        pass
+
+    def cleanup(self):
+        if self.uid is None or self.args.keep:
+            return
+        for table in ('read_articles', 'articles', 'feeds'):
+            self.rest('DELETE', table, {'user_id': f'eq.{self.uid}'})
+
+
+# ── Runs ───────────────────────────────────────────────────────────
+
+def run_refresh(user, n_feeds, batch_size, mode, overlap):
+    """One complete refresh: every batch until `remaining` is 0."""
+    user.before_run()
+    start = time.perf_counter()
+    if mode == 'sequential':
+        batches, offset = [], 0
+        while True:
+            result = user.batch(offset)
+            batches.append(result)
+            # The clients stop at the first failed batch
+            if result['status'] != 200 or not result['remaining'] or result['next_offset'] is None:
+                break
+            offset = result['next_offset']
+    else:
+        with ThreadPoolExecutor(overlap) as pool:
+            batches = list(pool.map(user.batch, range(0, max(n_feeds, 1), batch_size)))
+    elapsed = time.perf_counter() - start
+
+    refreshed = [fid for b in batches for fid in b['feed_ids']]
+    latencies = [b['elapsed'] for b in batches]
+    calls = [b['calls'] for b in batches if b['calls'] is not None]
+    return {
+        'feeds': n_feeds,
+        'batch_size': batch_size,
+        'mode': mode,
+        'elapsed_s': elapsed,
+        'batches': len(batches),
+        'batch_p50_ms': percentile(latencies, 50) * 1000,
+        'batch_max_ms': max(latencies, default=0) * 1000,
+        'new_articles': sum(b['new_articles'] for b in batches),
+        'failed_feeds': sum(b['failed'] for b in batches),
+        'errors': sum(1 for b in batches if b['status'] != 200),
+        'rate_limited': sum(1 for b in batches if b['status'] == 429),
+        'waited_s': sum(b['waited'] for b in batches),
+        'covered': len(set(refreshed)),
+        'repeated': len(refreshed) - len(set(refreshed)),
+        'max_calls': max(calls) if calls else None,
+        'batch_details': batches,
+    }
+
+
+def print_run(label, result, verbose):
+    coverage = result['covered'] / result['feeds'] * 100 if result['feeds'] else 0
+    calls = result['max_calls']
+    calls_text = f"{calls:>4}{'!' if calls > SUBREQUEST_LIMIT else ' '}" if calls is not None else '    -'
+    print(f"  {result['feeds']:>5} {result['batch_size']:>5} {label:<14} {result['batches']:>7} "
+          f"{result['elapsed_s']:>8.2f} {result['batch_p50_ms']:>8.0f} {result['batch_max_ms']:>8.0f} "
+          f"{result['new_articles']:>6,} {result['failed_feeds']:>6} {coverage:>7.0f}% {result['repeated']:>5} "
+          f"{result['errors']:>4} {calls_text}")
+    if verbose:
+        for b in result['batch_details']:
+            error = f"  {b['status']}: {(b['error'] or '')[:50]}" if b['status'] != 200 else ''
+            waited = f"  waited {b['waited']:.0f}s" if b['waited'] else ''
+            print(f"        offset {b['offset']:>3}  {b['elapsed'] * 1000:>7.0f}ms  ok {b['successful']:>3}  "
+                  f"failed {b['failed']:>3}  new {b['new_articles']:>5}  remaining {b['remaining']:>3}{waited}{error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive and measure /api/refresh offset batching")
+    parser.add_argument("driver", choices=["api", "simulate"],
+                        help="api: a running deployment; simulate: refresh.ts replayed against the local fakes")
+    parser.add_argument("--feeds", default="20,50,100", help="Feed counts to test (default: 20,50,100)")
+    parser.add_argument("--modes", default="sequential,overlap",
+                        help="sequential and/or overlap (default: both)")
+    parser.add_argument("--overlap", type=int, default=4, help="Batches in flight in overlap mode (default: 4)")
+    parser.add_argument("--batch-sizes", default=str(SERVER_BATCH_SIZE),
+                        help=f"simulate: feeds per batch to sweep (default: {SERVER_BATCH_SIZE}; "
+                             "api always uses the server's)")
+    parser.add_argument("--rounds", type=int, default=2,
+                        help="Full refreshes per user; round 1 stores every article, later rounds few (default: 2)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"api: API origin (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--supabase-url", default=os.getenv('SUPABASE_URL', 'http://127.0.0.1:54321'),
+                        help="simulate: Supabase URL (default: $SUPABASE_URL or fake_supabase.py)")
+    parser.add_argument("--feed-url", default=DEFAULT_FEED_URL,
+                        help=f"Feed URL template, {{n}} = 0..N-1 (default: {DEFAULT_FEED_URL})")
+    parser.add_argument("--setup-concurrency", type=int, default=8, help="api: parallel feed adds (default: 8)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout (default: 120)")
+    parser.add_argument("--max-wait", type=float, default=300.0,
+                        help="api: seconds a batch may wait out 429 Retry-After before it counts as failed "
+                             "(default: 300)")
+    parser.add_argument("--keep", action="store_true", help="Keep the test users and their data")
+    parser.add_argument("--verbose", action="store_true", help="Print every batch")
+    parser.add_argument("--json", metavar="PATH", help="Also write every run (with batches) as JSON")
+    args = parser.parse_args(argv)
+    args.base_url = args.base_url.rstrip('/')
+    args.supabase_url = args.supabase_url.rstrip('/')
+
+    feed_counts = parse_list(args.feeds)
+    modes = parse_list(args.modes, str)
+    batch_sizes = parse_list(args.batch_sizes) if args.driver == 'simulate' else [SERVER_BATCH_SIZE]
+    if any(m not in ('sequential', 'overlap') for m in modes):
+        parser.error("--modes takes sequential and/or overlap")
+
+    print()
+    print("=" * 70)
+    print(f"  FeedOwn - Refresh Batch Driver ({args.driver})")
+    print("=" * 70)
+    print(f"  Target:  {args.base_url if args.driver == 'api' else args.supabase_url}")
+    print(f"  Feeds:   {args.feed_url}")
+    print(f"  Rounds:  {args.rounds} per user; overlap runs {args.overlap} batches at once")
+    print()
+    print("-" * 70)
+    print(f"  {'Feeds':>5} {'Batch':>5} {'Mode / round':<14} {'Batches':>7} {'Total s':>8} "
+          f"{'p50 ms':>8} {'max ms':>8} {'New':>6} {'Failed':>6} {'Covered':>8} {'Rept':>5} "
+          f"{'Err':>4} {'Calls':>5}")
+    print(f"  {'─'*5} {'─'*5} {'─'*14} {'─'*7} {'─'*8} {'─'*8} {'─'*8} {'─'*6} {'─'*6} {'─'*8} {'─'*5} "
+          f"{'─'*4} {'─'*5}")
+
+    results = []
+    client = httpx.Client(base_url=args.base_url, timeout=args.timeout) if args.driver == 'api' else None
+    for n_feeds in feed_counts:
+        for batch_size in batch_sizes:
+            for mode in modes:
+                label = f'{n_feeds}f-{batch_size}b-{mode}'
+                if args.driver == 'api':
+                    user = ApiUser(args, client, label)
+                else:
+                    user = SimulatedUser(args, batch_size, label)
+                try:
+                    added = user.setup(n_feeds)
+                    for round_no in range(1, args.rounds + 1):
+                        result = run_refresh(user, added, batch_size, mode, args.overlap)
+                        result['round'] = round_no
+                        results.append(result)
+                        print_run(f"{mode[:10]} #{round_no}", result, args.verbose)
+                except httpx.HTTPError as e:
+                    print(f"  {n_feeds:>5} {batch_size:>5} {mode:<14} failed: {e}")
+                finally:
+                    user.cleanup()
+
+    print()
+    print("  Covered: distinct feeds refreshed / feeds. Rept: feeds refreshed more than once.")
+    if args.driver == 'simulate':
+        print(f"  Calls: most subrequests in one batch ('!' = over the {SUBREQUEST_LIMIT}-subrequest limit).")
+    print()
+    print("=" * 70)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'driver': args.driver, 'runs': results}, f, indent=2)
+        print(f"  Results written to {args.json}")
+
+    sys.exit(0 if results and not any(r['errors'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()